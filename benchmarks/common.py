@@ -0,0 +1,37 @@
+"""
+Helpers shared by the benchmark scripts. Import after django.setup().
+"""
+
+from contextlib import contextmanager
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.db import connection
+from expenses.models import Expense
+from expenses.synthetic import CATEGORIES, generate
+from reports.models import DailyExpenseRollup
+
+User = get_user_model()
+
+PERIOD_START = date(2024, 1, 1)
+PERIOD_DAYS = 730
+
+
+@contextmanager
+def test_database():
+    """Run the block against a freshly migrated test database, dropped afterwards"""
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def seed(users, expenses_per_user, password='bench-password'):
+    """Create users `bench0`... with one budget per category and synthetic expenses"""
+    print(f"Seeding {users} users x {expenses_per_user} expenses...")
+    generate(
+        users, len(CATEGORIES), expenses_per_user, start=PERIOD_START, days=PERIOD_DAYS,
+        prefix='bench', password=password, seed=42,
+    )
+    print(f"✓ {Expense.objects.count()} expenses, {DailyExpenseRollup.objects.count()} rollup rows")
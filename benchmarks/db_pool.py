@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Throughput and latency of the PostgreSQL connection modes
+
+Starts gunicorn (gthread workers) once per mode and drives it with
+benchmarks/load.py over HTTP:
+- per-request: a new connection for every request (DB_CONN_MAX_AGE=0,
+  the default)
+- persistent: each worker thread keeps its connection (DB_CONN_MAX_AGE)
+- pool: connections are handed back to a per-process pool (DB_POOL)
+
+Prints throughput, p50/p95/p99 latency and the connections the server
+held open at the end of each run (from pg_stat_activity). Needs the
+PostgreSQL settings (DB_ENGINE=django.db.backends.postgresql, DB_NAME...)
+in the environment or .env, and a database seeded with
+`python manage.py seed_load --users N`.
+
+Usage: python benchmarks/db_pool.py [--modes per-request,persistent,pool] [--workers 2] [--threads 4] [--requests 2000] [--concurrency 16] [--users 5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import django
+from pathlib import Path
+
+# Add the project directory to Python path
+project_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_dir))
+
+# Set Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'personal_budgeting_api.settings')
+
+# Initialize Django
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+
+MODES = {
+    'per-request': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '0'},
+    'persistent': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '600'},
+    'pool': {'DB_POOL': 'True'},
+}
+
+
+
+def server_connections():
+    """Connections to this database other than our own"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT count(*) FROM pg_stat_activity WHERE datname = current_database() AND pid <> pg_backend_pid()'
+        )
+        return cursor.fetchone()[0]
+
+
+def wait_until_up(url, server, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with status {server.returncode}')
+        try:
+            urllib.request.urlopen(f'{url}/api/', timeout=1)
+            return
+        except urllib.error.HTTPError:
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'gunicorn did not answer on {url} within {timeout}s')
+
+
+def run_mode(mode, args, port):
+    """The load.py report and the open connections of one mode"""
+    url = f'http://127.0.0.1:{port}'
+    env = {**os.environ, **MODES[mode], 'DEBUG': 'False', 'SECURE_SSL_REDIRECT': 'False',
+           'DB_POOL_MAX_SIZE': str(args.threads + settings.REPORT_QUERY_THREADS)}
+    server = subprocess.Popen(
+        ['gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers),
+         '--worker-class', 'gthread', '--threads', str(args.threads),
+         'personal_budgeting_api.wsgi:application'],
+        cwd=project_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(url, server)
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            subprocess.run(
+                [sys.executable, str(project_dir / 'benchmarks' / 'load.py'), '--url', url,
+                 '--requests', str(args.requests), '--concurrency', str(args.concurrency),
+                 '--users', str(args.users), '--output', output.name],
+                check=True, stderr=subprocess.DEVNULL,
+            )
+            report = json.loads(Path(output.name).read_text())
+        return report, server_connections()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated connection modes')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='Threads per worker')
+    parser.add_argument('--requests', type=int, default=2000, help='Timed requests per mode')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent requests')
+    parser.add_argument('--users', type=int, default=5, help='Users seeded with seed_load')
+    parser.add_argument('--port', type=int, default=8765, help='Port gunicorn listens on')
+    args = parser.parse_args()
+
+    if connection.vendor != 'postgresql':
+        sys.exit('⚠️  Set DB_ENGINE=django.db.backends.postgresql and the DB_* settings to run this benchmark')
+
+    print("🔌 Database connection benchmark")
+    print("=" * 50)
+    print(f"{args.workers} workers x {args.threads} threads, {args.requests} requests, concurrency {args.concurrency}")
+
+    results = {}
+    for mode in args.modes.split(','):
+        results[mode] = run_mode(mode, args, args.port)
+        print(f"✓ {mode}: {results[mode][0]['errors']} errors")
+    connection.close()
+
+    print(f"\n{'Mode':<12} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'connections':>12}")
+    for mode, (report, connections) in results.items():
+        endpoints = report['endpoints'].values()
+        weighted = {
+            percent: sum(summary[f'p{percent}_ms'] * summary['requests'] for summary in endpoints) / report['requests']
+            for percent in (50, 95, 99)
+        }
+        print(f"{mode:<12} {report['throughput_rps']:>8.1f} {weighted[50]:>7.2f}ms {weighted[95]:>7.2f}ms "
+              f"{weighted[99]:>7.2f}ms {connections:>12}")
+    print("\np50/p95/p99 are the endpoints' percentiles weighted by their request counts")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+End-to-end load benchmark
+
+Replays a weighted mix of list, create and report calls as several users
+and reports throughput and p50/p95/p99 latency per endpoint as JSON, so
+runs can be compared across commits.
+
+Two transports:
+- In process (default): seeds a throwaway test database with the
+  seed_load generator and sends the requests through Django's request
+  handler, one at a time
+- --url http://host:port: drives a running server over HTTP with
+  --concurrency threads; seed its database first with
+  `python manage.py seed_load --users N` (same --prefix and --password)
+
+The JSON goes to stdout, or to --output; progress goes to stderr.
+
+Usage: python benchmarks/load.py [--requests 2000] [--users 5] [--expenses 2000] [--url URL] [--concurrency 8] [--output load.json] [--compare previous.json]
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import django
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+# Add the project directory to Python path
+project_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_dir))
+
+# Set Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'personal_budgeting_api.settings')
+
+# Initialize Django
+django.setup()
+
+from django.conf import settings
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+from benchmarks.common import test_database
+from expenses.synthetic import CATEGORY_PROFILES, generate
+
+PERCENTILES = (50, 95, 99)
+
+# name: (weight, expected status)
+MIX = {
+    'expense list': (30, 200),
+    'expense list filtered': (8, 200),
+    'expense search': (5, 200),
+    'expense detail': (7, 200),
+    'budget list': (10, 200),
+    'expense create': (15, 201),
+    'monthly report': (15, 200),
+    'weekly report': (10, 200),
+}
+
+
+def log(message):
+    """Progress output, kept off stdout so it can carry the JSON"""
+    print(message, file=sys.stderr)
+
+
+class InProcessTransport:
+    """Requests through Django's handler, without a network or server"""
+    concurrency = 1
+
+    def __init__(self):
+        self.client = Client()
+
+    def request(self, method, path, token=None, body=None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        data = json.dumps(body) if body is not None else None
+        response = self.client.generic(method, path, data or '', content_type='application/json', **headers)
+        return response.status_code, response.content
+
+
+class HttpTransport:
+    """Requests to a running server, one keep-alive connection per thread"""
+
+    def __init__(self, url, concurrency):
+        parts = urlsplit(url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.concurrency = concurrency
+        self.local = threading.local()
+
+    def request(self, method, path, token=None, body=None):
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        data = json.dumps(body).encode() if body is not None else None
+        for attempt in range(2):
+            if getattr(self.local, 'connection', None) is None:
+                self.local.connection = self.connection_class(self.netloc, timeout=30)
+            try:
+                self.local.connection.request(method, self.prefix + path, data, headers)
+                response = self.local.connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                # The server closed an idle keep-alive connection: reconnect once
+                self.local.connection.close()
+                self.local.connection = None
+                if attempt:
+                    raise
+
+
+class VirtualUser:
+    """A logged-in user and the ids the mix needs"""
+
+    def __init__(self, transport, username, password):
+        status, content = transport.request(
+            'POST', reverse('token_obtain_pair'), body={'username': username, 'password': password}
+        )
+        if status != 200:
+            raise SystemExit(f"✗ Could not log in as {username} (HTTP {status}); seed the users with seed_load")
+        self.token = json.loads(content)['access']
+        self.budgets = self._results(transport, reverse('budgets:budget-list'))
+        self.expense_ids = [expense['id'] for expense in self._results(transport, reverse('expenses:expense-list'))]
+
+    def _results(self, transport, path):
+        status, content = transport.request('GET', path, self.token)
+        return json.loads(content)['results'] if status == 200 else []
+
+
+def build_request(name, user, rng):
+    """(method, path, body) of one call of the mix"""
+    if name == 'expense list':
+        return 'GET', reverse('expenses:expense-list') + f'?page={rng.randint(1, 5)}', None
+    if name == 'expense list filtered':
+        query = {'category': rng.choice(list(CATEGORY_PROFILES)), 'ordering': '-amount'}
+        return 'GET', reverse('expenses:expense-list') + '?' + urlencode(query), None
+    if name == 'expense search':
+        category = rng.choice(list(CATEGORY_PROFILES))
+        query = {'search': rng.choice(CATEGORY_PROFILES[category][3]).split()[0].lower()}
+        return 'GET', reverse('expenses:expense-list') + '?' + urlencode(query), None
+    if name == 'expense detail':
+        return 'GET', reverse('expenses:expense-detail', kwargs={'pk': rng.choice(user.expense_ids)}), None
+    if name == 'budget list':
+        return 'GET', reverse('budgets:budget-list'), None
+    if name == 'expense create':
+        budget = rng.choice(user.budgets)
+        body = {
+            'budget_id': budget['id'],
+            'description': rng.choice(CATEGORY_PROFILES.get(budget['category'], CATEGORY_PROFILES['Food'])[3]),
+            'amount': f'{rng.uniform(1, 80):.2f}',
+            'date': (date.today() - timedelta(days=rng.randrange(30))).isoformat(),
+            'category': budget['category'],
+        }
+        return 'POST', reverse('expenses:expense-list'), body
+    if name == 'monthly report':
+        months_ago = rng.randrange(12)
+        year, month = divmod(date.today().year * 12 + date.today().month - 1 - months_ago, 12)
+        query = {'month': month + 1, 'year': year}
+        return 'GET', reverse('reports:monthly-report') + '?' + urlencode(query), None
+    if name == 'weekly report':
+        return 'GET', reverse('reports:weekly-report') + f'?weeks_ago={rng.randrange(8)}', None
+    raise ValueError(f'Unknown call {name!r}')
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile of sorted samples"""
+    return samples[max(0, math.ceil(percent / 100 * len(samples)) - 1)]
+
+
+def summarize(samples, errors, elapsed):
+    """Request count, throughput and latency percentiles of one endpoint"""
+    samples.sort()
+    summary = {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(samples) / elapsed, 2),
+        'mean_ms': round(sum(samples) / len(samples), 2),
+    }
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = round(percentile(samples, percent), 2)
+    summary['max_ms'] = round(samples[-1], 2)
+    return summary
+
+
+def run(transport, users, requests, warmup, seed):
+    """Replay the mix; return (per-endpoint summaries, elapsed seconds)"""
+    rng = random.Random(seed)
+    names = list(MIX)
+    weights = [MIX[name][0] for name in names]
+    calls = zip(rng.choices(names, weights=weights, k=warmup + requests), rng.choices(users, k=warmup + requests))
+    plan = [
+        (name, user, build_request(name, user, rng))
+        for name, user in calls if name != 'expense detail' or user.expense_ids
+    ]
+    samples, errors = defaultdict(list), defaultdict(int)
+
+    def call(item):
+        name, user, (method, path, body) = item
+        started = time.perf_counter()
+        try:
+            status, _ = transport.request(method, path, user.token, body)
+        except OSError:
+            status = None
+        return name, (time.perf_counter() - started) * 1000, status == MIX[name][1]
+
+    for item in plan[:warmup]:
+        call(item)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(transport.concurrency) as executor:
+        for name, elapsed_ms, ok in executor.map(call, plan[warmup:]):
+            samples[name].append(elapsed_ms)
+            errors[name] += not ok
+    elapsed = time.perf_counter() - started
+    return {name: summarize(samples[name], errors[name], elapsed) for name in names if samples[name]}, elapsed
+
+
+def git_commit():
+    """Short hash of the checked-out commit, if any"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=project_dir, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, previous):
+    """Log throughput and p95 changes against a previous report"""
+    log(f"\nCompared with {previous.get('commit') or 'previous run'}:")
+    for name, summary in report['endpoints'].items():
+        before = previous.get('endpoints', {}).get(name)
+        if before:
+            change = summary['p95_ms'] / before['p95_ms'] - 1 if before['p95_ms'] else 0
+            log(f"  {name:<24} p95 {before['p95_ms']:>8.2f} -> {summary['p95_ms']:>8.2f} ms ({change:+.0%})")
+    before = previous.get('throughput_rps')
+    if before:
+        change = report['throughput_rps'] / before - 1
+        log(f"  {'total':<24} {before:>8.1f} -> {report['throughput_rps']:>8.1f} req/s ({change:+.0%})")
+
+
+def main():
+    """Main load benchmark function"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000, help='Timed requests (default: 2000)')
+    parser.add_argument('--warmup', type=int, default=100, help='Untimed requests sent first (default: 100)')
+    parser.add_argument('--users', type=int, default=5, help='Users sending the requests (default: 5)')
+    parser.add_argument('--budgets', type=int, default=8, help='Budgets per seeded user (in process only)')
+    parser.add_argument('--expenses', type=int, default=2000, help='Expenses per seeded user (in process only)')
+    parser.add_argument('--url', help='Base URL of a running server, e.g. http://localhost:8000')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent requests with --url (default: 8)')
+    parser.add_argument('--prefix', default='load', help='Username prefix used by seed_load (default: load)')
+    parser.add_argument('--password', default='loadtest-password', help='Password used by seed_load')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the data and of the request mix')
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+    parser.add_argument('--compare', help='Previous JSON report to compare with')
+    args = parser.parse_args()
+
+    log("🚚 Load benchmark")
+    log("=" * 50)
+
+    def drive(transport):
+        users = [VirtualUser(transport, f'{args.prefix}{n}', args.password) for n in range(args.users)]
+        log(f"Replaying {args.requests} requests as {len(users)} users, concurrency {transport.concurrency}...")
+        return run(transport, users, args.requests, args.warmup, args.seed)
+
+    if args.url:
+        endpoints, elapsed = drive(HttpTransport(args.url, args.concurrency))
+    else:
+        setup_test_environment()
+        # One process: its local-memory cache is the shared cache
+        settings.CACHE_IS_SHARED = True
+        with test_database():
+            log(f"Seeding {args.users} users x {args.budgets} budgets x {args.expenses} expenses...")
+            generate(args.users, args.budgets, args.expenses, prefix=args.prefix, password=args.password, seed=args.seed)
+            endpoints, elapsed = drive(InProcessTransport())
+
+    report = {
+        'commit': git_commit(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'transport': args.url or 'in-process',
+        'concurrency': args.concurrency if args.url else 1,
+        'users': args.users,
+        'requests': sum(summary['requests'] for summary in endpoints.values()),
+        'errors': sum(summary['errors'] for summary in endpoints.values()),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(sum(summary['requests'] for summary in endpoints.values()) / elapsed, 2),
+        'endpoints': endpoints,
+    }
+
+    log("")
+    for name, summary in endpoints.items():
+        log(f"  {name:<24} {summary['requests']:>5} req  p50 {summary['p50_ms']:>7.2f}  "
+            f"p95 {summary['p95_ms']:>7.2f}  p99 {summary['p99_ms']:>7.2f} ms  {summary['errors']} errors")
+    log(f"✓ {report['requests']} requests in {elapsed:.1f} s ({report['throughput_rps']} req/s)")
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+
+    output = json.dumps(report, indent=2) + '\n'
+    if args.output:
+        Path(args.output).write_text(output)
+        log(f"✓ Report written to {args.output}")
+    else:
+        sys.stdout.write(output)
+
+
+if __name__ == '__main__':
+    main()
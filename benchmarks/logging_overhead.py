@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Per-request cost of file logging, synchronous vs queued
+
+Sends authenticated in-process requests to the budget list, on a
+throwaway test database, while every request writes a few access-log
+style records to a file (on request_finished). Runs once with no log
+handler, once with the synchronous FileHandler and once with
+QueuedFileHandler, and prints the time each request spent in logging
+calls, which is the overhead of logging per request, and the median and
+p95 request latency. --disk-latency-ms makes every write to
+the log file that much slower, to show what a slow or busy disk does to
+the request path.
+
+Usage: python benchmarks/logging_overhead.py [--requests 2000] [--records 3] [--disk-latency-ms 0]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import django
+from pathlib import Path
+
+# Add the project directory to Python path
+project_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_dir))
+
+# Set Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'personal_budgeting_api.settings')
+
+# Initialize Django
+django.setup()
+
+from django.core.signals import request_finished
+from django.test.utils import setup_test_environment
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from benchmarks.common import User, seed, test_database
+from personal_budgeting_api.log_handlers import FileHandler, JSONFormatter, QueuedFileHandler
+
+logger = logging.getLogger('benchmarks.access')
+logger.propagate = False
+logger.setLevel(logging.INFO)
+
+
+class SlowStream:
+    """File stream whose writes take `delay` seconds longer"""
+
+    def __init__(self, stream, delay):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+        return self.stream.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def slow_down(handler, delay):
+    """Make every write of the file `handler` take `delay` seconds longer"""
+    if delay:
+        open_stream = handler._open
+        handler._open = lambda: SlowStream(open_stream(), delay)
+
+
+def build_handler(mode, directory, delay):
+    filename = os.path.join(directory, f'{mode}.log')
+    if mode == 'none':
+        return logging.NullHandler(), filename
+    if mode == 'sync':
+        handler = FileHandler(filename, delay=True)
+        handler.setFormatter(logging.Formatter('{levelname} {asctime} {module} {process:d} {thread:d} {message}', style='{'))
+        slow_down(handler, delay)
+    else:
+        handler = QueuedFileHandler(filename)
+        handler.setFormatter(JSONFormatter())
+        slow_down(handler.writer, delay)
+    return handler, filename
+
+
+def measure(client, url, requests, records):
+    """(latency, time spent logging) in ms of each request, each logging `records` records"""
+    logging_ms = []
+
+    def log_request(sender, **kwargs):
+        started = time.perf_counter()
+        for n in range(records):
+            logger.info('GET %s 200', url, extra={'record': n, 'user_agent': 'benchmark'})
+        logging_ms.append((time.perf_counter() - started) * 1000)
+
+    request_finished.connect(log_request)
+    try:
+        for _ in range(min(50, requests)):
+            client.get(url)
+        logging_ms.clear()
+        samples = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            client.get(url)
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples, logging_ms
+    finally:
+        request_finished.disconnect(log_request)
+
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000, help='Timed requests per mode')
+    parser.add_argument('--records', type=int, default=3, help='Log records written per request')
+    parser.add_argument('--disk-latency-ms', type=float, default=0, help='Extra latency of each log file write')
+    args = parser.parse_args()
+    delay = args.disk_latency_ms / 1000
+
+    print("🪵 Logging overhead benchmark")
+    print("=" * 50)
+    print(f"{args.requests} requests x {args.records} records, +{args.disk_latency_ms}ms per file write")
+
+    setup_test_environment()
+    with test_database(), tempfile.TemporaryDirectory() as directory:
+        seed(1, 200)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(User.objects.get(username="bench0"))}')
+        url = '/api/budgets/'
+
+        results = {}
+        for mode in ('none', 'sync', 'queued'):
+            handler, filename = build_handler(mode, directory, delay)
+            logger.addHandler(handler)
+            try:
+                samples = measure(client, url, args.requests, args.records)
+                started = time.perf_counter()
+                handler.flush()
+                drained = (time.perf_counter() - started) * 1000
+            finally:
+                logger.removeHandler(handler)
+                handler.close()
+            results[mode] = samples
+            written = sum(1 for _ in open(filename)) if os.path.exists(filename) else 0
+            note = f", queue drained {drained:.0f}ms after the last request" if mode == 'queued' else ''
+            print(f"✓ {mode}: {written} lines written{note}")
+
+    print(f"\n{'Mode':<8} {'logging/request':>16} {'p99':>10} {'median latency':>15} {'p95':>10}")
+    for mode, (samples, logging_ms) in results.items():
+        overhead = statistics.mean(logging_ms) * 1000
+        overhead_p99 = statistics.quantiles(logging_ms, n=100)[-1] * 1000
+        median = statistics.median(samples)
+        p95 = statistics.quantiles(samples, n=20)[-1]
+        print(f"{mode:<8} {overhead:>14.1f}µs {overhead_p99:>8.1f}µs {median:>13.3f}ms {p95:>8.3f}ms")
+
+
+if __name__ == '__main__':
+    main()
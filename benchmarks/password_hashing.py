@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Login throughput of each password hasher profile
+
+For every profile of PASSWORD_HASHER_PROFILES, with the cost settings in
+effect, times one password verification and full POST /api/login/
+requests against a throwaway test database, and prints the logins per
+second one core sustains. Logins are single-threaded, so the figures are
+per core; a gunicorn worker per core multiplies them.
+
+Usage: python benchmarks/password_hashing.py [--profiles pbkdf2,scrypt,argon2] [--logins 20]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import django
+from pathlib import Path
+
+# Add the project directory to Python path
+project_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_dir))
+
+# Set Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'personal_budgeting_api.settings')
+
+# Initialize Django
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, identify_hasher
+from django.test import override_settings
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+from rest_framework.test import APIClient
+from benchmarks.common import User, test_database
+
+PASSWORD = 'bench-login-password'
+
+
+def profile_hashers(profile):
+    """PASSWORD_HASHERS with `profile` first, as settings.py builds it"""
+    preferred = settings.PASSWORD_HASHER_PROFILES[profile]
+    return [preferred] + [hasher for hasher in settings.PASSWORD_HASHERS if hasher != preferred]
+
+
+def median_ms(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def measure(profile, logins):
+    """(parameters, verify ms, login ms) of `profile`"""
+    hasher = get_hasher('default')
+    encoded = hasher.encode(PASSWORD, hasher.salt())
+    verify = median_ms(lambda: hasher.verify(PASSWORD, encoded), logins)
+    parameters = {key: value for key, value in hasher.safe_summary(encoded).items()
+                  if str(key) not in ('algorithm', 'variety', 'version', 'salt', 'hash')}
+
+    user = User.objects.create_user(f'bench-{profile}', password=PASSWORD)
+    client = APIClient()
+    url = reverse('users:login')
+    data = {'username': user.username, 'password': PASSWORD}
+    response = client.post(url, data, format='json')
+    if response.status_code != 200:
+        raise AssertionError(f'{profile}: login returned {response.status_code}')
+    login = median_ms(lambda: client.post(url, data, format='json'), logins)
+    return parameters, verify, login
+
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--profiles', default=','.join(settings.PASSWORD_HASHER_PROFILES), help='Comma-separated profiles')
+    parser.add_argument('--logins', type=int, default=20, help='Timed logins per profile')
+    args = parser.parse_args()
+
+    print("🔑 Password hashing benchmark")
+    print("=" * 50)
+    setup_test_environment()
+    results = []
+    with test_database():
+        for profile in args.profiles.split(','):
+            with override_settings(PASSWORD_HASHERS=profile_hashers(profile)):
+                try:
+                    results.append((profile, *measure(profile, args.logins)))
+                except (ValueError, ImportError) as exc:
+                    print(f"⚠️  {profile}: {exc}")
+                    continue
+            print(f"✓ {profile}")
+
+        # A hash made by one profile is rehashed by the next login under another
+        user = User.objects.get(username=f'bench-{results[0][0]}') if results else None
+        if user and len(results) > 1:
+            with override_settings(PASSWORD_HASHERS=profile_hashers(results[-1][0])):
+                APIClient().post(reverse('users:login'), {'username': user.username, 'password': PASSWORD}, format='json')
+                user.refresh_from_db()
+                print(f"✓ {results[0][0]} hash rehashed as {identify_hasher(user.password).algorithm} at login")
+
+    print(f"\n{'Profile':<8} {'parameters':<52} {'verify':>9} {'login':>9} {'logins/s/core':>14}")
+    for profile, parameters, verify, login in results:
+        summary = ', '.join(f'{key}={value}' for key, value in parameters.items())
+        print(f"{profile:<8} {summary:<52} {verify:>7.1f}ms {login:>7.1f}ms {1000 / login:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Query plan benchmark for the per-user composite indexes
+
+Runs on a throwaway test database (never the configured one):
+- Migrate to the state before the composite indexes
+- Seed a large dataset
+- Print EXPLAIN plans and timings for each endpoint's main query
+- Apply the index migrations and repeat
+- Print a before/after comparison
+
+Usage: python benchmarks/query_plans.py [--users 20] [--expenses 5000] [--repeat 20]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import django
+from datetime import date
+from pathlib import Path
+
+# Add the project directory to Python path
+project_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_dir))
+
+# Set Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'personal_budgeting_api.settings')
+
+# Initialize Django
+django.setup()
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Sum
+from benchmarks.common import User, seed, test_database
+from budgets.models import Budget
+from expenses.exports import EXPORT_LOOKUPS
+from expenses.models import Expense
+from expenses.pagination import KeysetPagination
+from reports.engine import ReportEngine
+
+# Latest migration of each app before the composite indexes
+BEFORE_INDEXES = [
+    ('budgets', '0003_budget_spent_counters'),
+    ('expenses', '0002_initial'),
+    ('reports', '0001_daily_expense_rollup'),
+]
+
+
+def migrate(targets):
+    """Migrate the test database to `targets` (all leaf nodes if None)"""
+    executor = MigrationExecutor(connection)
+    executor.migrate(targets or executor.loader.graph.leaf_nodes())
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def endpoint_queries(user):
+    """(endpoint, queryset) pairs for the main query behind each endpoint"""
+    expenses = Expense.objects.filter(user=user)
+    budget = Budget.objects.filter(user=user).first()
+    some_day = expenses.values_list('date', flat=True)[expenses.count() // 2]
+
+    # Position of the last page a keyset client would reach
+    ordering = ['-date', '-created_at', 'id']
+    position = expenses.order_by(*ordering).values_list('date', 'created_at', 'id')[expenses.count() - 20]
+    deep_page = KeysetPagination()._after(ordering, position)
+
+    month = ReportEngine(user, date(2025, 6, 1), date(2025, 6, 30))
+    return [
+        ('GET /api/expenses/', expenses.select_related('budget', 'user').order_by('-date')[:20]),
+        ('GET /api/expenses/?budget=', expenses.filter(budget=budget).order_by('-date')[:20]),
+        ('GET /api/expenses/?category=', expenses.filter(category='Food').order_by('-date')[:20]),
+        ('GET /api/expenses/?date=', expenses.filter(date=some_day).order_by('-date')),
+        ('GET /api/expenses/?pagination=cursor (last page)', expenses.filter(deep_page).order_by(*ordering)[:21]),
+        ('GET /api/expenses/export/', expenses.order_by('-date').values_list(*EXPORT_LOOKUPS)),
+        ('GET /api/budgets/', Budget.objects.filter(user=user).select_related('user')),
+        ('GET /api/reports/monthly/ (by category)', month.rollups().values('category').annotate(
+            total=Sum('total')
+        ).order_by('-total')),
+        ('GET /api/reports/weekly/ (by day)', month.rollups().values('date').annotate(
+            total=Sum('total')
+        ).order_by('date')),
+    ]
+
+
+def measure(user, repeat):
+    """Print plans and return {endpoint: median milliseconds}"""
+    timings = {}
+    for endpoint, queryset in endpoint_queries(user):
+        print(f"\n{endpoint}")
+        for line in queryset.explain().splitlines():
+            print(f"    {line}")
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.all())
+            samples.append((time.perf_counter() - started) * 1000)
+        timings[endpoint] = statistics.median(samples)
+        print(f"    median {timings[endpoint]:.2f} ms over {repeat} runs")
+    return timings
+
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--expenses', type=int, default=5000, help='Expenses per user')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query')
+    args = parser.parse_args()
+
+    print("📊 Query plan benchmark")
+    print("=" * 50)
+    with test_database():
+        migrate(BEFORE_INDEXES)
+        seed(args.users, args.expenses)
+        user = User.objects.order_by('id')[args.users // 2]
+
+        print("\n📋 Before composite indexes")
+        before = measure(user, args.repeat)
+        migrate(None)
+        print("\n📋 After composite indexes")
+        after = measure(user, args.repeat)
+
+    print("\n" + "=" * 50)
+    width = max(len(endpoint) for endpoint in before)
+    print(f"{'endpoint':<{width}}  {'before':>10}  {'after':>10}  {'speedup':>8}")
+    for endpoint, before_ms in before.items():
+        after_ms = after[endpoint]
+        print(f"{endpoint:<{width}}  {before_ms:>8.2f}ms  {after_ms:>8.2f}ms  {before_ms / after_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Query-count and latency regression harness for every API endpoint
+
+Runs on a throwaway test database (never the configured one):
+- Seed users with realistic volumes
+- Call every URL in personal_budgeting_api/urls.py (admin excepted) through
+  the full middleware and JWT authentication stack
+- Compare the SQL query count and median latency of each scenario with
+  benchmarks/baseline.json
+
+Exits with status 1 if any scenario runs more queries than its baseline,
+is slower than its baseline by more than the latency tolerance, has no
+baseline, or if a URL has no scenario. Query counts do not depend on the
+machine; latencies do, so re-record the baseline on the machine that
+enforces it.
+
+Usage: python benchmarks/regression.py [--update] [--repeat 15] [--latency-tolerance 0.5] [--latency-slack-ms 2]
+"""
+
+import argparse
+import io
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+import django
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+# Add the project directory to Python path
+project_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_dir))
+
+# Set Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'personal_budgeting_api.settings')
+
+# Initialize Django
+django.setup()
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import URLPattern, get_resolver, reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from benchmarks.common import User, seed, test_database
+from budgets.models import Budget
+from expenses.models import Expense
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+PASSWORD = 'bench-password-123'
+SEED_USERS = 3
+SEED_EXPENSES = 3000
+
+_unique = itertools.count()
+
+
+@dataclass
+class Scenario:
+    """One request against one URL name"""
+    name: str
+    url_name: str
+    method: str = 'get'
+    params: dict = field(default_factory=dict)
+    # Called before each run (not timed): returns (url kwargs, body)
+    prepare: Optional[Callable] = None
+    data: Optional[dict] = None
+    format: str = 'json'
+    status: int = 200
+    staff: bool = False
+    # Clear the cache before each run, so cached reports are rebuilt
+    cold: bool = False
+    anonymous: bool = False
+    # Called before each run (not timed): returns an access token to use
+    # instead of the shared client's, for requests that revoke it
+    token: Optional[Callable] = None
+
+
+def _budget(user):
+    return Budget.objects.filter(user=user).first()
+
+
+def _expense(user):
+    return Expense.objects.filter(user=user).first()
+
+
+def _new_budget(user):
+    return Budget.objects.create(
+        user=user, name=f'Scratch {next(_unique)}', category='Scratch', total_amount='100.00'
+    )
+
+
+def _new_expense(user):
+    budget = _budget(user)
+    return Expense.objects.create(
+        user=user, budget=budget, description='Scratch', amount='1.00', date='2025-06-15', category=budget.category
+    )
+
+
+def _statement(user):
+    lines = ['date,description,amount,category'] + [
+        f'2025-06-{n % 28 + 1:02d},Imported {n},{n + 1}.25,Food' for n in range(200)
+    ]
+    upload = io.BytesIO('\n'.join(lines).encode())
+    upload.name = 'statement.csv'
+    return {}, {'file': upload, 'budget_id': _budget(user).id}
+
+
+def scenarios(user):
+    """Scenarios covering every API URL; `user` is the seeded user making the calls"""
+    expense_items = [
+        {'budget_id': _budget(user).id, 'description': f'Bulk {n}', 'amount': '3.50',
+         'date': '2025-06-10', 'category': 'Food'}
+        for n in range(50)
+    ]
+    return [
+        Scenario('token obtain', 'token_obtain_pair', 'post', anonymous=True,
+                 data={'username': user.username, 'password': PASSWORD}),
+        Scenario('token refresh', 'token_refresh', 'post', anonymous=True,
+                 prepare=lambda: ({}, {'refresh': _refresh_token(user)})),
+        Scenario('register', 'users:register', 'post', anonymous=True, status=201,
+                 prepare=lambda: ({}, _registration())),
+        Scenario('login', 'users:login', 'post', anonymous=True,
+                 data={'username': user.username, 'password': PASSWORD}),
+        Scenario('logout', 'users:logout', 'post', token=lambda: str(AccessToken.for_user(user)),
+                 prepare=lambda: ({}, {'refresh': _refresh_token(user)})),
+        Scenario('profile', 'users:profile'),
+        Scenario('profile update', 'users:profile', 'patch', data={'first_name': 'Bench'}),
+
+        Scenario('budget list', 'budgets:budget-list'),
+        Scenario('budget list sparse', 'budgets:budget-list', params={'fields': 'id,name,remaining_amount'}),
+        Scenario('budget create', 'budgets:budget-list', 'post', status=201,
+                 prepare=lambda: ({}, {'name': f'New {next(_unique)}', 'category': 'New', 'total_amount': '10.00'})),
+        Scenario('budget detail', 'budgets:budget-detail', prepare=lambda: ({'pk': _budget(user).pk}, None)),
+        Scenario('budget update', 'budgets:budget-detail', 'patch',
+                 prepare=lambda: ({'pk': _budget(user).pk}, {'total_amount': '5000.00'})),
+        Scenario('budget delete', 'budgets:budget-detail', 'delete', status=204,
+                 prepare=lambda: ({'pk': _new_budget(user).pk}, None)),
+
+        Scenario('expense list', 'expenses:expense-list'),
+        Scenario('expense list deep page', 'expenses:expense-list', params={'page': 100}),
+        Scenario('expense list cursor', 'expenses:expense-list', params={'pagination': 'cursor'}),
+        Scenario('expense list filtered', 'expenses:expense-list', params={'category': 'Food', 'ordering': 'amount'}),
+        Scenario('expense list search', 'expenses:expense-list', params={'search': 'coffee'}),
+        Scenario('expense list sparse', 'expenses:expense-list', params={'fields': 'id,amount,date'}),
+        Scenario('expense create', 'expenses:expense-list', 'post', status=201,
+                 data={'budget_id': _budget(user).id, 'description': 'Lunch', 'amount': '12.00',
+                       'date': '2025-06-12', 'category': 'Food'}),
+        Scenario('expense bulk create', 'expenses:expense-bulk-create', 'post', status=201, data=expense_items),
+        Scenario('expense export', 'expenses:expense-export', params={'format': 'csv'}),
+        Scenario('expense import', 'expenses:expense-import', 'post', status=201, format='multipart',
+                 prepare=lambda: _statement(user)),
+        Scenario('expense detail', 'expenses:expense-detail', prepare=lambda: ({'pk': _expense(user).pk}, None)),
+        Scenario('expense update', 'expenses:expense-detail', 'patch',
+                 prepare=lambda: ({'pk': _expense(user).pk}, {'description': f'Edited {next(_unique)}'})),
+        Scenario('expense delete', 'expenses:expense-detail', 'delete', status=204,
+                 prepare=lambda: ({'pk': _new_expense(user).pk}, None)),
+
+        Scenario('monthly report', 'reports:monthly-report', params={'month': 6, 'year': 2025}, cold=True),
+        Scenario('monthly report cached', 'reports:monthly-report', params={'month': 6, 'year': 2025}),
+        Scenario('weekly report', 'reports:weekly-report', params={'weeks_ago': 30}, cold=True),
+        Scenario('report cache stats', 'reports:cache-stats', staff=True),
+        Scenario('metrics', 'metrics', anonymous=True),
+    ]
+
+
+def _refresh_token(user):
+    return str(RefreshToken.for_user(user))
+
+
+def _registration():
+    n = next(_unique)
+    return {
+        'username': f'new{n}', 'email': f'new{n}@example.com',
+        'password': PASSWORD, 'password_confirm': PASSWORD,
+        'first_name': 'New', 'last_name': 'User',
+    }
+
+
+def api_url_names(patterns=None, namespace=''):
+    """Qualified names of every routed URL outside the admin"""
+    names = set()
+    for pattern in patterns if patterns is not None else get_resolver().url_patterns:
+        if isinstance(pattern, URLPattern):
+            if pattern.name:
+                names.add(namespace + pattern.name)
+        elif pattern.namespace != 'admin':
+            prefix = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            names |= api_url_names(pattern.url_patterns, prefix)
+    return names
+
+
+def authenticated_client(username):
+    client = APIClient()
+    response = client.post(reverse('token_obtain_pair'), {'username': username, 'password': PASSWORD})
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+    return client
+
+
+def run(scenario, clients, repeat):
+    """Return (max query count, median ms) of a scenario over `repeat` runs plus a warm-up"""
+    client = clients['anonymous' if scenario.anonymous else 'staff' if scenario.staff else 'user']
+    counts, timings = [], []
+    for attempt in range(repeat + 1):
+        kwargs, data = scenario.prepare() if scenario.prepare else ({}, scenario.data)
+        if scenario.token:
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {scenario.token()}')
+        url = reverse(scenario.url_name, kwargs=kwargs)
+        if scenario.params:
+            url += '?' + '&'.join(f'{key}={value}' for key, value in scenario.params.items())
+        if scenario.cold:
+            cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, scenario.method)(url, data, format=scenario.format)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = (time.perf_counter() - started) * 1000
+
+        if response.status_code != scenario.status:
+            raise AssertionError(f'{scenario.name}: expected {scenario.status}, got {response.status_code}')
+        if attempt:
+            counts.append(len(queries))
+            timings.append(elapsed)
+    return max(counts), statistics.median(timings)
+
+
+def compare(results, baseline, tolerance, slack_ms):
+    """Regression messages for results that exceed the baseline"""
+    failures = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            failures.append(f'{name}: no baseline (run with --update)')
+            continue
+        if result['queries'] > expected['queries']:
+            failures.append(f"{name}: {result['queries']} queries, baseline {expected['queries']}")
+        limit = max(expected['median_ms'] * (1 + tolerance), expected['median_ms'] + slack_ms)
+        if result['median_ms'] > limit:
+            failures.append(f"{name}: median {result['median_ms']:.2f} ms, baseline {expected['median_ms']:.2f} ms")
+    return failures
+
+
+def main():
+    """Main harness function"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--update', action='store_true', help='Record the results as the new baseline')
+    parser.add_argument('--repeat', type=int, default=15, help='Timed runs per scenario')
+    parser.add_argument('--latency-tolerance', type=float, default=0.5,
+                        help='Allowed median slowdown as a fraction of the baseline (default 0.5 = +50%%)')
+    parser.add_argument('--latency-slack-ms', type=float, default=2.0,
+                        help='Allowed median slowdown in ms, whichever of the two is larger')
+    parser.add_argument('--users', type=int, default=SEED_USERS)
+    parser.add_argument('--expenses', type=int, default=SEED_EXPENSES, help='Expenses per user')
+    args = parser.parse_args()
+
+    print("🔁 Endpoint regression harness")
+    print("=" * 50)
+    setup_test_environment()
+    # The revoked-token deny-list syncs on a timer; keep that query out of the counts
+    settings.TOKEN_REVOCATION_SYNC_SECONDS = float('inf')
+    # One process: its local-memory cache is the shared cache
+    settings.CACHE_IS_SHARED = True
+    # The test client's address, so the metrics scenario needs no scrape token
+    settings.INTERNAL_IPS = ['127.0.0.1']
+    results = {}
+    with test_database():
+        seed(args.users, args.expenses, password=PASSWORD)
+        user = User.objects.get(username='bench0')
+        staff = User.objects.create_user('bench-staff', password=PASSWORD, is_staff=True)
+        clients = {
+            'user': authenticated_client(user.username),
+            'staff': authenticated_client(staff.username),
+            'anonymous': APIClient(),
+        }
+
+        plan = scenarios(user)
+        uncovered = api_url_names() - {scenario.url_name for scenario in plan}
+        if uncovered:
+            print(f"✗ No scenario for: {', '.join(sorted(uncovered))}")
+            sys.exit(1)
+
+        for scenario in plan:
+            queries, median_ms = run(scenario, clients, args.repeat)
+            results[scenario.name] = {'queries': queries, 'median_ms': round(median_ms, 2)}
+            print(f"  {scenario.name:<28} {queries:>4} queries  {median_ms:>8.2f} ms")
+
+    if args.update:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2) + '\n')
+        print(f"\n✓ Baseline written to {BASELINE_PATH.relative_to(project_dir)}")
+        return
+
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    failures = compare(results, baseline, args.latency_tolerance, args.latency_slack_ms)
+    print("\n" + "=" * 50)
+    if failures:
+        print(f"❌ {len(failures)} regression(s):")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("🎉 No regressions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+JSON rendering and parsing micro-benchmark
+
+Renders large expense pages and report payloads, built from seeded data
+on a throwaway test database, with DRF's JSONRenderer and with
+FastJSONRenderer, checks that both produce the same bytes and prints the
+median time of each. Also parses a bulk-create request body with both
+parsers.
+
+Usage: python benchmarks/serialization.py [--page-sizes 20,100,1000] [--repeat 50]
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+import django
+from datetime import date
+from pathlib import Path
+
+# Add the project directory to Python path
+project_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_dir))
+
+# Set Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'personal_budgeting_api.settings')
+
+# Initialize Django
+django.setup()
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from benchmarks.common import User, seed, test_database
+from expenses.models import Expense
+from expenses.serializers import ExpenseSerializer
+from personal_budgeting_api import fast_json
+from personal_budgeting_api.fast_json import FastJSONParser, FastJSONRenderer
+from reports.engine import ReportEngine
+
+
+def median_ms(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def payloads(user, page_sizes):
+    """(name, data) of the payloads to render"""
+    expenses = Expense.objects.filter(user=user).select_related('budget', 'user')
+    items = [
+        (f'expense page ({size} rows)', {
+            'count': expenses.count(), 'next': None, 'previous': None,
+            'results': ExpenseSerializer(expenses[:size], many=True).data,
+        })
+        for size in page_sizes
+    ]
+    items.append(('monthly report', ReportEngine(user, date(2025, 6, 1), date(2025, 6, 30)).monthly()))
+    items.append(('yearly report', ReportEngine(user, date(2025, 1, 1), date(2025, 12, 31)).weekly()))
+    return items
+
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--page-sizes', default='20,100,1000', help='Comma-separated expense page sizes')
+    parser.add_argument('--repeat', type=int, default=50, help='Timed runs per payload')
+    args = parser.parse_args()
+    page_sizes = [int(size) for size in args.page_sizes.split(',')]
+
+    print("🧾 JSON rendering benchmark")
+    print("=" * 50)
+    if fast_json.orjson is None:
+        print("⚠️  orjson is not installed: FastJSONRenderer falls back to JSONRenderer")
+
+    stock, fast = JSONRenderer(), FastJSONRenderer()
+    with test_database():
+        seed(1, max(page_sizes))
+        items = payloads(User.objects.get(username='bench0'), page_sizes)
+
+    print(f"\n{'Payload':<28} {'bytes':>9} {'JSONRenderer':>14} {'FastJSON':>10} {'speedup':>8}")
+    for name, data in items:
+        expected = stock.render(data)
+        if fast.render(data) != expected:
+            print(f"✗ {name}: FastJSONRenderer output differs from JSONRenderer")
+            sys.exit(1)
+        before = median_ms(lambda: stock.render(data), args.repeat)
+        after = median_ms(lambda: fast.render(data), args.repeat)
+        print(f"{name:<28} {len(expected):>9} {before:>12.3f}ms {after:>8.3f}ms {before / after:>7.1f}x")
+
+    body = JSONRenderer().render([
+        {'budget_id': 1, 'description': f'Item {n}', 'amount': '12.50', 'date': '2025-06-01', 'category': 'Food'}
+        for n in range(500)
+    ])
+    before = median_ms(lambda: JSONParser().parse(io.BytesIO(body)), args.repeat)
+    after = median_ms(lambda: FastJSONParser().parse(io.BytesIO(body)), args.repeat)
+    print(f"{'parse bulk body (500 items)':<28} {len(body):>9} {before:>12.3f}ms {after:>8.3f}ms {before / after:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,7 +9,7 @@ class BudgetAdmin(admin.ModelAdmin):
     list_filter = ['category', 'created_at', 'user']
     search_fields = ['name', 'user__username', 'category']
     ordering = ['-created_at']
-    readonly_fields = ['remaining_amount', 'spent_percentage', 'created_at', 'updated_at']
+    readonly_fields = ['spent_total', 'expense_count', 'remaining_amount', 'spent_percentage', 'created_at', 'updated_at']
     
     fieldsets = (
         ('Basic Information', {
@@ -20,7 +20,11 @@ class BudgetAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Calculated Fields', {
-            'fields': ('remaining_amount', 'spent_percentage'),
+            'fields': ('spent_total', 'expense_count', 'remaining_amount', 'spent_percentage'),
             'classes': ('collapse',)
         }),
     )
+    
+    def get_queryset(self, request):
+        """Optimize queryset with select_related"""
+        return super().get_queryset(request).select_related('user')
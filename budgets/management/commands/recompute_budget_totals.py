@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from budgets.models import Budget
+
+
+class Command(BaseCommand):
+    """Report and repair drift in the denormalized budget spend counters"""
+    help = 'Recompute Budget.spent_total and Budget.expense_count from the expense rows'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report drifted budgets, do not rewrite them'
+        )
+        parser.add_argument(
+            '--user',
+            help='Limit the check to budgets of this username'
+        )
+    
+    def handle(self, *args, **options):
+        budgets = Budget.objects.all()
+        if options['user']:
+            budgets = budgets.filter(user__username=options['user'])
+        
+        drifted = list(
+            budgets.with_drift().order_by('pk').values_list(
+                'pk', 'spent_total', 'spent_amount', 'expense_count', 'actual_count'
+            )
+        )
+        for pk, spent_total, spent_amount, expense_count, actual_count in drifted:
+            self.stdout.write(self.style.WARNING(
+                f"Budget {pk}: spent_total {spent_total} -> {spent_amount}, "
+                f"expense_count {expense_count} -> {actual_count}"
+            ))
+        
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('No drift found'))
+            return
+        
+        if options['dry_run']:
+            self.stdout.write(f"{len(drifted)} budget(s) drifted (dry run, nothing changed)")
+            return
+        
+        fixed = Budget.objects.filter(pk__in=[row[0] for row in drifted]).recompute_spent()
+        self.stdout.write(self.style.SUCCESS(f"Recomputed {fixed} budget(s)"))
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:10
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_spent_counters(apps, schema_editor):
+    Budget = apps.get_model('budgets', 'Budget')
+    Expense = apps.get_model('expenses', 'Expense')
+    per_budget = Expense.objects.filter(budget=OuterRef('pk')).order_by().values('budget')
+    Budget.objects.update(
+        spent_total=Coalesce(
+            Subquery(per_budget.annotate(total=Sum('amount')).values('total')),
+            Decimal('0'),
+        ),
+        expense_count=Coalesce(
+            Subquery(per_budget.annotate(count=Count('pk')).values('count')),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgets', '0002_initial'),
+        ('expenses', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='budget',
+            name='expense_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='budget',
+            name='spent_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, max_digits=14),
+        ),
+        migrations.RunPython(populate_spent_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgets', '0003_budget_spent_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['user', '-created_at'], name='budget_user_created_idx'),
+        ),
+    ]
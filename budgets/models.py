@@ -1,36 +1,114 @@
+from decimal import Decimal
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
+class BudgetQuerySet(models.QuerySet):
+    """QuerySet for Budget with SQL-side spend calculations"""
+    
+    def with_spent(self):
+        """Annotate each budget with the sum of its expenses as `spent_amount`"""
+        return self.annotate(
+            spent_amount=Coalesce(Sum('expenses__amount'), Decimal('0'))
+        )
+    
+    def with_drift(self):
+        """Budgets whose stored counters disagree with their actual expenses"""
+        return self.with_spent().annotate(
+            actual_count=Count('expenses')
+        ).exclude(
+            spent_total=F('spent_amount'),
+            expense_count=F('actual_count')
+        )
+    
+    def adjust_spent_many(self, deltas):
+        """Apply `{budget_id: (amount, count)}` deltas atomically in one UPDATE"""
+        budgets = [
+            self.model(
+                pk=budget_id,
+                spent_total=F('spent_total') + amount,
+                expense_count=F('expense_count') + count
+            )
+            for budget_id, (amount, count) in deltas.items()
+        ]
+        return self.bulk_update(budgets, ['spent_total', 'expense_count'])
+    
+    def recompute_spent(self):
+        """Rewrite the running totals from the expense rows, in one UPDATE"""
+        Expense = self.model._meta.get_field('expenses').related_model
+        per_budget = Expense.objects.filter(budget=OuterRef('pk')).order_by().values('budget')
+        return self.update(
+            spent_total=Coalesce(
+                Subquery(per_budget.annotate(total=Sum('amount')).values('total')),
+                Decimal('0')
+            ),
+            expense_count=Coalesce(
+                Subquery(per_budget.annotate(count=Count('pk')).values('count')),
+                0
+            )
+        )
+    
+    def adjust_spent(self, budget_id, amount, count):
+        """Atomically add `amount` and `count` to a budget's running totals"""
+        return self.filter(pk=budget_id).update(
+            spent_total=F('spent_total') + amount,
+            expense_count=F('expense_count') + count
+        )
+
+
 class Budget(models.Model):
     """Budget model for managing user budgets"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='budgets')
     name = models.CharField(max_length=100)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     category = models.CharField(max_length=100)
+    # Running totals of this budget's expenses, maintained by expenses.signals
+    spent_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'), editable=False)
+    expense_count = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = BudgetQuerySet.as_manager()
+    
+    COUNTER_FIELDS = ('spent_total', 'expense_count')
+    
     class Meta:
         db_table = 'budgets_budget'
         ordering = ['-created_at']
         unique_together = ['user', 'name', 'category']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='budget_user_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.category} (${self.total_amount})"
     
+    def save(self, *args, **kwargs):
+        """Save the budget, leaving the running totals to their F() updates.
+
+        An instance loaded before an expense was added holds stale counters;
+        writing them back would undo that expense's update, so saves of an
+        existing budget skip them unless `update_fields` names them.
+        """
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
     @property
     def remaining_amount(self):
         """Calculate remaining budget amount"""
-        total_expenses = sum(expense.amount for expense in self.expenses.all())
-        return self.total_amount - total_expenses
+        return self.total_amount - self.spent_total
     
     @property
     def spent_percentage(self):
         """Calculate percentage of budget spent"""
         if self.total_amount == 0:
             return 0
-        total_expenses = sum(expense.amount for expense in self.expenses.all())
-        return (total_expenses / self.total_amount) * 100
+        return (self.spent_total / self.total_amount) * 100
@@ -1,9 +1,11 @@
 from rest_framework import serializers
+from personal_budgeting_api.sparse_fields import SparseFieldsSerializerMixin
 from .models import Budget
 
 
-class BudgetSerializer(serializers.ModelSerializer):
-    """Serializer for Budget model"""
+class BudgetSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    """Serializer for Budget model; honors `?fields=` and `?omit=`"""
+    # Derived from the denormalized Budget.spent_total counter
     remaining_amount = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     spent_percentage = serializers.FloatField(read_only=True)
     user = serializers.ReadOnlyField(source='user.username')
@@ -15,6 +17,11 @@ class BudgetSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'remaining_amount', 'spent_percentage'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        # Columns read by the properties behind the spend fields
+        field_sources = {
+            'remaining_amount': ['total_amount', 'spent_total'],
+            'spent_percentage': ['total_amount', 'spent_total'],
+        }
 
 
 class BudgetCreateSerializer(serializers.ModelSerializer):
@@ -0,0 +1,16 @@
+"""
+Invalidate per-user cached data on every Budget write.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from users.versioning import data_changed
+from .models import Budget
+
+
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+def budget_changed(sender, instance, raw=False, using=None, **kwargs):
+    """Bump the owner's data version"""
+    if raw:
+        return
+    data_changed(instance.user_id, using=using)
@@ -1,11 +1,17 @@
-from django.test import TestCase
+from unittest import mock
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from .models import Budget
+from .views import BudgetListView
 from expenses.models import Expense
 from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 User = get_user_model()
 
@@ -72,6 +78,35 @@ class BudgetModelTest(TestCase):
         
         self.assertEqual(zero_budget.spent_percentage, 0)
     
+    def test_saving_stale_instance_keeps_counters(self):
+        """Test that saving a budget loaded before an expense keeps that expense's totals"""
+        stale = Budget.objects.get(pk=self.budget.pk)
+        Expense.objects.create(
+            budget_id=self.budget.pk,
+            user=self.user,
+            description='Grocery shopping',
+            amount=Decimal('40.00'),
+            date='2025-01-15',
+            category='Food'
+        )
+        
+        stale.name = 'Groceries'
+        stale.save()
+        
+        self.budget.refresh_from_db()
+        self.assertEqual(self.budget.name, 'Groceries')
+        self.assertEqual(self.budget.spent_total, Decimal('40.00'))
+        self.assertEqual(self.budget.expense_count, 1)
+    
+    def test_counters_written_when_named(self):
+        """Test that update_fields can still write the counters explicitly"""
+        self.budget.spent_total = Decimal('5.00')
+        self.budget.expense_count = 2
+        self.budget.save(update_fields=['spent_total', 'expense_count'])
+        
+        self.budget.refresh_from_db()
+        self.assertEqual((self.budget.spent_total, self.budget.expense_count), (Decimal('5.00'), 2))
+    
     def test_budget_string_representation(self):
         """Test budget string representation"""
         expected = "Test Budget - Food ($1000.00)"
@@ -212,3 +247,293 @@ class BudgetAPITest(APITestCase):
         url = reverse('budgets:budget-list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class BudgetQuerySetTest(APITestCase):
+    """Test cases for SQL-side budget spend calculations"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def _create_budgets(self, count, expenses_per_budget):
+        budgets = Budget.objects.bulk_create([
+            Budget(
+                user=self.user,
+                name=f'Budget {i}',
+                total_amount=Decimal('200.00'),
+                category='Food'
+            )
+            for i in range(count)
+        ])
+        Expense.objects.bulk_create([
+            Expense(
+                budget=budget,
+                user=self.user,
+                description='Expense',
+                amount=Decimal('10.00'),
+                date='2025-01-15',
+                category='Food'
+            )
+            for budget in budgets
+            for _ in range(expenses_per_budget)
+        ])
+        # bulk_create bypasses the signals that maintain the counters
+        Budget.objects.recompute_spent()
+    
+    def test_with_spent_annotation(self):
+        """Test that with_spent() annotates the expense total"""
+        self._create_budgets(2, expenses_per_budget=3)
+        Budget.objects.create(
+            user=self.user,
+            name='Empty Budget',
+            total_amount=Decimal('50.00'),
+            category='Food'
+        )
+        
+        budgets = {b.name: b for b in Budget.objects.with_spent()}
+        
+        self.assertEqual(budgets['Budget 0'].spent_amount, Decimal('30.00'))
+        self.assertEqual(budgets['Budget 0'].remaining_amount, Decimal('170.00'))
+        self.assertEqual(budgets['Budget 0'].spent_percentage, 15)
+        self.assertEqual(budgets['Empty Budget'].spent_amount, Decimal('0'))
+        self.assertEqual(budgets['Empty Budget'].remaining_amount, Decimal('50.00'))
+    
+    def test_list_budgets_query_count_independent_of_expenses(self):
+        """Test that listing budgets does not run a query per budget"""
+        url = reverse('budgets:budget-list')
+        self._create_budgets(2, expenses_per_budget=1)
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        
+        Budget.objects.all().delete()
+        self._create_budgets(20, expenses_per_budget=25)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['remaining_amount'], '-50.00')
+        self.assertEqual(response.data['results'][0]['spent_percentage'], 125.0)
+    
+    def test_retrieve_budget_single_query(self):
+        """Test that retrieving a budget computes spend in the same query"""
+        self._create_budgets(1, expenses_per_budget=5)
+        budget = Budget.objects.get()
+        
+        url = reverse('budgets:budget-detail', kwargs={'pk': budget.pk})
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        
+        self.assertEqual(response.data['remaining_amount'], '150.00')
+        self.assertEqual(response.data['spent_percentage'], 25.0)
+
+
+class RecomputeBudgetTotalsCommandTest(TestCase):
+    """Test cases for the recompute_budget_totals management command"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            name='Test Budget',
+            total_amount=Decimal('1000.00'),
+            category='Food'
+        )
+        Expense.objects.create(
+            budget=self.budget,
+            user=self.user,
+            description='Grocery shopping',
+            amount=Decimal('250.00'),
+            date='2025-01-15',
+            category='Food'
+        )
+    
+    def _call(self, *args):
+        out = StringIO()
+        call_command('recompute_budget_totals', *args, stdout=out)
+        return out.getvalue()
+    
+    def test_no_drift(self):
+        """Test that consistent counters are reported as such"""
+        self.assertIn('No drift found', self._call())
+    
+    def test_reports_and_fixes_drift(self):
+        """Test that drifted counters are reported and recomputed"""
+        Budget.objects.filter(pk=self.budget.pk).update(spent_total=Decimal('1.00'), expense_count=7)
+        
+        output = self._call('--dry-run')
+        self.assertIn(f'Budget {self.budget.pk}: spent_total 1.00 -> 250', output)
+        self.budget.refresh_from_db()
+        self.assertEqual(self.budget.spent_total, Decimal('1.00'))
+        
+        output = self._call()
+        self.assertIn('Recomputed 1 budget(s)', output)
+        self.budget.refresh_from_db()
+        self.assertEqual(self.budget.spent_total, Decimal('250.00'))
+        self.assertEqual(self.budget.expense_count, 1)
+
+
+@override_settings(CACHE_IS_SHARED=True)
+class BudgetConditionalGetTest(APITestCase):
+    """Test cases for ETag/Last-Modified on the budget list"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            name='Groceries',
+            total_amount=Decimal('500.00'),
+            category='Food'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('budgets:budget-list')
+    
+    def test_unchanged_list_returns_304_without_queries(self):
+        """Test that revalidating an unchanged list runs no queries"""
+        response = self.client.get(self.url)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        
+        with self.assertNumQueries(0):
+            revalidated = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(revalidated.content, b'')
+    
+    def test_budget_and_expense_writes_change_etag(self):
+        """Test that budget and expense writes invalidate the ETag"""
+        etag = self.client.get(self.url)['ETag']
+        self.budget.total_amount = Decimal('600.00')
+        self.budget.save()
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['total_amount'], '600.00')
+        
+        etag = response['ETag']
+        Expense.objects.create(
+            budget=self.budget,
+            user=self.user,
+            description='Expense',
+            amount=Decimal('40.00'),
+            date='2025-01-15',
+            category='Food'
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_etag_is_per_user(self):
+        """Test that another user's ETag does not validate"""
+        etag = self.client.get(self.url)['ETag']
+        other_user = User.objects.create_user(username='otheruser', password='otherpass123')
+        self.client.force_authenticate(user=other_user)
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class BudgetSparseFieldsTest(APITestCase):
+    """Test cases for ?fields= and ?omit= on budgets"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            name='Groceries',
+            total_amount=Decimal('500.00'),
+            category='Food'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('budgets:budget-list')
+    
+    def test_fields_skip_user_join_and_spend_columns(self):
+        """Test that unrequested fields are not joined or loaded"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'fields': 'id,name'})
+        
+        self.assertEqual(response.data['results'], [{'id': self.budget.id, 'name': 'Groceries'}])
+        sql = queries.captured_queries[-1]['sql']
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('spent_total', sql)
+    
+    def test_spend_fields_load_their_columns(self):
+        """Test that spend fields still read the counters they depend on"""
+        Expense.objects.create(
+            budget=self.budget,
+            user=self.user,
+            description='Expense',
+            amount=Decimal('125.00'),
+            date='2025-01-15',
+            category='Food'
+        )
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'omit': 'user,created_at,updated_at'})
+        
+        item = response.data['results'][0]
+        self.assertEqual(item['remaining_amount'], '375.00')
+        self.assertEqual(item['spent_percentage'], 25.0)
+        self.assertNotIn('user', item)
+    
+    def test_unknown_omit_field(self):
+        """Test that unknown field names are rejected"""
+        response = self.client.get(self.url, {'omit': 'nope'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('omit', response.data)
+
+
+class BudgetFastListTest(APITestCase):
+    """Test cases for the values()-based budget list fast path"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('budgets:budget-list')
+        for n, total in enumerate(['500.00', '0.01', '333.33']):
+            budget = Budget.objects.create(
+                user=self.user, name=f'Budget {n}', total_amount=Decimal(total), category='Food'
+            )
+            Expense.objects.create(
+                budget=budget,
+                user=self.user,
+                description='Expense',
+                amount=Decimal('123.45'),
+                date='2025-01-15',
+                category='Food'
+            )
+    
+    def test_parity_with_serializer(self):
+        """Test that fast pages are byte-identical to BudgetSerializer output"""
+        for params in [{}, {'fields': 'id,spent_percentage'}, {'omit': 'user'}]:
+            with self.subTest(params=params):
+                fast = self.client.get(self.url, params)
+                with mock.patch.object(BudgetListView, 'fast_list', False):
+                    slow = self.client.get(self.url, params)
+                self.assertEqual(fast.status_code, status.HTTP_200_OK)
+                self.assertEqual(fast.content, slow.content)
+    
+    def test_spend_fields_from_rows(self):
+        """Test that property-backed fields are computed from row columns"""
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'fields': 'name,remaining_amount'})
+        
+        self.assertEqual(response.data['results'][0], {'name': 'Budget 2', 'remaining_amount': '209.88'})
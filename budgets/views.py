@@ -4,19 +4,22 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import Budget
 from django.db import IntegrityError
+from personal_budgeting_api.conditional import ConditionalGetMixin
+from personal_budgeting_api.fast_serializers import FastListMixin
+from personal_budgeting_api.sparse_fields import SparseFieldsViewMixin
 from .serializers import BudgetSerializer, BudgetCreateSerializer
 
 
 # Create your views here.
 
 
-class BudgetListView(generics.ListCreateAPIView):
-    """View for listing and creating budgets"""
+class BudgetListView(ConditionalGetMixin, FastListMixin, SparseFieldsViewMixin, generics.ListCreateAPIView):
+    """View for listing and creating budgets, with conditional GETs and fast list pages"""
     serializer_class = BudgetSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Budget.objects.filter(user=self.request.user)
+        return Budget.objects.filter(user=self.request.user).select_related('user')
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -38,13 +41,13 @@ class BudgetListView(generics.ListCreateAPIView):
         return Response(output_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
 
-class BudgetDetailView(generics.RetrieveUpdateDestroyAPIView):
+class BudgetDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """View for retrieving, updating, and deleting budgets"""
     serializer_class = BudgetSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Budget.objects.filter(user=self.request.user)
+        return Budget.objects.filter(user=self.request.user).select_related('user')
     
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
@@ -0,0 +1,85 @@
+"""
+Streaming CSV and NDJSON encoders for expense exports.
+
+Rows come from a `values_list()` iterator and are encoded one at a time,
+so memory use does not depend on how many expenses are exported.
+"""
+import csv
+import json
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+# (column name, queryset lookup) in export order
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('date', 'date'),
+    ('description', 'description'),
+    ('amount', 'amount'),
+    ('category', 'category'),
+    ('budget_id', 'budget_id'),
+    ('budget_name', 'budget__name'),
+    ('budget_category', 'budget__category'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+
+EXPORT_LOOKUPS = [lookup for _, lookup in EXPORT_COLUMNS]
+
+# Format values exactly as the API's serializers do
+_date = serializers.DateField()
+_datetime = serializers.DateTimeField()
+_amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
+class CSVRenderer(JSONRenderer):
+    """Selects CSV export via `?format=csv` or `Accept: text/csv`.
+
+    Rows are streamed by the view; only error responses go through render().
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(JSONRenderer):
+    """Selects NDJSON export via `?format=ndjson` or `Accept: application/x-ndjson`"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+def _format_row(row):
+    (pk, date, description, amount, category, budget_id,
+     budget_name, budget_category, created_at, updated_at) = row
+    return [
+        pk,
+        _date.to_representation(date),
+        description,
+        _amount.to_representation(amount),
+        category,
+        budget_id,
+        budget_name,
+        budget_category,
+        _datetime.to_representation(created_at),
+        _datetime.to_representation(updated_at),
+    ]
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of buffering it"""
+    
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    """Yield a header line followed by one CSV line per row"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for row in rows:
+        yield writer.writerow(_format_row(row))
+
+
+def stream_ndjson(rows):
+    """Yield one JSON object per line"""
+    names = [name for name, _ in EXPORT_COLUMNS]
+    for row in rows:
+        yield json.dumps(dict(zip(names, _format_row(row)))) + '\n'
@@ -0,0 +1,183 @@
+"""
+Streaming bank-statement import.
+
+Statements are parsed row by row (CSV) or transaction by transaction (OFX)
+and written with `Expense.objects.create_many()` in bounded batches, so an
+import of any size runs in constant memory and a fixed number of queries
+per batch. Each batch is committed on its own. A file that cannot be read
+to the end (bad encoding, broken CSV) stops the import with ImportAborted:
+every valid row before the failure is written and kept, and the exception
+says how many and up to which line, so the rest can be imported on its own.
+"""
+import csv
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from django.utils import timezone
+from .models import Expense
+
+FORMATS = ('csv', 'ofx')
+
+DESCRIPTION_MAX_LENGTH = Expense._meta.get_field('description').max_length
+CATEGORY_MAX_LENGTH = Expense._meta.get_field('category').max_length
+AMOUNT_LIMIT = Decimal('99999999.99')
+
+# Keep at most this many row errors in the result
+MAX_REPORTED_ERRORS = 100
+
+OFX_CHUNK_SIZE = 64 * 1024
+OFX_TRANSACTION = re.compile(r'<STMTTRN>(.*?)</STMTTRN>', re.IGNORECASE | re.DOTALL)
+OFX_VALUE = r'<{}>\s*([^<\r\n]*)'
+
+
+@dataclass
+class ImportResult:
+    """Outcome of an import"""
+    created: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {'created': self.created, 'skipped': self.skipped, 'errors': self.errors}
+
+
+class ImportAborted(Exception):
+    """The statement could not be read past `line`; `result` counts what was kept"""
+
+    def __init__(self, message, result, line):
+        super().__init__(message)
+        self.result = result
+        self.line = line
+
+
+def detect_format(filename):
+    """Guess the statement format from a file name"""
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    return extension if extension in FORMATS else 'csv'
+
+
+def parse_csv(stream):
+    """Yield `(line, fields)` for every data row of a CSV statement.
+
+    The header must name `date`, `description` and `amount` columns;
+    `category` is optional. Amounts are positive expense amounts.
+    """
+    reader = csv.DictReader(stream)
+    columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+    missing = [name for name in ('date', 'description', 'amount') if name not in columns]
+    if missing:
+        raise ValueError(f"CSV header is missing column(s): {', '.join(missing)}")
+
+    for row in reader:
+        yield reader.line_num, {
+            name: (row.get(columns[name]) or '').strip() if name in columns else ''
+            for name in ('date', 'description', 'amount', 'category')
+        }
+
+
+def _ofx_value(block, tag):
+    match = re.search(OFX_VALUE.format(tag), block, re.IGNORECASE)
+    return match.group(1).strip() if match else ''
+
+
+def parse_ofx(stream):
+    """Yield `(n, fields)` for every debit transaction of an OFX statement.
+
+    Works for SGML (OFX 1.x) and XML (OFX 2.x) files. The file is read in
+    fixed-size chunks and only the current transaction is kept in memory.
+    Credits (positive TRNAMT) are not expenses and are skipped.
+    """
+    buffer = ''
+    number = 0
+    while True:
+        chunk = stream.read(OFX_CHUNK_SIZE)
+        buffer += chunk
+        end = 0
+        for match in OFX_TRANSACTION.finditer(buffer):
+            end = match.end()
+            number += 1
+            block = match.group(1)
+            amount = _ofx_value(block, 'TRNAMT')
+            if amount.startswith('-'):
+                posted = _ofx_value(block, 'DTPOSTED')[:8]
+                yield number, {
+                    'date': f'{posted[:4]}-{posted[4:6]}-{posted[6:8]}' if len(posted) == 8 else posted,
+                    'description': _ofx_value(block, 'NAME') or _ofx_value(block, 'MEMO'),
+                    'amount': amount[1:],
+                    'category': '',
+                }
+        buffer = buffer[end:]
+        if not chunk:
+            return
+        # Only an unterminated transaction needs to survive into the next chunk
+        start = buffer.upper().rfind('<STMTTRN>')
+        buffer = buffer[start:] if start >= 0 else buffer[-len('<STMTTRN>'):]
+
+
+def clean_row(fields, default_category, today):
+    """Validate one parsed row like ExpenseCreateSerializer; return kwargs or raise ValueError"""
+    try:
+        date = datetime.strptime(fields['date'], '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"Invalid date '{fields['date']}', expected YYYY-MM-DD")
+    if date > today:
+        raise ValueError('Date cannot be in the future')
+
+    try:
+        amount = Decimal(fields['amount'].replace(',', '')).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Invalid amount '{fields['amount']}'")
+    if not amount.is_finite():
+        # NaN survives quantize(), then raises InvalidOperation when compared
+        raise ValueError(f"Invalid amount '{fields['amount']}'")
+    if amount <= 0:
+        raise ValueError('Amount must be greater than zero')
+    if amount > AMOUNT_LIMIT:
+        raise ValueError('Amount is too large')
+
+    description = fields['description'][:DESCRIPTION_MAX_LENGTH]
+    if not description:
+        raise ValueError('Description is required')
+
+    return {
+        'date': date,
+        'amount': amount,
+        'description': description,
+        'category': (fields['category'] or default_category)[:CATEGORY_MAX_LENGTH],
+    }
+
+
+def import_expenses(stream, budget, format='csv', batch_size=1000):
+    """Import a statement into `budget`, writing `batch_size` expenses at a time"""
+    parser = parse_ofx if format == 'ofx' else parse_csv
+    today = timezone.now().date()
+    result = ImportResult()
+    batch = []
+    line = 0
+
+    try:
+        for line, fields in parser(stream):
+            try:
+                attrs = clean_row(fields, budget.category, today)
+            except ValueError as exc:
+                result.add_error(line, str(exc))
+                continue
+            batch.append(Expense(budget=budget, user_id=budget.user_id, **attrs))
+            if len(batch) >= batch_size:
+                result.created += len(Expense.objects.create_many(batch))
+                batch = []
+    except (ValueError, csv.Error) as exc:
+        # Keep the rows read so far, so that `line` is where a retry resumes
+        if batch:
+            result.created += len(Expense.objects.create_many(batch))
+        raise ImportAborted(str(exc), result, line) from exc
+
+    if batch:
+        result.created += len(Expense.objects.create_many(batch))
+    return result
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from budgets.models import Budget
+from expenses.importers import FORMATS, ImportAborted, detect_format, import_expenses
+
+
+class Command(BaseCommand):
+    """Import a CSV or OFX bank statement into a budget"""
+    help = 'Import expenses from a CSV or OFX statement, streaming and writing in batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Statement file to import')
+        parser.add_argument('--user', required=True, help='Username owning the budget')
+        parser.add_argument('--budget', required=True, type=int, help='ID of the target budget')
+        parser.add_argument('--format', choices=FORMATS, help='Statement format (default: from file extension)')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EXPENSE_IMPORT_BATCH_SIZE,
+            help='Expenses written per transaction'
+        )
+        parser.add_argument('--encoding', default='utf-8-sig', help='File encoding (default: utf-8-sig)')
+    
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be a positive integer')
+        try:
+            budget = Budget.objects.get(pk=options['budget'], user__username=options['user'])
+        except Budget.DoesNotExist:
+            raise CommandError(f"Budget {options['budget']} does not exist for user '{options['user']}'")
+        
+        format = options['format'] or detect_format(options['path'])
+        try:
+            with open(options['path'], encoding=options['encoding'], newline='') as stream:
+                result = import_expenses(stream, budget, format=format, batch_size=options['batch_size'])
+        except ImportAborted as exc:
+            raise CommandError(
+                f"{exc} (after line {exc.line}; {exc.result.created} expense(s) before it were imported)"
+            )
+        except OSError as exc:
+            raise CommandError(str(exc))
+        
+        for error in result.errors:
+            self.stdout.write(self.style.WARNING(f"Line {error['line']}: {error['error']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created} expense(s), skipped {result.skipped}"
+        ))
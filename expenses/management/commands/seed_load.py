@@ -0,0 +1,38 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from expenses.synthetic import generate
+
+
+class Command(BaseCommand):
+    """Generate production-scale synthetic data for load tests"""
+    help = 'Bulk-generate N users x M budgets x K expenses with realistic categories, amounts and dates'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Users to create (default: 10)')
+        parser.add_argument('--budgets', type=int, default=8, help='Budgets per user (default: 8)')
+        parser.add_argument('--expenses', type=int, default=1000, help='Expenses per user (default: 1000)')
+        parser.add_argument('--days', type=int, default=365, help='Length of the period in days (default: 365)')
+        parser.add_argument(
+            '--start',
+            type=date.fromisoformat,
+            help='First day of the period, YYYY-MM-DD (default: the period ends today)'
+        )
+        parser.add_argument('--prefix', default='load', help="Usernames are <prefix>0, <prefix>1... (default: load)")
+        parser.add_argument('--password', default='loadtest-password', help='Password of every generated user')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per query (default: 1000)')
+    
+    def handle(self, *args, **options):
+        try:
+            result = generate(
+                options['users'], options['budgets'], options['expenses'],
+                start=options['start'], days=options['days'], prefix=options['prefix'],
+                password=options['password'], seed=options['seed'], batch_size=options['batch_size'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result.users} user(s), {result.budgets} budget(s), "
+            f"{result.expenses} expense(s) and {result.rollups} rollup row(s)"
+        ))
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:40
+
+from django.db import migrations, transaction
+from django.db.utils import OperationalError
+
+
+# SQLite: external-content FTS5 table over expenses_expense, kept in sync by
+# triggers so every write path (save, bulk_create, update, raw SQL) is covered.
+# A later migration that makes SQLite rebuild expenses_expense (most
+# AlterField/RemoveField operations) drops these triggers and must recreate them.
+SQLITE_FTS = [
+    """CREATE VIRTUAL TABLE expenses_expense_fts USING fts5(
+        description, category,
+        content='expenses_expense', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER expenses_expense_fts_insert AFTER INSERT ON expenses_expense BEGIN
+        INSERT INTO expenses_expense_fts(rowid, description, category)
+        VALUES (new.id, new.description, new.category);
+    END""",
+    """CREATE TRIGGER expenses_expense_fts_delete AFTER DELETE ON expenses_expense BEGIN
+        INSERT INTO expenses_expense_fts(expenses_expense_fts, rowid, description, category)
+        VALUES ('delete', old.id, old.description, old.category);
+    END""",
+    """CREATE TRIGGER expenses_expense_fts_update AFTER UPDATE OF description, category ON expenses_expense BEGIN
+        INSERT INTO expenses_expense_fts(expenses_expense_fts, rowid, description, category)
+        VALUES ('delete', old.id, old.description, old.category);
+        INSERT INTO expenses_expense_fts(rowid, description, category)
+        VALUES (new.id, new.description, new.category);
+    END""",
+    "INSERT INTO expenses_expense_fts(expenses_expense_fts) VALUES ('rebuild')",
+]
+
+SQLITE_FTS_DROP = [
+    'DROP TRIGGER IF EXISTS expenses_expense_fts_insert',
+    'DROP TRIGGER IF EXISTS expenses_expense_fts_delete',
+    'DROP TRIGGER IF EXISTS expenses_expense_fts_update',
+    'DROP TABLE IF EXISTS expenses_expense_fts',
+]
+
+POSTGRESQL_INDEX_NAME = 'expense_search_idx'
+
+
+def postgresql_index():
+    """GIN index on the exact expression expenses.search queries with"""
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+    return GinIndex(SearchVector('description', 'category', config='english'), name=POSTGRESQL_INDEX_NAME)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('expenses', 'Expense'), postgresql_index())
+    elif vendor == 'sqlite':
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                for statement in SQLITE_FTS:
+                    schema_editor.execute(statement)
+        except OperationalError:
+            # SQLite built without FTS5: searches fall back to icontains
+            pass
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('expenses', 'Expense'), postgresql_index())
+    elif vendor == 'sqlite':
+        for statement in SQLITE_FTS_DROP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0003_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
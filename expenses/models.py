@@ -1,10 +1,49 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from budgets.models import Budget
 
 User = get_user_model()
 
 
+class ExpenseQuerySet(models.QuerySet):
+    """QuerySet for Expense"""
+    
+    def create_many(self, expenses, batch_size=None):
+        """bulk_create expenses, keeping budget totals, rollups and caches in sync.
+
+        bulk_create does not send post_save, so the bookkeeping done by
+        expenses.signals is applied for the whole batch in the same transaction.
+        """
+        from .signals import expenses_bulk_created
+        
+        for expense in expenses:
+            if not expense.user_id and expense.budget:
+                expense.user = expense.budget.user
+        with transaction.atomic(using=self.db):
+            created = self.bulk_create(expenses, batch_size=batch_size)
+            expenses_bulk_created(created, using=self.db)
+        return created
+    
+    def delete(self):
+        """Delete the expenses, subtracting them from budget totals and rollups.
+
+        The tracked fields of the rows are read (and locked) first, so the
+        bookkeeping costs a fixed number of queries whatever the row count.
+        """
+        from .signals import expenses_deleted
+        
+        with transaction.atomic(using=self.db):
+            states = list(
+                self.order_by().select_for_update(of=('self',)).values(*self.model.TRACKED_FIELDS)
+            )
+            deleted = super().delete()
+            expenses_deleted(states, using=self.db)
+        return deleted
+    
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class Expense(models.Model):
     """Expense model for tracking user expenses"""
     budget = models.ForeignKey(Budget, on_delete=models.CASCADE, related_name='expenses')
@@ -16,15 +55,51 @@ class Expense(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ExpenseQuerySet.as_manager()
+    
+    # Fields whose previous values expenses.signals needs to keep aggregates in sync
+    TRACKED_FIELDS = ('budget_id', 'user_id', 'date', 'category', 'amount')
+    
     class Meta:
         db_table = 'expenses_expense'
         ordering = ['-date', '-created_at']
+        # Every lookup is scoped to one user, then narrowed by date, budget
+        # or category and ordered newest first
+        indexes = [
+            models.Index(fields=['user', '-date', '-created_at'], name='expense_user_date_idx'),
+            models.Index(fields=['user', 'budget', '-date'], name='expense_user_budget_date_idx'),
+            models.Index(fields=['user', 'category', '-date'], name='expense_user_cat_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.description} - ${self.amount} ({self.date})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_db_state()
+        return instance
+    
+    def remember_db_state(self):
+        """Snapshot the tracked fields as they are stored in the database"""
+        self._db_state = {
+            name: self.__dict__[name] for name in self.TRACKED_FIELDS if name in self.__dict__
+        }
+    
     def save(self, *args, **kwargs):
         """Override save to automatically set user from budget"""
         if not self.user_id and self.budget:
             self.user = self.budget.user
-        super().save(*args, **kwargs)
+        # Keep the row and the aggregates maintained by post_save in one transaction
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+    
+    def delete(self, using=None, keep_parents=False):
+        """Delete the expense and subtract it from the aggregates in one transaction"""
+        from .signals import expense_deleted
+        
+        using = using or self._state.db
+        with transaction.atomic(using=using):
+            deleted = super().delete(using=using, keep_parents=keep_parents)
+            expense_deleted(self, using=using)
+        return deleted
@@ -0,0 +1,154 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from decimal import Decimal
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination keyed on every column of the queryset's ordering.
+
+    The ordering in effect (from the filter backends or the model) is
+    completed with the model's default ordering and the primary key so that
+    it is a total order. The cursor stores the values of those columns for the row
+    at the page boundary, and each page is fetched with a
+    `WHERE (a, b, pk) > (x, y, z)`-style filter instead of an OFFSET.
+    There is no COUNT(*), and the cost of a page does not depend on how
+    deep it is.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset)
+        self.columns = [self.get_column(queryset, name.lstrip('-')) for name in self.ordering]
+
+        position, reverse = self.decode_cursor(request)
+        ordering = [self._flip(name) for name in self.ordering] if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        # Moving forward we always came from an earlier page, and vice versa
+        self.has_next = has_more if not reverse else True
+        self.has_previous = has_more if reverse else position is not None
+        self.page = results
+        return results
+
+    def get_ordering(self, queryset):
+        """Queryset ordering completed with the model ordering and the pk"""
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        names = {name.lstrip('-') for name in ordering}
+        for name in queryset.model._meta.ordering:
+            if name.lstrip('-') not in names:
+                ordering.append(name)
+                names.add(name.lstrip('-'))
+        pk_name = queryset.model._meta.pk.name
+        if pk_name not in names and 'pk' not in names:
+            ordering.append(pk_name)
+        return ordering
+
+    @staticmethod
+    def get_column(queryset, name):
+        """(attribute, field) for an ordering column, a model field or an annotation"""
+        if name in queryset.query.annotations:
+            return name, queryset.query.annotations[name].output_field
+        field = queryset.model._meta.get_field(name)
+        return field.attname, field
+
+    @staticmethod
+    def _flip(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+    def _after(self, ordering, position):
+        """Rows strictly after `position` in `ordering`.
+
+        The OR of the per-column comparisons is ANDed with an inclusive bound
+        on the first column, which it implies, so that an index on that
+        column is range-scanned from the cursor instead of from the start.
+        """
+        condition = Q()
+        equal = Q()
+        for name, value in zip(ordering, position):
+            column = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{column}__{lookup}': value})
+            equal &= Q(**{column: value})
+        first = ordering[0]
+        bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": position[0]})
+        return bound & condition
+
+    def _position(self, item):
+        if isinstance(item, dict):
+            # values() rows are keyed by attribute name
+            return [item[attribute] for attribute, _ in self.columns]
+        return [getattr(item, attribute) for attribute, _ in self.columns]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            payload = json.loads(b64decode(encoded.encode('ascii')).decode('ascii'))
+            values = payload['p']
+            if len(values) != len(self.columns):
+                raise ValueError
+            position = [field.to_python(value) for (_, field), value in zip(self.columns, values)]
+            return position, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        values = [
+            str(value) if isinstance(value, Decimal)
+            else value.isoformat() if hasattr(value, 'isoformat')
+            else value
+            for value in position
+        ]
+        payload = {'p': values, 'r': 1} if reverse else {'p': values}
+        encoded = b64encode(json.dumps(payload, separators=(',', ':')).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
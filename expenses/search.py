@@ -0,0 +1,92 @@
+"""
+Full-text search over expense descriptions and categories.
+
+SQLite uses the FTS5 table `expenses_expense_fts`, kept in sync with
+`expenses_expense` by triggers. PostgreSQL uses a GIN index on the
+description/category `tsvector`, which the database maintains itself.
+Both are created by migration 0004. Matching goes through the index, and
+results are ranked by relevance (`search_rank`, higher is better). On other
+backends, or when SQLite was built without FTS5, searches fall back to
+DRF's `icontains` filtering.
+
+Every search term matches words starting with it, after stemming, so
+"grocer" finds "Groceries".
+"""
+import re
+from django.db import connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+FTS_TABLE = 'expenses_expense_fts'
+SEARCH_CONFIG = 'english'
+WORD = re.compile(r'\w+')
+
+# alias -> whether the FTS5 table exists
+_fts_available = {}
+
+
+def search_words(terms):
+    """Reduce search terms to plain words, which are safe in both query syntaxes"""
+    return [word for term in terms for word in WORD.findall(term)]
+
+
+def _sqlite_search(queryset, words):
+    match = ' AND '.join(f'"{word}"*' for word in words)
+    table = queryset.model._meta.db_table
+    return queryset.filter(
+        id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+    ).annotate(search_rank=RawSQL(
+        f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = "{table}"."id"',
+        (match,),
+        output_field=FloatField()
+    ))
+
+
+def _postgresql_search(queryset, words):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+    # Must match the indexed expression exactly for the GIN index to be used
+    vector = SearchVector('description', 'category', config=SEARCH_CONFIG)
+    query = SearchQuery(' & '.join(f'{word}:*' for word in words), config=SEARCH_CONFIG, search_type='raw')
+    # ts_rank() is a real; as a double it survives the round trip through a
+    # keyset cursor, so the page filter compares it with its exact value
+    return queryset.annotate(search_vector=vector).filter(search_vector=query).annotate(
+        search_rank=Cast(SearchRank(vector, query), FloatField())
+    )
+
+
+def get_search_backend(using):
+    """Full-text search function for a database alias, or None if it has none"""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return _postgresql_search
+    if connection.vendor == 'sqlite':
+        if using not in _fts_available:
+            _fts_available[using] = FTS_TABLE in connection.introspection.table_names()
+        if _fts_available[using]:
+            return _sqlite_search
+    return None
+
+
+class ExpenseSearchFilter(filters.SearchFilter):
+    """SearchFilter backed by the database's full-text index.
+
+    Results are ordered by relevance unless an explicit `ordering` is
+    requested, with the view's ordering breaking ties. Must come after
+    OrderingFilter in `filter_backends`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        words = search_words(self.get_search_terms(request))
+        backend = get_search_backend(queryset.db) if words else None
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+
+        queryset = backend(queryset, words)
+        if api_settings.ORDERING_PARAM not in request.query_params:
+            queryset = queryset.order_by('-search_rank', *queryset.query.order_by)
+        return queryset
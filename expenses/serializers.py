@@ -1,10 +1,11 @@
 from rest_framework import serializers
+from personal_budgeting_api.sparse_fields import SparseFieldsSerializerMixin
 from .models import Expense
 from budgets.models import Budget
 
 
-class ExpenseSerializer(serializers.ModelSerializer):
-    """Serializer for Expense model"""
+class ExpenseSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    """Serializer for Expense model; honors `?fields=` and `?omit=`"""
     budget_name = serializers.CharField(source='budget.name', read_only=True)
     budget_category = serializers.CharField(source='budget.category', read_only=True)
     budget_id = serializers.IntegerField(write_only=True)
@@ -19,7 +20,28 @@ class ExpenseSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'budget_name', 'budget_category', 'user', 'created_at', 'updated_at']
 
 
-class ExpenseCreateSerializer(serializers.ModelSerializer):
+class ExpenseWriteSerializer(serializers.ModelSerializer):
+    """Fields and validation shared by the serializers that write expenses"""
+    
+    class Meta:
+        model = Expense
+        fields = ['budget_id', 'description', 'amount', 'date', 'category']
+    
+    def validate_amount(self, value):
+        """Validate that amount is positive"""
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be greater than zero")
+        return value
+    
+    def validate_date(self, value):
+        """Validate that date is not in the future"""
+        from django.utils import timezone
+        if value > timezone.now().date():
+            raise serializers.ValidationError("Date cannot be in the future")
+        return value
+
+
+class ExpenseCreateSerializer(ExpenseWriteSerializer):
     """Serializer for creating expenses"""
     budget_id = serializers.PrimaryKeyRelatedField(
         source='budget',
@@ -33,27 +55,54 @@ class ExpenseCreateSerializer(serializers.ModelSerializer):
         }
     )
     
-    class Meta:
-        model = Expense
-        fields = ['budget_id', 'description', 'amount', 'date', 'category']
-    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         request = self.context.get('request')
         if request and request.user and request.user.is_authenticated:
             self.fields['budget_id'].queryset = Budget.objects.filter(user=request.user)
     
-    def validate_amount(self, value):
-        """Validate that amount is positive"""
-        if value <= 0:
-            raise serializers.ValidationError("Amount must be greater than zero")
-        return value
+    # No need for validate_budget_id; queryset restriction handles existence/ownership
+
+
+class ExpenseBulkItemSerializer(ExpenseWriteSerializer):
+    """Serializer for one item of a bulk expense creation.
+
+    Budgets are looked up in `context['budgets']`, a `{pk: Budget}` map of the
+    requesting user's budgets fetched once for the whole batch.
+    """
+    budget_id = serializers.IntegerField(
+        source='budget',
+        write_only=True,
+        error_messages={
+            'invalid': 'Invalid budget id',
+            'required': 'budget_id is required'
+        }
+    )
     
-    def validate_date(self, value):
-        """Validate that date is not in the future"""
-        from django.utils import timezone
-        if value > timezone.now().date():
-            raise serializers.ValidationError("Date cannot be in the future")
-        return value
+    def validate_budget_id(self, value):
+        """Resolve the budget from the prefetched map of owned budgets"""
+        budget = self.context.get('budgets', {}).get(value)
+        if budget is None:
+            raise serializers.ValidationError('Budget does not exist')
+        return budget
+
+
+class ExpenseImportSerializer(serializers.Serializer):
+    """Serializer for statement import uploads"""
+    file = serializers.FileField()
+    budget_id = serializers.PrimaryKeyRelatedField(
+        source='budget',
+        queryset=Budget.objects.all(),
+        error_messages={
+            'does_not_exist': 'Budget does not exist',
+            'incorrect_type': 'Invalid budget id',
+            'required': 'budget_id is required'
+        }
+    )
+    format = serializers.ChoiceField(choices=['csv', 'ofx'], required=False)
     
-    # No need for validate_budget_id; queryset restriction handles existence/ownership
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request and request.user and request.user.is_authenticated:
+            self.fields['budget_id'].queryset = Budget.objects.filter(user=request.user)
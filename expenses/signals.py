@@ -0,0 +1,129 @@
+"""
+Keep data derived from expenses in sync with every Expense write.
+
+Budget.spent_total / Budget.expense_count and the reports app's daily
+rollups are adjusted with atomic F() updates, so concurrent workers
+writing expenses for the same budget or day never lose an increment.
+The owner's data version is bumped so cached reports are invalidated.
+
+Deletes are handled by Expense.delete() and ExpenseQuerySet.delete(),
+not by a post_delete receiver: any receiver would keep Django from
+fast-deleting the expenses of a deleted budget or user with one DELETE,
+and those need no bookkeeping, since the budget or user, its rollups and
+its data version go with them.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db.models.signals import pre_save, post_save
+from django.dispatch import receiver
+from budgets.models import Budget
+from reports.models import DailyExpenseRollup
+from users.versioning import data_changed
+from .models import Expense
+
+
+def _current_state(instance):
+    """Tracked field values of an instance, coerced to their Python types"""
+    return {
+        name: Expense._meta.get_field(name).to_python(getattr(instance, name))
+        for name in Expense.TRACKED_FIELDS
+    }
+
+
+def _rollup_key(state):
+    return (state['user_id'], state['budget_id'], state['date'], state['category'])
+
+
+def _adjust_budget(expense, budget_id, amount, count):
+    """Apply a delta to a budget's counters, mirroring it on a loaded instance"""
+    Budget.objects.adjust_spent(budget_id, amount, count)
+    if Expense.budget.is_cached(expense) and expense.budget is not None and expense.budget.pk == budget_id:
+        expense.budget.spent_total += amount
+        expense.budget.expense_count += count
+
+
+def _apply(expense, state, sign):
+    """Add (sign=1) or remove (sign=-1) one expense's amount everywhere"""
+    amount = state['amount'] * sign
+    _adjust_budget(expense, state['budget_id'], amount, sign)
+    DailyExpenseRollup.objects.apply(*_rollup_key(state), amount, sign)
+
+
+@receiver(pre_save, sender=Expense)
+def load_previous_state(sender, instance, raw=False, **kwargs):
+    """Fetch the stored row for updates of instances not loaded from the DB"""
+    if raw or instance._state.adding:
+        return
+    db_state = getattr(instance, '_db_state', {})
+    if all(name in db_state for name in Expense.TRACKED_FIELDS):
+        return
+    instance._db_state = Expense.objects.filter(pk=instance.pk).values(*Expense.TRACKED_FIELDS).first() or {}
+
+
+@receiver(post_save, sender=Expense)
+def expense_saved(sender, instance, created, raw=False, using=None, **kwargs):
+    """Add a new expense to the aggregates, or move/adjust an updated one"""
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_db_state', None)
+    current = _current_state(instance)
+    
+    if not previous:
+        _apply(instance, current, 1)
+    elif _rollup_key(previous) != _rollup_key(current):
+        _apply(instance, previous, -1)
+        _apply(instance, current, 1)
+    elif previous['amount'] != current['amount']:
+        delta = current['amount'] - previous['amount']
+        _adjust_budget(instance, current['budget_id'], delta, 0)
+        DailyExpenseRollup.objects.apply(*_rollup_key(current), delta, 0)
+    
+    instance._db_state = current
+    for user_id in {current['user_id'], (previous or current)['user_id']}:
+        data_changed(user_id, using=using)
+
+
+def expense_deleted(instance, using=None):
+    """Remove a deleted expense from the aggregates"""
+    previous = getattr(instance, '_db_state', None)
+    if not previous or any(name not in previous for name in Expense.TRACKED_FIELDS):
+        previous = _current_state(instance)
+    _apply(instance, previous, -1)
+    data_changed(previous['user_id'], using=using)
+
+
+def _group_deltas(states, sign):
+    """Per-budget and per-rollup-row (amount, count) deltas of expense `states`"""
+    budget_deltas = defaultdict(lambda: [Decimal('0'), 0])
+    rollup_deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for state in states:
+        for deltas, key in ((budget_deltas, state['budget_id']), (rollup_deltas, _rollup_key(state))):
+            deltas[key][0] += state['amount'] * sign
+            deltas[key][1] += sign
+    return budget_deltas, rollup_deltas
+
+
+def _apply_many(states, sign, using=None):
+    budget_deltas, rollup_deltas = _group_deltas(states, sign)
+    Budget.objects.adjust_spent_many(budget_deltas)
+    DailyExpenseRollup.objects.apply_many(rollup_deltas)
+    for user_id in {key[0] for key in rollup_deltas}:
+        data_changed(user_id, using=using)
+
+
+def expenses_bulk_created(expenses, using=None):
+    """Apply the post_save bookkeeping for expenses inserted with bulk_create.
+
+    Deltas are grouped so the whole batch costs a fixed number of queries
+    instead of a few per expense.
+    """
+    states = []
+    for expense in expenses:
+        expense._db_state = _current_state(expense)
+        states.append(expense._db_state)
+    _apply_many(states, 1, using=using)
+
+
+def expenses_deleted(states, using=None):
+    """Remove expenses deleted by a queryset, given their tracked field values"""
+    _apply_many(states, -1, using=using)
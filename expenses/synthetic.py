@@ -0,0 +1,157 @@
+"""
+Synthetic data for load testing.
+
+Generates users with budgets and expenses that look like real spending
+rather than uniform noise: categories have different frequencies and
+amount ranges (many small grocery bills, a few large travel bookings),
+amounts follow a log-normal distribution around a per-category median,
+and dates lean towards weekends, December and the recent end of the
+period, the way account activity grows over time.
+
+Rows are written with bulk_create in bounded batches; the denormalized
+budget totals and the daily rollups are recomputed once at the end.
+Generation is deterministic for a given seed.
+"""
+import math
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from budgets.models import Budget
+from reports.models import DailyExpenseRollup
+from .models import Expense
+
+User = get_user_model()
+
+CENT = Decimal('0.01')
+MIN_AMOUNT = Decimal('0.50')
+MAX_AMOUNT = Decimal('9999.99')
+
+# category: (share of expenses, median amount, log-normal sigma, descriptions)
+CATEGORY_PROFILES = {
+    'Food': (0.30, 18, 0.6, ['Supermarket', 'Bakery', 'Coffee shop', 'Lunch', 'Farmers market', 'Takeaway']),
+    'Transport': (0.16, 12, 0.7, ['Bus ticket', 'Fuel', 'Taxi', 'Parking', 'Train ticket']),
+    'Shopping': (0.12, 35, 0.9, ['Clothes', 'Electronics', 'Books', 'Household goods']),
+    'Leisure': (0.12, 25, 0.8, ['Cinema', 'Concert', 'Restaurant', 'Streaming subscription', 'Gym']),
+    'Utilities': (0.09, 60, 0.4, ['Electricity bill', 'Water bill', 'Internet', 'Phone plan']),
+    'Health': (0.08, 40, 0.8, ['Pharmacy', 'Dentist', 'Doctor visit']),
+    'Housing': (0.07, 250, 1.0, ['Rent', 'Repairs', 'Furniture', 'Insurance']),
+    'Travel': (0.06, 180, 0.9, ['Flight', 'Hotel', 'Car rental', 'Travel insurance']),
+}
+# Budget categories in order of popularity: a user with few budgets has the common ones
+CATEGORIES = sorted(CATEGORY_PROFILES, key=lambda category: -CATEGORY_PROFILES[category][0])
+
+WEEKEND_FACTOR = 1.3
+DECEMBER_FACTOR = 1.25
+# Activity at the start of the period relative to its end
+GROWTH_START = 0.6
+
+
+@dataclass
+class SeedResult:
+    """Rows written by generate()"""
+    users: int = 0
+    budgets: int = 0
+    expenses: int = 0
+    rollups: int = 0
+
+
+def day_weights(start, days):
+    """Cumulative weight of each day of the period, for random.choices()"""
+    weights, total = [], 0.0
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        weight = GROWTH_START + (1 - GROWTH_START) * offset / max(days - 1, 1)
+        if day.weekday() >= 5:
+            weight *= WEEKEND_FACTOR
+        if day.month == 12:
+            weight *= DECEMBER_FACTOR
+        total += weight
+        weights.append(total)
+    return weights
+
+
+def random_amount(rng, category):
+    """Log-normal amount around the category's median, in cents"""
+    _, median, sigma, _ = CATEGORY_PROFILES[category]
+    amount = Decimal(rng.lognormvariate(math.log(median), sigma)).quantize(CENT)
+    return min(max(amount, MIN_AMOUNT), MAX_AMOUNT)
+
+
+def budget_categories(count):
+    """(name, category) of `count` budgets, most popular categories first"""
+    budgets = []
+    for n in range(count):
+        category = CATEGORIES[n % len(CATEGORIES)]
+        rank = n // len(CATEGORIES)
+        budgets.append((category if rank == 0 else f'{category} {rank + 1}', category))
+    return budgets
+
+
+def generate(users, budgets_per_user, expenses_per_user, start=None, days=365,
+             prefix='load', password='loadtest-password', seed=0, batch_size=1000):
+    """Create users `<prefix>0`... with budgets and expenses over `days` days from `start`.
+
+    `start` defaults to the period ending today. Raises ValueError if one of
+    the usernames is taken.
+    """
+    if users <= 0 or budgets_per_user <= 0 or expenses_per_user < 0 or days <= 0 or batch_size <= 0:
+        raise ValueError('Counts, days and batch size must be positive')
+    start = start or date.today() - timedelta(days=days - 1)
+    usernames = [f'{prefix}{n}' for n in range(users)]
+    if User.objects.filter(username__in=usernames).exists():
+        raise ValueError(f"Users named '{prefix}<n>' already exist")
+
+    rng = random.Random(seed)
+    cum_days = day_weights(start, days)
+    result = SeedResult()
+    hashed = make_password(password)
+
+    created = User.objects.bulk_create(
+        [User(username=username, email=f'{username}@example.com', password=hashed) for username in usernames],
+        batch_size=batch_size,
+    )
+    # Primary keys are not returned by every backend
+    user_ids = list(User.objects.filter(username__in=usernames).order_by('pk').values_list('pk', flat=True))
+    result.users = len(created)
+
+    for user_id in user_ids:
+        with transaction.atomic():
+            Budget.objects.bulk_create([
+                Budget(user_id=user_id, name=name, category=category,
+                       total_amount=Decimal(CATEGORY_PROFILES[category][1] * 40).quantize(CENT))
+                for name, category in budget_categories(budgets_per_user)
+            ])
+            budgets = list(Budget.objects.filter(user_id=user_id).order_by('pk'))
+            shares = {}
+            for budget in budgets:
+                shares[budget.category] = shares.get(budget.category, 0) + 1
+            weights = [CATEGORY_PROFILES[budget.category][0] / shares[budget.category] for budget in budgets]
+
+            picks = zip(
+                rng.choices(budgets, weights=weights, k=expenses_per_user),
+                rng.choices(range(days), cum_weights=cum_days, k=expenses_per_user),
+            )
+            batch = []
+            for budget, offset in picks:
+                category = budget.category
+                batch.append(Expense(
+                    user_id=user_id,
+                    budget=budget,
+                    description=rng.choice(CATEGORY_PROFILES[category][3]),
+                    amount=random_amount(rng, category),
+                    date=start + timedelta(days=offset),
+                    category=category,
+                ))
+                if len(batch) >= batch_size:
+                    result.expenses += len(Expense.objects.bulk_create(batch))
+                    batch = []
+            result.expenses += len(Expense.objects.bulk_create(batch))
+            result.budgets += len(budgets)
+
+    Budget.objects.filter(user_id__in=user_ids).recompute_spent()
+    result.rollups = DailyExpenseRollup.objects.rebuild(user_ids, batch_size=batch_size)
+    return result
@@ -1,10 +1,29 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import date
+from io import StringIO
+from unittest import mock, skipUnless
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.db.models import F, Sum
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from budgets.models import Budget
+from .importers import parse_ofx
+from .pagination import KeysetPagination
+from .search import FTS_TABLE, get_search_backend
+from .views import ExpenseListView
 from .models import Expense
+from reports.models import DailyExpenseRollup
 from decimal import Decimal
 from django.utils import timezone
 
@@ -285,3 +304,1061 @@ class ExpenseAPITest(APITestCase):
         url = reverse('expenses:expense-list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class BudgetCounterTest(APITestCase):
+    """Test cases for keeping Budget.spent_total in sync with expense writes"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            name='Groceries',
+            total_amount=Decimal('500.00'),
+            category='Food'
+        )
+        self.other_budget = Budget.objects.create(
+            user=self.user,
+            name='Transport',
+            total_amount=Decimal('200.00'),
+            category='Transport'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def _create_expense(self, amount, budget=None):
+        return Expense.objects.create(
+            budget=budget or self.budget,
+            user=self.user,
+            description='Expense',
+            amount=Decimal(amount),
+            date='2025-01-15',
+            category='Food'
+        )
+    
+    def assertCounters(self, budget, spent_total, expense_count):
+        budget.refresh_from_db()
+        self.assertEqual(budget.spent_total, Decimal(spent_total))
+        self.assertEqual(budget.expense_count, expense_count)
+    
+    def test_create_increments_counters(self):
+        """Test that creating expenses adds to the budget totals"""
+        self._create_expense('40.00')
+        self._create_expense('2.50')
+        
+        self.assertCounters(self.budget, '42.50', 2)
+        self.assertCounters(self.other_budget, '0.00', 0)
+    
+    def test_update_amount_applies_difference(self):
+        """Test that changing an amount only applies the difference"""
+        expense = self._create_expense('40.00')
+        expense.amount = Decimal('25.00')
+        expense.save()
+        expense.save()
+        
+        self.assertCounters(self.budget, '25.00', 1)
+    
+    def test_reassign_budget_through_api(self):
+        """Test that moving an expense to another budget moves its amount"""
+        expense = self._create_expense('40.00')
+        url = reverse('expenses:expense-detail', kwargs={'pk': expense.pk})
+        response = self.client.put(url, {
+            'budget_id': self.other_budget.id,
+            'description': 'Moved',
+            'amount': '60.00',
+            'date': '2025-01-15',
+            'category': 'Transport'
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCounters(self.budget, '0.00', 0)
+        self.assertCounters(self.other_budget, '60.00', 1)
+    
+    def test_create_through_api(self):
+        """Test that expenses created through the API are counted"""
+        url = reverse('expenses:expense-list')
+        self.client.post(url, {
+            'budget_id': self.budget.id,
+            'description': 'Lunch',
+            'amount': '12.00',
+            'date': '2025-01-15',
+            'category': 'Food'
+        }, format='json')
+        
+        self.assertCounters(self.budget, '12.00', 1)
+    
+    def test_delete_decrements_counters(self):
+        """Test that deleting expenses, one or many, subtracts them"""
+        expense = self._create_expense('40.00')
+        self._create_expense('10.00')
+        self._create_expense('5.00')
+        
+        expense.delete()
+        self.assertCounters(self.budget, '15.00', 2)
+        
+        Expense.objects.filter(budget=self.budget).delete()
+        self.assertCounters(self.budget, '0.00', 0)
+    
+    def test_update_of_unloaded_instance(self):
+        """Test saving an instance built by hand with an existing pk"""
+        expense = self._create_expense('40.00')
+        replacement = Expense(
+            pk=expense.pk,
+            budget=self.other_budget,
+            user=self.user,
+            description='Replaced',
+            amount=Decimal('30.00'),
+            date='2025-01-15',
+            category='Transport',
+            created_at=expense.created_at
+        )
+        replacement._state.adding = False
+        replacement.save()
+        
+        self.assertCounters(self.budget, '0.00', 0)
+        self.assertCounters(self.other_budget, '30.00', 1)
+    
+    def test_cascade_delete_of_budget(self):
+        """Test that a budget's expenses are fast-deleted with it, whatever their number"""
+        for _ in range(30):
+            self._create_expense('10.00')
+        
+        # Delete expenses, rollups and budget: expenses are neither loaded nor updated
+        with self.assertNumQueries(3):
+            self.budget.delete()
+        self.assertFalse(Expense.objects.exists())
+    
+    def test_queryset_delete_query_count(self):
+        """Test that deleting many expenses costs a fixed number of queries"""
+        for _ in range(10):
+            self._create_expense('10.00')
+            self._create_expense('10.00', budget=self.other_budget)
+        
+        # SELECT rows, DELETE, UPDATE budgets, SELECT + UPDATE + DELETE rollups, in a savepoint
+        with self.assertNumQueries(8):
+            Expense.objects.filter(user=self.user).delete()
+        self.assertCounters(self.budget, '0.00', 0)
+        self.assertCounters(self.other_budget, '0.00', 0)
+        self.assertFalse(DailyExpenseRollup.objects.exists())
+
+
+class ExpenseBulkCreateTest(APITestCase):
+    """Test cases for the bulk expense creation endpoint"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            name='Groceries',
+            total_amount=Decimal('1000.00'),
+            category='Food'
+        )
+        self.other_budget = Budget.objects.create(
+            user=self.user,
+            name='Transport',
+            total_amount=Decimal('500.00'),
+            category='Transport'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('expenses:expense-bulk-create')
+    
+    def _item(self, budget=None, **overrides):
+        item = {
+            'budget_id': (budget or self.budget).id,
+            'description': 'Offline entry',
+            'amount': '10.00',
+            'date': '2025-01-15',
+            'category': 'Food'
+        }
+        item.update(overrides)
+        return item
+    
+    def test_bulk_create(self):
+        """Test creating many expenses in one request"""
+        items = [self._item(description=f'Entry {i}', date=f'2025-01-{i % 28 + 1:02d}') for i in range(300)]
+        items.append(self._item(budget=self.other_budget, amount='4.50', category='Transport'))
+        
+        response = self.client.post(self.url, items, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 301)
+        self.assertEqual(response.data['expenses'][0]['budget_name'], 'Groceries')
+        self.assertEqual(response.data['expenses'][0]['user'], 'testuser')
+        self.assertEqual(Expense.objects.count(), 301)
+    
+    def test_bulk_create_query_count(self):
+        """Test that the batch size does not change the number of queries"""
+        small = [self._item(date=f'2025-01-{i % 28 + 1:02d}') for i in range(5)]
+        large = [self._item(date=f'2025-02-{i % 28 + 1:02d}') for i in range(100)]
+        
+        with CaptureQueriesContext(connection) as small_queries:
+            self.client.post(self.url, small, format='json')
+        with CaptureQueriesContext(connection) as large_queries:
+            self.client.post(self.url, large, format='json')
+        
+        self.assertEqual(len(small_queries), len(large_queries))
+    
+    def test_bulk_create_keeps_aggregates_in_sync(self):
+        """Test that budget totals and report rollups include bulk inserts"""
+        items = [self._item(amount='10.00') for _ in range(3)]
+        items.append(self._item(budget=self.other_budget, amount='5.00', date='2025-01-16'))
+        self.client.post(self.url, items, format='json')
+        
+        self.budget.refresh_from_db()
+        self.other_budget.refresh_from_db()
+        self.assertEqual(self.budget.spent_total, Decimal('30.00'))
+        self.assertEqual(self.budget.expense_count, 3)
+        self.assertEqual(self.other_budget.spent_total, Decimal('5.00'))
+        
+        self.client.post(self.url, [self._item(amount='1.00')], format='json')
+        rollup = DailyExpenseRollup.objects.get(budget=self.budget)
+        self.assertEqual((rollup.total, rollup.count), (Decimal('31.00'), 4))
+    
+    def test_bulk_create_per_item_errors(self):
+        """Test that invalid items are reported by index and nothing is created"""
+        other_user = User.objects.create_user(username='otheruser', password='otherpass123')
+        foreign_budget = Budget.objects.create(
+            user=other_user,
+            name='Other Budget',
+            total_amount=Decimal('100.00'),
+            category='Food'
+        )
+        items = [
+            self._item(),
+            self._item(amount='-5.00'),
+            self._item(budget=foreign_budget),
+            self._item(budget_id='abc'),
+        ]
+        
+        response = self.client.post(self.url, items, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['errors']
+        self.assertEqual(errors[0], {})
+        self.assertIn('amount', errors[1])
+        self.assertEqual(errors[2]['budget_id'], ['Budget does not exist'])
+        self.assertEqual(errors[3]['budget_id'], ['Invalid budget id'])
+        self.assertFalse(Expense.objects.exists())
+    
+    def test_bulk_create_accepts_wrapped_list(self):
+        """Test the {"expenses": [...]} request form"""
+        response = self.client.post(self.url, {'expenses': [self._item()]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+    
+    @override_settings(EXPENSE_BULK_MAX_ITEMS=2)
+    def test_bulk_create_limits(self):
+        """Test that empty and oversized batches are rejected"""
+        response = self.client.post(self.url, [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.post(self.url, [self._item()] * 3, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Expense.objects.exists())
+
+
+class ExpenseExportTest(APITestCase):
+    """Test cases for streaming expense exports"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            name='Groceries',
+            total_amount=Decimal('1000.00'),
+            category='Food'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('expenses:expense-export')
+        Expense.objects.create(
+            budget=self.budget,
+            user=self.user,
+            description='Grocery shopping, weekly',
+            amount=Decimal('75.50'),
+            date='2025-01-15',
+            category='Food'
+        )
+        Expense.objects.create(
+            budget=self.budget,
+            user=self.user,
+            description='Bus ticket',
+            amount=Decimal('2.00'),
+            date='2025-01-10',
+            category='Transport'
+        )
+    
+    def _content(self, response):
+        return b''.join(
+            chunk.encode() if isinstance(chunk, str) else chunk
+            for chunk in response.streaming_content
+        ).decode()
+    
+    def test_export_csv(self):
+        """Test exporting expenses as CSV"""
+        response = self.client.get(self.url, {'format': 'csv'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('expenses.csv', response['Content-Disposition'])
+        lines = self._content(response).splitlines()
+        self.assertEqual(lines[0], 'id,date,description,amount,category,budget_id,budget_name,budget_category,created_at,updated_at')
+        self.assertEqual(len(lines), 3)
+        self.assertIn('2025-01-15,"Grocery shopping, weekly",75.50,Food', lines[1])
+    
+    def test_export_ndjson(self):
+        """Test exporting expenses as NDJSON matching the API's formatting"""
+        response = self.client.get(self.url, {'format': 'ndjson'})
+        
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self._content(response).splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['amount'], '75.50')
+        self.assertEqual(rows[0]['budget_name'], 'Groceries')
+        
+        expense = Expense.objects.get(pk=rows[0]['id'])
+        detail = self.client.get(reverse('expenses:expense-detail', kwargs={'pk': expense.pk}))
+        self.assertEqual(rows[0]['created_at'], detail.data['created_at'])
+    
+    def test_export_defaults_to_csv(self):
+        """Test that CSV is used without a format parameter"""
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+    
+    def test_export_honors_list_filters(self):
+        """Test that filters, search and ordering apply as in the list view"""
+        response = self.client.get(self.url, {'format': 'ndjson', 'category': 'Transport'})
+        rows = self._content(response).splitlines()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(json.loads(rows[0])['description'], 'Bus ticket')
+        
+        response = self.client.get(self.url, {'format': 'ndjson', 'ordering': 'amount'})
+        rows = [json.loads(line) for line in self._content(response).splitlines()]
+        self.assertEqual([row['amount'] for row in rows], ['2.00', '75.50'])
+        
+        response = self.client.get(self.url, {'format': 'ndjson', 'search': 'grocery'})
+        self.assertEqual(len(self._content(response).splitlines()), 1)
+    
+    def test_export_user_isolation(self):
+        """Test that only the requesting user's expenses are exported"""
+        other_user = User.objects.create_user(username='otheruser', password='otherpass123')
+        self.client.force_authenticate(user=other_user)
+        response = self.client.get(self.url, {'format': 'ndjson'})
+        self.assertEqual(self._content(response), '')
+    
+    def test_export_unknown_format(self):
+        """Test that unsupported formats are rejected"""
+        response = self.client.get(self.url, {'format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+OFX_STATEMENT = """OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+
+<OFX>
+<BANKMSGSRSV1><STMTTRNRS><STMTRS>
+<BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20250115120000[0:GMT]
+<TRNAMT>-42.10
+<FITID>1
+<NAME>SUPERMARKET
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20250116
+<TRNAMT>1500.00
+<FITID>2
+<NAME>SALARY
+</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250117<TRNAMT>-3.50<FITID>3<MEMO>COFFEE</MEMO></STMTTRN>
+</BANKTRANLIST>
+</STMTRS></STMTTRNRS></BANKMSGSRSV1>
+</OFX>
+"""
+
+
+class ExpenseImportTest(APITestCase):
+    """Test cases for CSV/OFX statement imports"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            name='Everyday',
+            total_amount=Decimal('5000.00'),
+            category='General'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('expenses:expense-import')
+    
+    def _upload(self, content, name='statement.csv', **data):
+        upload = SimpleUploadedFile(name, content.encode())
+        return self.client.post(self.url, {'file': upload, 'budget_id': self.budget.id, **data}, format='multipart')
+    
+    def test_import_csv(self):
+        """Test importing a CSV statement, skipping invalid rows"""
+        content = (
+            'Date,Description,Amount,Category\n'
+            '2025-01-15,Groceries,42.10,Food\n'
+            '2025-01-16,Cinema,12,\n'
+            'not-a-date,Broken,1.00,Food\n'
+            '2025-01-17,Refund,-5.00,Food\n'
+            '2025-01-18,Glitch,NaN,Food\n'
+            '2025-01-18,Glitch,Infinity,Food\n'
+        )
+        response = self._upload(content)
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['skipped'], 4)
+        self.assertEqual(response.data['errors'][0]['line'], 4)
+        self.assertEqual([error['line'] for error in response.data['errors'][2:]], [6, 7])
+        self.assertEqual(
+            sorted(Expense.objects.values_list('category', 'amount')),
+            [('Food', Decimal('42.10')), ('General', Decimal('12.00'))]
+        )
+        self.budget.refresh_from_db()
+        self.assertEqual(self.budget.spent_total, Decimal('54.10'))
+    
+    def test_import_ofx(self):
+        """Test importing the debits of an OFX statement"""
+        response = self._upload(OFX_STATEMENT, name='statement.ofx')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(
+            sorted(Expense.objects.values_list('description', 'amount', 'date')),
+            [('COFFEE', Decimal('3.50'), date(2025, 1, 17)), ('SUPERMARKET', Decimal('42.10'), date(2025, 1, 15))]
+        )
+    
+    def test_ofx_parser_handles_chunk_boundaries(self):
+        """Test that transactions split across read chunks are parsed"""
+        with mock.patch('expenses.importers.OFX_CHUNK_SIZE', 7):
+            rows = list(parse_ofx(io.StringIO(OFX_STATEMENT)))
+        self.assertEqual([fields['amount'] for _, fields in rows], ['42.10', '3.50'])
+    
+    def test_import_large_csv_in_batches(self):
+        """Test a large upload written in bounded batches"""
+        lines = ['date,description,amount'] + [f'2025-01-{i % 28 + 1:02d},Row {i},1.00' for i in range(5000)]
+        with override_settings(EXPENSE_IMPORT_BATCH_SIZE=1000, FILE_UPLOAD_MAX_MEMORY_SIZE=1024):
+            with mock.patch.object(Expense.objects, 'create_many', wraps=Expense.objects.create_many) as create_many:
+                response = self._upload('\n'.join(lines))
+        
+        self.assertEqual(response.data['created'], 5000)
+        self.assertEqual(create_many.call_count, 5)
+        self.budget.refresh_from_db()
+        self.assertEqual(self.budget.expense_count, 5000)
+    
+    def test_import_rejects_bad_header_and_foreign_budget(self):
+        """Test that bad files and other users' budgets are rejected"""
+        response = self._upload('when,what\n2025-01-01,x\n')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('file', response.data)
+        
+        other_user = User.objects.create_user(username='otheruser', password='otherpass123')
+        foreign_budget = Budget.objects.create(
+            user=other_user, name='Other', total_amount=Decimal('10.00'), category='Food'
+        )
+        response = self._upload('date,description,amount\n2025-01-01,x,1\n', budget_id=foreign_budget.id)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Expense.objects.exists())
+    
+    def test_unreadable_file_reports_what_was_kept(self):
+        """Test that an import stopped by a bad byte past the first batch reports the rows it wrote"""
+        lines = ['date,description,amount'] + [f'2025-01-15,Row {i},1.00' for i in range(1000)]
+        content = '\n'.join(lines).encode() + b'\n2025-01-16,Caf\xe9,2.00\n2025-01-17,After,3.00\n'
+        upload = SimpleUploadedFile('statement.csv', content)
+        with override_settings(EXPENSE_IMPORT_BATCH_SIZE=100):
+            response = self.client.post(self.url, {'file': upload, 'budget_id': self.budget.id}, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("can't decode byte 0xe9", response.data['file'][0])
+        # Decoding stops at the start of the chunk holding the bad byte
+        self.assertGreater(response.data['created'], 100)
+        self.assertEqual(response.data['created'], Expense.objects.count())
+        self.assertEqual(response.data['last_line'], response.data['created'] + 1)
+        self.budget.refresh_from_db()
+        self.assertEqual(self.budget.expense_count, response.data['created'])
+    
+    def test_broken_csv_row_keeps_earlier_rows(self):
+        """Test that a CSV error stops the import after writing the valid rows before it"""
+        oversized = 'x' * (csv.field_size_limit() + 1)
+        content = 'date,description,amount\n' + ''.join(
+            f'2025-01-15,Row {i},1.00\n' for i in range(5)
+        ) + f'2025-01-16,{oversized},2.00\n2025-01-17,After,3.00\n'
+        with override_settings(EXPENSE_IMPORT_BATCH_SIZE=2):
+            response = self._upload(content)
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual((response.data['created'], response.data['last_line']), (5, 6))
+        self.assertEqual(Expense.objects.count(), 5)
+    
+    def test_import_command(self):
+        """Test the import_expenses management command"""
+        with tempfile.NamedTemporaryFile('w', suffix='.ofx', delete=False) as statement:
+            statement.write(OFX_STATEMENT)
+        self.addCleanup(os.remove, statement.name)
+        
+        out = StringIO()
+        call_command(
+            'import_expenses', statement.name,
+            '--user', 'testuser', '--budget', str(self.budget.id), '--batch-size', '1',
+            stdout=out
+        )
+        
+        self.assertIn('Imported 2 expense(s), skipped 0', out.getvalue())
+        self.assertEqual(Expense.objects.count(), 2)
+        
+        with self.assertRaises(CommandError):
+            call_command('import_expenses', statement.name, '--user', 'nobody', '--budget', str(self.budget.id))
+
+
+class ExpenseCursorPaginationTest(APITestCase):
+    """Test cases for keyset pagination of the expense list"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            name='Groceries',
+            total_amount=Decimal('10000.00'),
+            category='Food'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('expenses:expense-list')
+        # Several expenses share a date so the tiebreakers are exercised
+        Expense.objects.create_many([
+            Expense(
+                budget=self.budget,
+                user=self.user,
+                description=f'Expense {n}',
+                amount=Decimal(n % 7 + 1),
+                date=date(2025, 1, n % 10 + 1),
+                category='Food' if n % 2 else 'Transport'
+            )
+            for n in range(45)
+        ])
+    
+    def _walk(self, params):
+        ids = []
+        response = self.client.get(self.url, params)
+        pages = [response]
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                return ids, pages
+            response = self.client.get(response.data['next'])
+            pages.append(response)
+    
+    def test_cursor_walk_matches_model_ordering(self):
+        """Test that following next links visits every expense once, in order"""
+        ids, pages = self._walk({'pagination': 'cursor'})
+        
+        expected = list(
+            Expense.objects.filter(user=self.user).order_by('-date', '-created_at', 'id').values_list('id', flat=True)
+        )
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0].data['previous'])
+        self.assertEqual(ids, expected)
+    
+    def test_previous_link(self):
+        """Test that the previous link returns the preceding page"""
+        first = self.client.get(self.url, {'pagination': 'cursor'})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertIsNotNone(back.data['next'])
+    
+    def test_cursor_with_filters_and_ordering(self):
+        """Test that cursor pages honor filter and ordering parameters"""
+        ids, _ = self._walk({'pagination': 'cursor', 'category': 'Food', 'ordering': 'amount'})
+        
+        expected = list(
+            Expense.objects.filter(user=self.user, category='Food').order_by(
+                'amount', '-date', '-created_at', 'id'
+            ).values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+    
+    def test_cursor_queries_do_not_grow_with_depth(self):
+        """Test that a deep page costs the same queries as the first, with no COUNT"""
+        first = self.client.get(self.url, {'pagination': 'cursor'})
+        second = self.client.get(first.data['next'])
+        
+        with CaptureQueriesContext(connection) as first_page:
+            self.client.get(self.url, {'pagination': 'cursor'})
+        with CaptureQueriesContext(connection) as last_page:
+            self.client.get(second.data['next'])
+        
+        self.assertEqual(len(first_page), len(last_page))
+        self.assertFalse(any('COUNT(' in query['sql'] for query in last_page.captured_queries))
+    
+    @skipUnless(connection.vendor == 'sqlite', 'Checks an SQLite query plan')
+    def test_cursor_page_seeks_from_the_cursor(self):
+        """Test that a cursor page range-scans the date index from the cursor, not from the start"""
+        ordering = ['-date', '-created_at', 'id']
+        expenses = Expense.objects.filter(user=self.user)
+        position = expenses.order_by(*ordering).values_list('date', 'created_at', 'id')[30]
+        page = expenses.filter(KeysetPagination()._after(ordering, position)).order_by(*ordering)
+        
+        self.assertRegex(page.explain(), r'USING INDEX expense_user_date_idx \(user_id=\? AND date<\?\)')
+        self.assertEqual(
+            list(page.values_list('id', flat=True)),
+            list(expenses.order_by(*ordering).values_list('id', flat=True)[31:])
+        )
+    
+    def test_page_number_pagination_is_default(self):
+        """Test that the list keeps page number pagination without a cursor"""
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.data['count'], 45)
+    
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor returns 404"""
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ExpenseSearchTest(APITestCase):
+    """Test cases for full-text expense search"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            name='Groceries',
+            total_amount=Decimal('1000.00'),
+            category='Food'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('expenses:expense-list')
+    
+    def _expense(self, description, category='Food', user=None, budget=None):
+        return Expense.objects.create(
+            budget=budget or self.budget,
+            user=user or self.user,
+            description=description,
+            amount=Decimal('10.00'),
+            date='2025-01-15',
+            category=category
+        )
+    
+    def _search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['description'] for item in response.data['results']]
+    
+    def test_search_uses_full_text_index(self):
+        """Test that searches go through the FTS table on SQLite and the tsvector on PostgreSQL"""
+        self.assertIsNotNone(get_search_backend('default'))
+        
+        with CaptureQueriesContext(connection) as queries:
+            self._search(search='grocery')
+        
+        marker = 'to_tsvector' if connection.vendor == 'postgresql' else FTS_TABLE
+        self.assertTrue(any(marker in query['sql'] for query in queries.captured_queries))
+    
+    def test_search_matches_word_prefixes_and_stems(self):
+        """Test that terms match stemmed word prefixes in description and category"""
+        self._expense('Groceries for the week')
+        self._expense('Grocery run')
+        self._expense('Bus ticket', category='Transport')
+        
+        self.assertCountEqual(self._search(search='grocer'), ['Groceries for the week', 'Grocery run'])
+        self.assertEqual(self._search(search='transport'), ['Bus ticket'])
+        self.assertEqual(self._search(search='grocery week'), ['Groceries for the week'])
+        self.assertEqual(self._search(search='"unbalanced'), [])
+    
+    def test_search_results_are_ranked(self):
+        """Test that the most relevant expense comes first unless ordering is given"""
+        self._expense('Coffee with milk')
+        self._expense('Coffee with coffee')
+        self._expense('Tea with milk')
+        
+        self.assertEqual(self._search(search='coffee'), ['Coffee with coffee', 'Coffee with milk'])
+        self.assertEqual(self._search(search='coffee', ordering='created_at'), ['Coffee with milk', 'Coffee with coffee'])
+    
+    def test_search_index_follows_writes(self):
+        """Test that the index reflects updates, deletes and bulk creates"""
+        expense = self._expense('Cinema tickets')
+        expense.description = 'Theatre tickets'
+        expense.save()
+        Expense.objects.create_many([
+            Expense(budget=self.budget, user=self.user, description='Cinema snacks',
+                    amount=Decimal('5.00'), date=date(2025, 1, 16), category='Food')
+        ])
+        
+        self.assertEqual(self._search(search='cinema'), ['Cinema snacks'])
+        self.assertEqual(self._search(search='theatre'), ['Theatre tickets'])
+        
+        expense.delete()
+        self.assertEqual(self._search(search='theatre'), [])
+    
+    def test_search_is_scoped_to_user(self):
+        """Test that other users' matching expenses are not returned"""
+        other_user = User.objects.create_user(username='otheruser', password='otherpass123')
+        other_budget = Budget.objects.create(
+            user=other_user, name='Other', total_amount=Decimal('10.00'), category='Food'
+        )
+        self._expense('Pizza', user=other_user, budget=other_budget)
+        self._expense('Pizza night')
+        
+        self.assertEqual(self._search(search='pizza'), ['Pizza night'])
+    
+    def test_search_with_cursor_pagination(self):
+        """Test that ranked search results can be paged with a cursor"""
+        for n in range(25):
+            self._expense('Lunch ' + 'lunch ' * (n % 3))
+        
+        response = self.client.get(self.url, {'search': 'lunch', 'pagination': 'cursor'})
+        ids = [item['id'] for item in response.data['results']]
+        response = self.client.get(response.data['next'])
+        ids += [item['id'] for item in response.data['results']]
+        
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(sorted(ids), sorted(Expense.objects.values_list('id', flat=True)))
+    
+    def test_search_falls_back_to_icontains(self):
+        """Test that search still works without a full-text backend"""
+        self._expense('Groceries')
+        
+        with mock.patch('expenses.search.get_search_backend', return_value=None):
+            self.assertEqual(self._search(search='rocer'), ['Groceries'])
+    
+    def test_export_search(self):
+        """Test that exports accept the same search parameter"""
+        self._expense('Groceries')
+        self._expense('Bus ticket', category='Transport')
+        
+        response = self.client.get(reverse('expenses:expense-export'), {'format': 'ndjson', 'search': 'bus'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['description'], 'Bus ticket')
+
+
+@override_settings(CACHE_IS_SHARED=True)
+class ExpenseConditionalGetTest(APITestCase):
+    """Test cases for ETag/Last-Modified on the expense list"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            name='Groceries',
+            total_amount=Decimal('1000.00'),
+            category='Food'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('expenses:expense-list')
+    
+    def _expense(self, description):
+        return Expense.objects.create(
+            budget=self.budget,
+            user=self.user,
+            description=description,
+            amount=Decimal('10.00'),
+            date='2025-01-15',
+            category='Food'
+        )
+    
+    def test_unchanged_list_returns_304_without_queries(self):
+        """Test that a matching If-None-Match returns 304 without list queries"""
+        self._expense('Groceries')
+        response = self.client.get(self.url)
+        
+        with self.assertNumQueries(0):
+            revalidated = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(revalidated['Last-Modified'], response['Last-Modified'])
+    
+    def test_query_parameters_change_etag(self):
+        """Test that different filters or pages get different ETags"""
+        etag = self.client.get(self.url)['ETag']
+        
+        response = self.client.get(self.url, {'category': 'Food'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_writes_change_etag(self):
+        """Test that creating, updating and deleting expenses invalidate the ETag"""
+        etag = self.client.get(self.url)['ETag']
+        expense = self._expense('Groceries')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        
+        etag = response['ETag']
+        expense.description = 'Market'
+        expense.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        etag = response['ETag']
+        expense.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 0)
+    
+    def test_username_change_changes_etag(self):
+        """Test that renaming the user invalidates the ETag of rows that show the username"""
+        self._expense('Groceries')
+        etag = self.client.get(self.url)['ETag']
+        
+        renamed = self.client.patch(reverse('users:profile'), {'username': 'renamed'}, format='json')
+        self.assertEqual(renamed.status_code, status.HTTP_200_OK)
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['user'], 'renamed')
+    
+    def test_post_is_not_conditional(self):
+        """Test that creating an expense ignores conditional headers"""
+        response = self.client.post(self.url, {
+            'budget_id': self.budget.id,
+            'description': 'Groceries',
+            'amount': '10.00',
+            'date': '2025-01-15',
+            'category': 'Food'
+        }, format='json', HTTP_IF_NONE_MATCH='*')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('ETag', response)
+    
+    @override_settings(CACHE_IS_SHARED=False)
+    def test_no_validators_without_shared_cache(self):
+        """Test that lists carry no ETag and never answer 304 when each process has its own cache"""
+        response = self.client.get(self.url)
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ExpenseSparseFieldsTest(APITestCase):
+    """Test cases for ?fields= and ?omit= on expenses"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            name='Groceries',
+            total_amount=Decimal('1000.00'),
+            category='Food'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('expenses:expense-list')
+        self.expense = Expense.objects.create(
+            budget=self.budget,
+            user=self.user,
+            description='Grocery shopping',
+            amount=Decimal('75.50'),
+            date='2025-01-15',
+            category='Food'
+        )
+    
+    def _list_sql(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        select = [query['sql'] for query in queries.captured_queries if 'COUNT(' not in query['sql']][-1]
+        return response, select
+    
+    def test_fields_limits_payload_and_joins(self):
+        """Test that ?fields= returns only those fields and skips unused joins"""
+        response, sql = self._list_sql({'fields': 'id,amount,date'})
+        
+        self.assertEqual(list(response.data['results'][0]), ['id', 'amount', 'date'])
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('"description"', sql)
+    
+    def test_budget_fields_keep_budget_join(self):
+        """Test that requesting budget fields joins only the budget"""
+        response, sql = self._list_sql({'fields': 'id,budget_name'})
+        
+        self.assertEqual(response.data['results'][0], {'id': self.expense.id, 'budget_name': 'Groceries'})
+        self.assertIn('"budgets_budget"', sql)
+        self.assertNotIn('"users_user"', sql)
+    
+    def test_omit(self):
+        """Test that ?omit= drops fields and their joins"""
+        response, sql = self._list_sql({'omit': 'budget_name,budget_category,user'})
+        
+        item = response.data['results'][0]
+        self.assertNotIn('budget_name', item)
+        self.assertNotIn('user', item)
+        self.assertEqual(item['description'], 'Grocery shopping')
+        self.assertNotIn('JOIN', sql)
+    
+    def test_sparse_fields_with_cursor_pagination(self):
+        """Test that sparse rows can still be paged with a cursor"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'fields': 'id', 'pagination': 'cursor'})
+        
+        self.assertEqual(response.data['results'], [{'id': self.expense.id}])
+    
+    def test_detail_fields(self):
+        """Test that the detail view honors ?fields="""
+        url = reverse('expenses:expense-detail', kwargs={'pk': self.expense.pk})
+        response = self.client.get(url, {'fields': 'description'})
+        
+        self.assertEqual(response.data, {'description': 'Grocery shopping'})
+    
+    def test_unknown_field(self):
+        """Test that unknown or write-only field names are rejected"""
+        response = self.client.get(self.url, {'fields': 'id,budget_id'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+
+
+class ExpenseFastListTest(APITestCase):
+    """Test cases for the values()-based expense list fast path"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('expenses:expense-list')
+        budgets = [
+            Budget.objects.create(user=self.user, name='Groceries', total_amount=Decimal('1000.00'), category='Food'),
+            Budget.objects.create(user=self.user, name='Café & "more"', total_amount=Decimal('99.99'), category='Fun'),
+        ]
+        Expense.objects.create_many([
+            Expense(
+                budget=budgets[n % 2],
+                user=self.user,
+                description=f'Grocery ünïcode "{n}"' if n % 3 else f'Bus {n}',
+                amount=Decimal('0.10') * (n + 1),
+                date=date(2025, 1, n % 28 + 1),
+                category=budgets[n % 2].category
+            )
+            for n in range(30)
+        ])
+    
+    def _both_paths(self, params):
+        fast = self.client.get(self.url, params)
+        with mock.patch.object(ExpenseListView, 'fast_list', False):
+            slow = self.client.get(self.url, params)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        return fast, slow
+    
+    def test_parity_with_serializer(self):
+        """Test that fast pages are byte-identical to ExpenseSerializer output"""
+        for params in [
+            {},
+            {'page': 2},
+            {'ordering': 'amount'},
+            {'category': 'Fun'},
+            {'search': 'grocery'},
+            {'fields': 'id,amount,budget_name'},
+            {'omit': 'user,description'},
+            {'pagination': 'cursor'},
+            {'pagination': 'cursor', 'search': 'bus', 'fields': 'id,date'},
+        ]:
+            with self.subTest(params=params):
+                fast, slow = self._both_paths(params)
+                self.assertEqual(fast.content, slow.content)
+    
+    def test_cursor_walk_with_fast_rows(self):
+        """Test that next/previous links work when pages are values() rows"""
+        first = self.client.get(self.url, {'pagination': 'cursor'})
+        second = self.client.get(first.data['next'])
+        with mock.patch.object(ExpenseListView, 'fast_list', False):
+            slow_second = self.client.get(first.data['next'])
+        
+        self.assertEqual(second.content, slow_second.content)
+        self.assertEqual(self.client.get(second.data['previous']).content, first.content)
+    
+    def test_fast_page_is_one_query(self):
+        """Test that a fast cursor page is a single joined query"""
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'pagination': 'cursor'})
+
+
+class SeedLoadCommandTest(TestCase):
+    """Test cases for the seed_load synthetic data command"""
+    
+    def test_seed_load_creates_consistent_data(self):
+        """Test that generated users, budgets, expenses and aggregates agree"""
+        out = StringIO()
+        call_command(
+            'seed_load', '--users', '2', '--budgets', '10', '--expenses', '300',
+            '--start', '2025-01-01', '--days', '90', '--batch-size', '100', stdout=out
+        )
+        
+        self.assertIn('Created 2 user(s), 20 budget(s), 600 expense(s)', out.getvalue())
+        user = User.objects.get(username='load1')
+        self.assertTrue(user.check_password('loadtest-password'))
+        self.assertEqual(user.budgets.count(), 10)
+        self.assertEqual(user.budgets.filter(category='Food').count(), 2)
+        
+        expenses = Expense.objects.filter(user=user)
+        self.assertEqual(expenses.count(), 300)
+        self.assertFalse(expenses.exclude(date__range=(date(2025, 1, 1), date(2025, 3, 31))).exists())
+        self.assertFalse(expenses.exclude(category=F('budget__category')).exists())
+        self.assertFalse(Budget.objects.with_drift().exists())
+        self.assertEqual(
+            DailyExpenseRollup.objects.filter(user=user).aggregate(total=Sum('total'))['total'],
+            expenses.aggregate(total=Sum('amount'))['total']
+        )
+    
+    def test_seed_load_is_deterministic(self):
+        """Test that the same seed generates the same expenses"""
+        call_command('seed_load', '--users', '1', '--expenses', '50', '--prefix', 'a', stdout=StringIO())
+        call_command('seed_load', '--users', '1', '--expenses', '50', '--prefix', 'b', stdout=StringIO())
+        
+        def rows(username):
+            return list(Expense.objects.filter(user__username=username).order_by('pk').values_list(
+                'description', 'amount', 'date', 'category'
+            ))
+        self.assertEqual(rows('a0'), rows('b0'))
+    
+    def test_seed_load_refuses_existing_users(self):
+        """Test that existing users are not overwritten"""
+        User.objects.create_user(username='load0', password='testpass123')
+        with self.assertRaises(CommandError):
+            call_command('seed_load', '--users', '1', stdout=StringIO())
+        self.assertFalse(Expense.objects.exists())
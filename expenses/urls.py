@@ -1,9 +1,14 @@
 from django.urls import path
-from .views import ExpenseListView, ExpenseDetailView
+from .views import (
+    ExpenseListView, ExpenseDetailView, ExpenseBulkCreateView, ExpenseExportView, ExpenseImportView
+)
 
 app_name = 'expenses'
 
 urlpatterns = [
     path('', ExpenseListView.as_view(), name='expense-list'),
+    path('bulk/', ExpenseBulkCreateView.as_view(), name='expense-bulk-create'),
+    path('export/', ExpenseExportView.as_view(), name='expense-export'),
+    path('import/', ExpenseImportView.as_view(), name='expense-import'),
     path('<int:pk>/', ExpenseDetailView.as_view(), name='expense-detail'),
 ]
@@ -1,18 +1,30 @@
+import io
 from rest_framework import generics, permissions, filters
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.serializers import ValidationError
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
+from personal_budgeting_api.conditional import ConditionalGetMixin
+from personal_budgeting_api.fast_serializers import FastListMixin
+from personal_budgeting_api.sparse_fields import SparseFieldsViewMixin
+from .exports import CSVRenderer, NDJSONRenderer, EXPORT_LOOKUPS, stream_csv, stream_ndjson
 from .models import Expense
-from .serializers import ExpenseSerializer, ExpenseCreateSerializer
+from .pagination import KeysetPagination
+from .search import ExpenseSearchFilter
+from .importers import ImportAborted, detect_format, import_expenses
+from .serializers import (
+    ExpenseSerializer, ExpenseCreateSerializer, ExpenseBulkItemSerializer, ExpenseImportSerializer
+)
 from budgets.models import Budget
 
 
-class ExpenseListView(generics.ListCreateAPIView):
-    """View for listing and creating expenses"""
-    serializer_class = ExpenseSerializer
-    permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+class ExpenseFilterMixin:
+    """Filtering, search and ordering shared by the expense list and export"""
+    # Search runs last so it can rank results on top of the requested ordering
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, ExpenseSearchFilter]
     filterset_fields = ['category', 'date', 'budget']
     search_fields = ['description', 'category']
     ordering_fields = ['date', 'amount', 'created_at']
@@ -20,6 +32,33 @@ class ExpenseListView(generics.ListCreateAPIView):
     
     def get_queryset(self):
         return Expense.objects.filter(user=self.request.user)
+
+
+class ExpenseListView(ConditionalGetMixin, FastListMixin, SparseFieldsViewMixin, ExpenseFilterMixin,
+                      generics.ListCreateAPIView):
+    """View for listing and creating expenses.
+
+    Pages by number by default. `?pagination=cursor` (or any `cursor`
+    parameter) switches to keyset pagination, which skips the COUNT query
+    and costs the same at any depth. GETs carry ETag/Last-Modified and
+    revalidate with 304. `?fields=`/`?omit=` trim the rows and the query.
+    Pages are rendered from `values()` rows by FastListMixin.
+    """
+    serializer_class = ExpenseSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+    
+    def get_queryset(self):
+        return super().get_queryset().select_related('budget', 'user')
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -30,13 +69,75 @@ class ExpenseListView(generics.ListCreateAPIView):
         serializer.save(user=self.request.user)
 
 
-class ExpenseDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ExpenseExportView(ExpenseFilterMixin, generics.GenericAPIView):
+    """View for exporting all matching expenses as CSV or NDJSON.
+
+    Honors the same filter, search and ordering parameters as the list view.
+    Rows are read through a server-side iterator and streamed as they are
+    encoded, so exports of any size start immediately and use flat memory.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    pagination_class = None
+    
+    def get(self, request, *args, **kwargs):
+        rows = self.filter_queryset(self.get_queryset()).values_list(
+            *EXPORT_LOOKUPS
+        ).iterator(chunk_size=settings.EXPENSE_EXPORT_CHUNK_SIZE)
+        
+        renderer = request.accepted_renderer
+        stream = stream_csv if renderer.format == 'csv' else stream_ndjson
+        response = StreamingHttpResponse(stream(rows), content_type=renderer.media_type)
+        response['Content-Disposition'] = f'attachment; filename="expenses.{renderer.format}"'
+        return response
+
+
+class ExpenseImportView(generics.GenericAPIView):
+    """View for importing a CSV or OFX bank statement into one budget.
+
+    The upload is parsed as a stream and written in batches of
+    EXPENSE_IMPORT_BATCH_SIZE. Rows that fail validation are skipped and
+    reported with their line (CSV) or transaction (OFX) number. A file
+    that cannot be read to the end is answered with 400, with the counts
+    of what was written before the failure, which is kept.
+    """
+    serializer_class = ExpenseImportSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+    
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['file']
+        format = serializer.validated_data.get('format') or detect_format(upload.name)
+        
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            result = import_expenses(
+                stream,
+                serializer.validated_data['budget'],
+                format=format,
+                batch_size=settings.EXPENSE_IMPORT_BATCH_SIZE
+            )
+        except ImportAborted as exc:
+            return Response({
+                'file': [str(exc)],
+                'last_line': exc.line,
+                **exc.result.as_dict(),
+            }, status=status.HTTP_400_BAD_REQUEST)
+        finally:
+            stream.detach()
+        
+        return Response(result.as_dict(), status=status.HTTP_201_CREATED)
+
+
+class ExpenseDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """View for retrieving, updating, and deleting expenses"""
     serializer_class = ExpenseSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Expense.objects.filter(user=self.request.user)
+        return Expense.objects.filter(user=self.request.user).select_related('budget', 'user')
     
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
@@ -53,3 +154,51 @@ class ExpenseDetailView(generics.RetrieveUpdateDestroyAPIView):
             {'message': 'Expense deleted successfully'}, 
             status=status.HTTP_204_NO_CONTENT
         )
+
+
+class ExpenseBulkCreateView(generics.GenericAPIView):
+    """View for creating many expenses in one request.
+
+    Accepts a JSON list of expenses (or `{"expenses": [...]}`). Ownership of
+    every referenced budget is checked with a single query and the batch is
+    inserted with one bulk_create in a single transaction. If any item is
+    invalid nothing is created and `errors` lists the problems per item, in
+    input order, with `{}` for the valid ones.
+    """
+    serializer_class = ExpenseBulkItemSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        items = request.data.get('expenses') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'non_field_errors': ['Expected a non-empty list of expenses.']})
+        
+        max_items = settings.EXPENSE_BULK_MAX_ITEMS
+        if len(items) > max_items:
+            raise ValidationError({
+                'non_field_errors': [f'At most {max_items} expenses can be created per request.']
+            })
+        
+        budget_ids = set()
+        for item in items:
+            try:
+                budget_ids.add(int(item.get('budget_id')))
+            except (AttributeError, TypeError, ValueError):
+                # Reported per item by the serializer
+                pass
+        budgets = Budget.objects.filter(user=request.user).in_bulk(budget_ids)
+        
+        serializer = self.get_serializer(data=items, many=True, context={
+            **self.get_serializer_context(),
+            'budgets': budgets,
+        })
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        expenses = Expense.objects.create_many([
+            Expense(user=request.user, **attrs) for attrs in serializer.validated_data
+        ])
+        return Response({
+            'created': len(expenses),
+            'expenses': ExpenseSerializer(expenses, many=True).data,
+        }, status=status.HTTP_201_CREATED)
@@ -0,0 +1,25 @@
+"""
+Gunicorn settings, read from the working directory on start
+
+When PROMETHEUS_MULTIPROC_DIR is set, every worker writes its metrics to
+files in that directory and /api/metrics sums them (see
+personal_budgeting_api/metrics.py). The directory is emptied on start so
+counters do not carry over from a previous run, and the files of workers
+that exit are marked dead so their gauges are dropped.
+"""
+
+import os
+import shutil
+
+
+def on_starting(server):
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,74 @@
+"""
+Conditional GET support for per-user API views.
+
+The validators come from the user's data watermark (see users.versioning),
+which every Expense or Budget write bumps. A request carrying a matching
+If-None-Match (or a current If-Modified-Since) is answered with
+304 Not Modified right after authentication, before the view runs any query.
+
+Watermarks kept in a per-process cache would only move in the worker that
+handled the write, and the others would keep answering 304 for changed
+data, so responses carry no validators unless settings.CACHE_IS_SHARED.
+"""
+import hashlib
+import math
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from users.versioning import get_data_watermark
+from .metrics import record_cache_lookup
+
+
+class NotModified(Exception):
+    """Carries a 304 response out of `initial()`"""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """Add ETag/Last-Modified to GET responses and answer revalidations with 304"""
+    etag = None
+    last_modified = None
+
+    def get_etag_extra(self, request):
+        """Anything besides the URL and the user's data that the response depends on"""
+        return ''
+
+    def get_last_modified(self, request, modified_at):
+        """Unix time the response last changed, given the data's modification time"""
+        return modified_at
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method not in ('GET', 'HEAD') or not settings.CACHE_IS_SHARED:
+            return
+
+        version, modified_at = get_data_watermark(request.user.pk)
+        validator = ':'.join(str(part) for part in (
+            request.user.pk, version, request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''), self.get_etag_extra(request),
+        ))
+        self.etag = f'W/"{hashlib.md5(validator.encode()).hexdigest()}"'
+        self.last_modified = math.ceil(self.get_last_modified(request, modified_at))
+
+        response = get_conditional_response(request, etag=self.etag, last_modified=self.last_modified)
+        if 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            record_cache_lookup('conditional_get', response is not None)
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.etag and (200 <= response.status_code < 300 or response.status_code == 304):
+            response['ETag'] = self.etag
+            response['Last-Modified'] = http_date(self.last_modified)
+            # Responses are private to the user and must be revalidated
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+        return response
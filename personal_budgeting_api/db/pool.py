@@ -0,0 +1,196 @@
+"""
+Per-process pool of database connections.
+
+A pool holds at most `max_size` connections, open or being opened, so
+every worker process has a fixed ceiling on what it can hold against
+the database's max_connections. Callers that find it exhausted wait up
+to `timeout` seconds for a connection to be released, then get
+PoolTimeout.
+
+Released connections are reset and kept idle. The most recently
+released one is handed out first, which keeps the busy ones warm and
+lets rarely used ones reach `max_lifetime` and be closed. A
+connection idle for `health_check_after` seconds or more is checked
+before it is handed out; one that fails is replaced.
+
+Statistics are logged to this module's logger every `stats_interval`
+seconds while the pool is in use.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """No connection became available in time"""
+
+
+class _Entry:
+    __slots__ = ('connection', 'created', 'released')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = self.released = time.monotonic()
+
+
+class ConnectionPool:
+    """Thread-safe pool of the connections returned by `connect()`.
+
+    `check(connection)` says whether an idle connection still works,
+    `reset(connection)` readies a released one for reuse and says
+    whether it can be reused, and `close(connection)` closes one.
+    """
+
+    def __init__(self, name, check, reset, close, max_size=4, timeout=10, max_lifetime=1800,
+                 health_check_after=30, stats_interval=60):
+        self.name = name
+        self.check = check
+        self.reset = reset
+        self.close = close
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.stats_interval = stats_interval
+        self._available = threading.Condition()
+        self._idle = []
+        self._in_use = {}
+        self._open = 0
+        self._peak = 0
+        self._counts = dict.fromkeys(
+            ('opened', 'reused', 'closed', 'expired', 'failed_checks', 'waits', 'timeouts'), 0
+        )
+        self._wait_ms = 0.0
+        self._next_stats = time.monotonic() + stats_interval if stats_interval else None
+
+    def acquire(self, connect):
+        """A connection from the pool, or a new one from `connect()` if it has room"""
+        started = time.monotonic()
+        waited = False
+        while True:
+            entry = self._take(started)
+            if entry is None:
+                waited = True
+                continue
+            if entry.connection is not None:
+                if self._usable(entry):
+                    self._count('reused')
+                    break
+                self._discard(entry)
+                continue
+            try:
+                entry.connection = connect()
+            except BaseException:
+                self._discard(entry)
+                raise
+            self._count('opened')
+            break
+
+        with self._available:
+            self._in_use[id(entry.connection)] = entry
+            self._peak = max(self._peak, len(self._in_use))
+            if waited:
+                self._counts['waits'] += 1
+                self._wait_ms += (time.monotonic() - started) * 1000
+        self._log_stats()
+        return entry.connection
+
+    def _take(self, started):
+        """An idle entry, an empty entry to connect, or None after a wait"""
+        with self._available:
+            if self._idle:
+                return self._idle.pop()
+            if self._open < self.max_size:
+                self._open += 1
+                return _Entry(None)
+            remaining = started + self.timeout - time.monotonic()
+            if remaining <= 0:
+                self._counts['timeouts'] += 1
+                logger.warning('Connection pool %s: no connection free after %ss (%d in use)',
+                               self.name, self.timeout, len(self._in_use))
+                raise PoolTimeout(f'No connection free in pool {self.name} after {self.timeout}s')
+            self._available.wait(remaining)
+            return None
+
+    def _usable(self, entry):
+        now = time.monotonic()
+        if self.max_lifetime and now - entry.created >= self.max_lifetime:
+            self._count('expired')
+            return False
+        if self.health_check_after is not None and now - entry.released >= self.health_check_after:
+            try:
+                healthy = self.check(entry.connection)
+            except Exception:
+                healthy = False
+            if not healthy:
+                self._count('failed_checks')
+                return False
+        return True
+
+    def release(self, connection):
+        """Return a connection taken with acquire()"""
+        with self._available:
+            entry = self._in_use.pop(id(connection))
+        try:
+            reusable = self.reset(connection)
+        except Exception:
+            reusable = False
+        if not reusable:
+            self._discard(entry)
+            return
+        entry.released = time.monotonic()
+        with self._available:
+            self._idle.append(entry)
+            self._available.notify()
+
+    def _discard(self, entry):
+        if entry.connection is not None:
+            try:
+                self.close(entry.connection)
+            except Exception:
+                pass
+            self._count('closed')
+        with self._available:
+            self._open -= 1
+            self._available.notify()
+
+    def clear(self):
+        """Close the idle connections"""
+        with self._available:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            self._discard(entry)
+
+    def _count(self, name):
+        with self._available:
+            self._counts[name] += 1
+
+    def stats(self):
+        """Current sizes and counters since the pool was created"""
+        with self._available:
+            stats = {
+                'max_size': self.max_size,
+                'open': self._open,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'peak_in_use': self._peak,
+                **self._counts,
+            }
+            stats['mean_wait_ms'] = round(self._wait_ms / stats['waits'], 2) if stats['waits'] else 0.0
+        return stats
+
+    def _log_stats(self):
+        if self._next_stats is None or time.monotonic() < self._next_stats:
+            return
+        self._next_stats = time.monotonic() + self.stats_interval
+        stats = self.stats()
+        logger.info(
+            'Connection pool %s: %d/%d open (%d in use, %d idle, peak %d in use); '
+            '%d opened, %d reused, %d closed (%d expired, %d failed health checks); '
+            '%d waits (mean %.2f ms), %d timeouts',
+            self.name, stats['open'], stats['max_size'], stats['in_use'], stats['idle'], stats['peak_in_use'],
+            stats['opened'], stats['reused'], stats['closed'], stats['expired'], stats['failed_checks'],
+            stats['waits'], stats['mean_wait_ms'], stats['timeouts'], extra={'pool': stats},
+        )
@@ -0,0 +1,150 @@
+"""
+PostgreSQL backend that takes its connections from a per-process pool.
+
+Use ENGINE 'personal_budgeting_api.db.postgresql_pool' with CONN_MAX_AGE
+0: Django then closes the connection at the end of every request, and
+closing hands it back to the pool (personal_budgeting_api.db.pool)
+instead of disconnecting, so the next request, in any thread of the
+process, skips the connection setup. The pool is configured by the
+POOL entry of the database settings:
+
+    'POOL': {
+        'MAX_SIZE': 4,              # connections per process
+        'TIMEOUT': 10,              # seconds to wait for a free one
+        'MAX_LIFETIME': 1800,       # seconds before a connection is replaced
+        'HEALTH_CHECK_AFTER': 30,   # idle seconds before a check on reuse
+        'STATS_INTERVAL': 60,       # seconds between statistics log lines
+    }
+
+Each process gets its own pools, created on first use, so connections
+opened before gunicorn forks are never shared with the workers.
+"""
+import os
+import threading
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.creation import DatabaseCreation as BaseDatabaseCreation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+from personal_budgeting_api.db.pool import ConnectionPool, PoolTimeout
+
+if is_psycopg3:
+    from psycopg.pq import TransactionStatus
+    TRANSACTION_STATUS_IDLE = TransactionStatus.IDLE
+    TRANSACTION_STATUS_UNKNOWN = TransactionStatus.UNKNOWN
+else:
+    from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _check(connection):
+    """Whether an idle connection still answers; leaves it idle again.
+
+    Idle connections are not in autocommit (see _reset), so the query opens
+    a transaction; Django could not set autocommit inside it.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    connection.rollback()
+    return True
+
+
+def _reset(connection):
+    """Return the connection to a fresh session; broken connections are not reused.
+
+    Rolls back whatever the last user left open, then DISCARD ALL drops
+    the session state (SET values, temporary tables, WITH HOLD cursors,
+    prepared statements, advisory locks, LISTEN). DISCARD ALL cannot run
+    in a transaction, hence autocommit; afterwards autocommit is off again,
+    as on a new connection, and Django sets its own on reuse. The pool
+    discards the connection if any of this raises.
+    """
+    if connection.closed:
+        return False
+    status = connection.info.transaction_status
+    if status == TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status != TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute('DISCARD ALL')
+    connection.autocommit = False
+    return True
+
+
+def _close(connection):
+    connection.close()
+
+
+def clear_pools(database=None):
+    """Close the idle pooled connections of this process, to `database` or all"""
+    with _pools_lock:
+        pools = [pool for (pid, params), pool in _pools.items()
+                 if pid == os.getpid() and database in (None, dict(params).get('dbname'))]
+    for pool in pools:
+        pool.clear()
+
+
+def pool_stats():
+    """Statistics of every pool of this process, by pool name"""
+    with _pools_lock:
+        pools = [pool for (pid, params), pool in _pools.items() if pid == os.getpid()]
+    return {pool.name: pool.stats() for pool in pools}
+
+
+class DatabaseCreation(BaseDatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would keep the database from being dropped
+        clear_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params):
+        """This process's pool for `conn_params`, created on first use"""
+        key = (os.getpid(), tuple(sorted((name, str(value)) for name, value in conn_params.items())))
+        pool = _pools.get(key)
+        if pool is None:
+            with _pools_lock:
+                pool = _pools.get(key)
+                if pool is None:
+                    options = self.settings_dict.get('POOL', {})
+                    pool = _pools[key] = ConnectionPool(
+                        f"{self.alias}:{conn_params.get('dbname')}",
+                        check=_check, reset=_reset, close=_close,
+                        max_size=options.get('MAX_SIZE', 4),
+                        timeout=options.get('TIMEOUT', 10),
+                        max_lifetime=options.get('MAX_LIFETIME', 1800),
+                        health_check_after=options.get('HEALTH_CHECK_AFTER', 30),
+                        stats_interval=options.get('STATS_INTERVAL', 60),
+                    )
+        return pool
+
+    def get_new_connection(self, conn_params):
+        opened = []
+
+        def connect():
+            opened.append(True)
+            return super(DatabaseWrapper, self).get_new_connection(conn_params)
+
+        pool = self.get_pool(conn_params)
+        try:
+            connection = pool.acquire(connect)
+        except PoolTimeout as exc:
+            raise self.Database.OperationalError(str(exc)) from exc
+        if not opened:
+            # Set by the stock backend when it connects
+            self.isolation_level = IsolationLevel(
+                self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+            )
+        # The settings may change before the connection is closed (test databases)
+        self.pool = pool
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(self.connection)
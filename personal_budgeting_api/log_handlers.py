@@ -0,0 +1,225 @@
+"""
+Log handlers that keep disk writes off the request path.
+
+QueuedFileHandler is the handler request threads see: emit() copies the
+record onto an in-memory queue and returns. A writer thread takes the
+queued records off in batches, formats them and appends each batch to a
+size-rotated file with a single write and flush, so a slow disk delays
+the log file rather than the response. When the queue is full, records
+are dropped and counted instead of blocking the caller; the count is
+written to the file once there is room again.
+
+Gunicorn workers can share one log file: before each batch the writer
+reopens the file if another worker rotated it away, and rotates on the
+size of the file on disk rather than on its own writes.
+
+JSONFormatter writes one JSON object per line for log shippers, with
+`extra` fields as top-level keys.
+"""
+import copy
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, RotatingFileHandler
+
+# LogRecord attributes that are not `extra` fields
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_STOP = object()
+
+
+def _makedirs(filename):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+
+class FileHandler(logging.FileHandler):
+    """FileHandler that creates the log directory when it opens the file"""
+
+    def _open(self):
+        _makedirs(self.baseFilename)
+        return super()._open()
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, source and extras"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+            'thread': record.thread,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class BatchRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that appends a batch of records with one write"""
+
+    def __init__(self, *args, **kwargs):
+        self._identity = None
+        super().__init__(*args, **kwargs)
+
+    def _open(self):
+        _makedirs(self.baseFilename)
+        stream = super()._open()
+        status = os.fstat(stream.fileno())
+        self._identity = (status.st_dev, status.st_ino)
+        return stream
+
+    def _disk_size(self):
+        """Size of the file at baseFilename, closing the stream if it was rotated away"""
+        try:
+            status = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            status = None
+        if self.stream is not None and (status is None or (status.st_dev, status.st_ino) != self._identity):
+            self.stream.close()
+            self.stream = None
+        return status.st_size if status is not None else 0
+
+    def emit_batch(self, records):
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format(record) + self.terminator)
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+        text = ''.join(lines)
+        self.acquire()
+        try:
+            size = self._disk_size()
+            if self.maxBytes > 0 and size and size + len(text) >= self.maxBytes:
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(text)
+            self.stream.flush()
+        except Exception:
+            self.handleError(records[-1])
+        finally:
+            self.release()
+
+
+class QueuedFileHandler(QueueHandler):
+    """Log to a size-rotated file from a background writer thread.
+
+    The writer thread starts with the first record a process logs, so a
+    handler configured before gunicorn forks its workers gets a writer
+    in each of them.
+    """
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, backup_count=5, encoding='utf-8',
+                 queue_size=10000, batch_size=500):
+        super().__init__(queue.Queue(queue_size))
+        self.writer = BatchRotatingFileHandler(
+            filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding, delay=True
+        )
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._reported = 0
+        self._pid = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        # Records are formatted by the writer, on its thread
+        super().setFormatter(fmt)
+        self.writer.setFormatter(fmt)
+
+    def prepare(self, record):
+        """Copy of `record` that is safe to format later on the writer thread"""
+        record = copy.copy(record)
+        # The arguments may change once the logging call returns
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # handle() already holds the lock; enqueue() may also be called directly
+            self.acquire()
+            try:
+                self.dropped += 1
+            finally:
+                self.release()
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # A queue inherited through fork has no reader in this process
+            self.queue = queue.Queue(self.queue.maxsize)
+            self._thread = threading.Thread(target=self._write, args=(self.queue,), name='log-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _write(self, records):
+        stop = False
+        while not stop:
+            # Block for one record, then take whatever else is already queued
+            taken = [records.get()]
+            while len(taken) < self.batch_size:
+                try:
+                    taken.append(records.get_nowait())
+                except queue.Empty:
+                    break
+            stop = _STOP in taken
+            batch = [record for record in taken if record is not _STOP]
+            if self.dropped > self._reported:
+                batch.append(self._dropped_record())
+            try:
+                self.writer.emit_batch(batch)
+            finally:
+                for _ in taken:
+                    records.task_done()
+
+    def _dropped_record(self):
+        dropped, self._reported = self.dropped - self._reported, self.dropped
+        return logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            '%d log records dropped: the log queue was full', (dropped,), None
+        )
+
+    def flush(self, timeout=5):
+        """Wait up to `timeout` seconds for the queued records to be written"""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        with self.queue.all_tasks_done:
+            self.queue.all_tasks_done.wait_for(
+                lambda: not self.queue.unfinished_tasks or not self._thread.is_alive(), timeout
+            )
+
+    def close(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            try:
+                self.queue.put(_STOP, timeout=5)
+            except queue.Full:
+                pass
+            self._thread.join(timeout=5)
+        self._thread = None
+        self._pid = None
+        self.writer.close()
+        super().close()
@@ -0,0 +1,116 @@
+"""
+Prometheus metrics, served at /api/metrics.
+
+- budgeting_http_request_duration_seconds: latency histogram per URL name
+  (e.g. `reports:monthly-report`), method and status code
+- budgeting_db_queries_per_request: histogram of the SQL queries run by
+  each request, per URL name
+- budgeting_cache_requests_total: cache lookups per cache (`report`, and
+  `conditional_get` for revalidations answered or not with 304) and result
+  (`hit`, `miss`); the hit ratio is `hit / (hit + miss)`
+- budgeting_jwt_authentications_total: JWT authentication outcomes
+
+Under gunicorn each worker process has its own metrics. When the
+PROMETHEUS_MULTIPROC_DIR environment variable is set, prometheus_client
+keeps them in files in that directory and the endpoint sums them over all
+workers (see gunicorn.conf.py).
+
+The endpoint reveals the traffic, latency and error rate of every URL, so
+scrapers must send the METRICS_AUTH_TOKEN bearer token. Without a token
+configured it only answers with DEBUG on or to INTERNAL_IPS.
+"""
+import os
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+UNRESOLVED = '<unresolved>'
+
+REQUEST_LATENCY = Histogram(
+    'budgeting_http_request_duration_seconds',
+    'Time to handle a request, by URL name',
+    ['url_name', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERIES = Histogram(
+    'budgeting_db_queries_per_request',
+    'SQL queries run by a request, by URL name',
+    ['url_name'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+CACHE_REQUESTS = Counter(
+    'budgeting_cache_requests',
+    'Cache lookups, by cache and result',
+    ['cache', 'result'],
+)
+JWT_AUTHENTICATIONS = Counter(
+    'budgeting_jwt_authentications',
+    'JWT authentication attempts, by outcome',
+    ['outcome'],
+)
+
+
+def record_cache_lookup(cache, hit):
+    """Count a lookup in one of the application caches"""
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+class QueryCounter:
+    """Database execute wrapper counting queries"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class PrometheusMetricsMiddleware:
+    """Record the latency and query count of each request by URL name"""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match is not None and match.url_name else UNRESOLVED
+        REQUEST_LATENCY.labels(url_name, request.method, response.status_code).observe(elapsed)
+        DB_QUERIES.labels(url_name).observe(queries.count)
+        return response
+
+
+@require_GET
+def metrics_view(request):
+    """Metrics in the Prometheus text format, summed over the worker processes"""
+    token = settings.METRICS_AUTH_TOKEN
+    if token:
+        if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    elif not settings.DEBUG and request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS:
+        return HttpResponse('Forbidden: set METRICS_AUTH_TOKEN', status=403, content_type='text/plain')
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,141 @@
+"""
+Per-request profiling.
+
+When REQUEST_PROFILING is on, RequestProfilingMiddleware records for each
+request the number and duration of its SQL queries, the time spent
+serializing (DRF serializers and the row serializers of the fast list
+path) and the total time spent in the view, including rendering. The
+numbers are sent back in a `Server-Timing` header, which browser dev
+tools display next to the request:
+
+    Server-Timing: sql;dur=12.4;desc="7 queries", serializer;dur=3.1, view;dur=21.8;desc="ExpenseListView"
+
+Requests slower than REQUEST_PROFILING_SLOW_MS are logged, a sampled
+REQUEST_PROFILING_SAMPLE_RATE of them, to the `personal_budgeting_api.profiling`
+logger with their SQL statements. Streamed bodies (the CSV export) are
+timed up to the first byte only.
+"""
+import logging
+import random
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+from .fast_serializers import RowSerializer
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """Timings collected while one request is handled"""
+
+    def __init__(self, max_statements):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.serializer_ms = 0.0
+        self.statements = []
+        self.max_statements = max_statements
+        self._serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper timing every query"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.queries += 1
+            self.sql_ms += elapsed
+            if len(self.statements) < self.max_statements:
+                self.statements.append((elapsed, sql))
+
+    def server_timing(self, view_ms, view_name):
+        metrics = [
+            f'sql;dur={self.sql_ms:.1f};desc="{self.queries} queries"',
+            f'serializer;dur={self.serializer_ms:.1f}',
+            f'view;dur={view_ms:.1f}' + (f';desc="{view_name}"' if view_name else ''),
+        ]
+        return ', '.join(metrics)
+
+
+def _timed_serialization(function):
+    """Add the run time of `function` to the current profile's serializer time"""
+    def wrapper(*args, **kwargs):
+        profile = _current.get()
+        # Nested serializers run inside their parent's time
+        if profile is None or profile._serializing:
+            return function(*args, **kwargs)
+        profile._serializing = True
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.serializer_ms += (time.perf_counter() - started) * 1000
+            profile._serializing = False
+    wrapper.profiled = True
+    return wrapper
+
+
+def instrument_serializers():
+    """Time `serializer.data` and `RowSerializer.serialize()`; idempotent"""
+    if not getattr(BaseSerializer.data.fget, 'profiled', False):
+        BaseSerializer.data = property(_timed_serialization(BaseSerializer.data.fget))
+    if not getattr(RowSerializer.serialize, 'profiled', False):
+        RowSerializer.serialize = _timed_serialization(RowSerializer.serialize)
+
+
+def view_name(request):
+    """Class or function name of the view that handled the request"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    view = getattr(match.func, 'view_class', match.func)
+    return getattr(view, '__name__', None)
+
+
+class RequestProfilingMiddleware:
+    """Measure SQL, serializer and view time; add Server-Timing and log slow requests"""
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = settings.REQUEST_PROFILING_SLOW_MS
+        self.sample_rate = settings.REQUEST_PROFILING_SAMPLE_RATE
+        self.max_statements = settings.REQUEST_PROFILING_MAX_STATEMENTS
+        instrument_serializers()
+
+    def __call__(self, request):
+        profile = RequestProfile(self.max_statements)
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        view_ms = (time.perf_counter() - started) * 1000
+
+        name = view_name(request)
+        response['Server-Timing'] = profile.server_timing(view_ms, name)
+        if view_ms >= self.slow_ms and random.random() < self.sample_rate:
+            self.log_slow_request(request, response, profile, view_ms, name)
+        return response
+
+    def log_slow_request(self, request, response, profile, view_ms, name):
+        lines = [
+            f"Slow request {request.method} {request.get_full_path()} -> {response.status_code} "
+            f"in {view_ms:.1f} ms (view {name}, {profile.queries} queries in {profile.sql_ms:.1f} ms, "
+            f"serializer {profile.serializer_ms:.1f} ms)"
+        ]
+        lines += [f"  {elapsed:8.2f} ms  {sql}" for elapsed, sql in profile.statements]
+        if profile.queries > len(profile.statements):
+            lines.append(f"  ... {profile.queries - len(profile.statements)} more queries")
+        logger.warning('\n'.join(lines))
@@ -54,6 +54,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'personal_budgeting_api.metrics.PrometheusMetricsMiddleware',
+    'personal_budgeting_api.profiling.RequestProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -101,16 +103,105 @@ DATABASES = {
 
 # PostgreSQL configuration for production
 if config('DB_ENGINE', default='') == 'django.db.backends.postgresql':
+    # DB_POOL hands connections back to a per-process pool at the end of each
+    # request (personal_budgeting_api.db.postgresql_pool); without it they
+    # are closed, or kept by the thread for DB_CONN_MAX_AGE seconds
+    DB_POOL = config('DB_POOL', default=False, cast=bool)
     DATABASES['default'] = {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'personal_budgeting_api.db.postgresql_pool' if DB_POOL else 'django.db.backends.postgresql',
         'NAME': config('DB_NAME'),
         'USER': config('DB_USER'),
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL else config('DB_CONN_MAX_AGE', default=0, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        # Per worker process: workers x MAX_SIZE must stay under max_connections,
+        # and MAX_SIZE at least threads + REPORT_QUERY_THREADS (the report
+        # query threads hold a connection each)
+        'POOL': {
+            'MAX_SIZE': config('DB_POOL_MAX_SIZE', default=4, cast=int),
+            'TIMEOUT': config('DB_POOL_TIMEOUT', default=10, cast=float),
+            'MAX_LIFETIME': config('DB_POOL_MAX_LIFETIME', default=1800, cast=float),
+            'HEALTH_CHECK_AFTER': config('DB_POOL_HEALTH_CHECK_AFTER', default=30, cast=float),
+            'STATS_INTERVAL': config('DB_POOL_STATS_INTERVAL', default=60, cast=float),
+        },
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Redis when REDIS_URL is set (docker-compose starts one), local memory otherwise
+
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Whether every process sees the same cache. Cached reports and conditional
+# GETs are keyed on per-user data versions kept in it (users.versioning); with
+# a per-process local-memory cache a write only moves the version seen by the
+# worker that handled it, so both are off unless the cache is shared, and so
+# is the auth user cache (users.user_cache), whose invalidation has the same
+# reach. Set it with local memory only for a single-process server (runserver).
+CACHE_IS_SHARED = config('CACHE_IS_SHARED', default=bool(REDIS_URL), cast=bool)
+
+# Seconds a report stays cached; 0 disables report caching
+REPORT_CACHE_TIMEOUT = config('REPORT_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Seconds an authenticated user's row stays cached for JWT authentication
+# (users.user_cache) when CACHE_IS_SHARED; 0 loads it from the database on
+# every request
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=60, cast=int)
+
+# Run the independent queries of a report concurrently, on one connection each
+# (reports.engine). The extra queries run on REPORT_QUERY_THREADS threads per
+# process; their connections only pay off when reused, so on by default with
+# DB_POOL only (SQLite serializes the queries anyway).
+REPORT_CONCURRENT_QUERIES = config(
+    'REPORT_CONCURRENT_QUERIES',
+    default=DATABASES['default']['ENGINE'] == 'personal_budgeting_api.db.postgresql_pool',
+    cast=bool
+)
+REPORT_QUERY_THREADS = config('REPORT_QUERY_THREADS', default=2, cast=int)
+
+
+# Password hashing (users.hashers). The profile picks the algorithm new
+# hashes use; the others stay listed so existing hashes still verify, and
+# are rehashed with the profile's algorithm and costs at the next login.
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'users.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'users.hashers.ScryptPasswordHasher',
+    # Needs argon2-cffi
+    'argon2': 'users.hashers.Argon2PasswordHasher',
+}
+PASSWORD_HASHER_PROFILE = config('PASSWORD_HASHER_PROFILE', default='pbkdf2')
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for profile, hasher in PASSWORD_HASHER_PROFILES.items() if profile != PASSWORD_HASHER_PROFILE
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+# Costs of each profile: Django's defaults for PBKDF2, OWASP's minimums for
+# scrypt (N=2^14, r=8, p=5) and Argon2id (t=2, m=19 MiB, p=1)
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=600000, cast=int)
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR', default=2 ** 14, cast=int)
+PASSWORD_SCRYPT_BLOCK_SIZE = config('PASSWORD_SCRYPT_BLOCK_SIZE', default=8, cast=int)
+PASSWORD_SCRYPT_PARALLELISM = config('PASSWORD_SCRYPT_PARALLELISM', default=5, cast=int)
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=19456, cast=int)
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=1, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -159,7 +250,7 @@ AUTH_USER_MODEL = 'users.User'
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -169,11 +260,26 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    # orjson-backed drop-ins for JSONRenderer/JSONParser (same output, stock fallback)
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'personal_budgeting_api.fast_json.FastJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'personal_budgeting_api.fast_json.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
+# Maximum number of expenses accepted by POST /api/expenses/bulk/
+EXPENSE_BULK_MAX_ITEMS = config('EXPENSE_BULK_MAX_ITEMS', default=500, cast=int)
+
+# Rows fetched per round trip while streaming GET /api/expenses/export/
+EXPENSE_EXPORT_CHUNK_SIZE = config('EXPENSE_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Expenses written per transaction by statement imports
+EXPENSE_IMPORT_BATCH_SIZE = config('EXPENSE_IMPORT_BATCH_SIZE', default=1000, cast=int)
+
 # JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=config('JWT_ACCESS_TOKEN_LIFETIME_HOURS', default=1, cast=int)),
@@ -199,6 +305,27 @@ SIMPLE_JWT = {
     'JTI_CLAIM': 'jti',
 }
 
+# Revoked tokens (logout, refresh token rotation) are checked against an
+# in-memory deny-list synced from the database this often (users.revocation)
+TOKEN_REVOCATION_SYNC_SECONDS = config('TOKEN_REVOCATION_SYNC_SECONDS', default=5, cast=float)
+
+# Per-request profiling: Server-Timing headers and a slow request log
+# (personal_budgeting_api.profiling)
+REQUEST_PROFILING = config('REQUEST_PROFILING', default=False, cast=bool)
+# Requests taking at least this long are logged with their SQL
+REQUEST_PROFILING_SLOW_MS = config('REQUEST_PROFILING_SLOW_MS', default=500, cast=float)
+# Fraction of the slow requests that are logged
+REQUEST_PROFILING_SAMPLE_RATE = config('REQUEST_PROFILING_SAMPLE_RATE', default=1.0, cast=float)
+# SQL statements kept per request for the log
+REQUEST_PROFILING_MAX_STATEMENTS = config('REQUEST_PROFILING_MAX_STATEMENTS', default=50, cast=int)
+
+# Prometheus metrics at /api/metrics (personal_budgeting_api.metrics)
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+# Scrapers must send `Authorization: Bearer <token>`; without a token the
+# endpoint only answers with DEBUG on or to INTERNAL_IPS
+METRICS_AUTH_TOKEN = config('METRICS_AUTH_TOKEN', default='')
+INTERNAL_IPS = config('INTERNAL_IPS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+
 # Security settings for production
 if not DEBUG:
     SECURE_BROWSER_XSS_FILTER = True
@@ -206,7 +333,9 @@ if not DEBUG:
     SECURE_HSTS_INCLUDE_SUBDOMAINS = True
     SECURE_HSTS_SECONDS = 31536000
     SECURE_REDIRECT_EXEMPT = []
-    SECURE_SSL_REDIRECT = True
+    # Off when a proxy in front already redirects to HTTPS, or for local
+    # benchmarks over plain HTTP (benchmarks/db_pool.py)
+    SECURE_SSL_REDIRECT = config('SECURE_SSL_REDIRECT', default=True, cast=bool)
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
     X_FRAME_OPTIONS = 'DENY'
@@ -222,10 +351,25 @@ CORS_ALLOWED_ORIGINS = [
 CORS_ALLOW_CREDENTIALS = True
 
 # Logging configuration
-import os
-logs_dir = BASE_DIR / 'logs'
-if not os.path.exists(logs_dir):
-    os.makedirs(logs_dir)
+# LOG_QUEUED writes logs/django.log from a background thread, in batches,
+# with size-based rotation (personal_budgeting_api.log_handlers)
+LOG_QUEUED = config('LOG_QUEUED', default=False, cast=bool)
+# 'verbose' text lines or 'json' objects, one per line
+LOG_FORMAT = config('LOG_FORMAT', default='json' if LOG_QUEUED else 'verbose')
+LOG_MAX_BYTES = config('LOG_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+LOG_BACKUP_COUNT = config('LOG_BACKUP_COUNT', default=5, cast=int)
+
+if LOG_QUEUED:
+    log_file_handler = {
+        'class': 'personal_budgeting_api.log_handlers.QueuedFileHandler',
+        'max_bytes': LOG_MAX_BYTES,
+        'backup_count': LOG_BACKUP_COUNT,
+    }
+else:
+    log_file_handler = {
+        'class': 'personal_budgeting_api.log_handlers.FileHandler',
+        'delay': True,
+    }
 
 LOGGING = {
     'version': 1,
@@ -239,19 +383,29 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'personal_budgeting_api.log_handlers.JSONFormatter',
+        },
     },
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
-            'formatter': 'verbose',
+            'formatter': LOG_FORMAT,
+            **log_file_handler,
         },
         'console': {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
+        'slow_requests': {
+            'level': 'WARNING',
+            'class': 'personal_budgeting_api.log_handlers.FileHandler',
+            'filename': BASE_DIR / 'logs' / 'slow_requests.log',
+            'delay': True,
+            'formatter': 'verbose',
+        },
     },
     'root': {
         'handlers': ['console', 'file'],
@@ -263,5 +417,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'personal_budgeting_api.profiling': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
@@ -0,0 +1,105 @@
+"""
+Sparse fieldsets: `?fields=a,b` keeps only the listed fields of a response,
+`?omit=c,d` drops the listed ones.
+
+SparseFieldsSerializerMixin prunes the serializer. SparseFieldsViewMixin
+prunes the matching query work: relations are only joined, and columns
+only loaded, for the fields that are kept. Serializer fields that do not
+map onto model columns (properties, methods) declare the columns they read
+in `Meta.field_sources`.
+"""
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def _names(request, param):
+    value = request.query_params.get(param, '') if request is not None else ''
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def requested_fields(request, serializer_fields):
+    """Names of the readable fields to keep, or None to keep them all"""
+    fields, omit = _names(request, FIELDS_PARAM), _names(request, OMIT_PARAM)
+    if not fields and not omit:
+        return None
+
+    readable = [name for name, field in serializer_fields.items() if not field.write_only]
+    unknown = [name for name in fields + omit if name not in readable]
+    if unknown:
+        raise ValidationError({
+            FIELDS_PARAM if unknown[0] in fields else OMIT_PARAM: [f"Unknown field(s): {', '.join(unknown)}"]
+        })
+    keep = fields or readable
+    return [name for name in keep if name not in omit]
+
+
+class SparseFieldsSerializerMixin:
+    """Drop fields not selected by the request's `fields`/`omit` parameters"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        keep = requested_fields(self.context.get('request'), self.fields)
+        if keep is not None:
+            for name, field in list(self.fields.items()):
+                if not field.write_only and name not in keep:
+                    self.fields.pop(name)
+
+
+def field_columns(serializer_class, name, field):
+    """ORM lookups a serializer field reads, or None if unknown"""
+    declared = getattr(serializer_class.Meta, 'field_sources', {})
+    if name in declared:
+        return list(declared[name])
+    if field.source == '*':
+        return None
+    return [field.source.replace('.', '__')]
+
+
+def prune_queryset(queryset, serializer_class, names):
+    """Join and load only what the serializer fields `names` read"""
+    serializer_fields = serializer_class().fields
+    opts = queryset.model._meta
+
+    related = set()
+    columns = {opts.pk.name}
+    for name in names:
+        lookups = field_columns(serializer_class, name, serializer_fields[name])
+        if lookups is None:
+            columns = None
+            continue
+        for lookup in lookups:
+            parts = lookup.split('__')
+            if len(parts) > 1:
+                related.add('__'.join(parts[:-1]))
+            if columns is not None:
+                columns.add(parts[0])
+                columns.add(lookup)
+
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*related)
+    if columns is None:
+        return queryset
+
+    # Ordering columns are read back by keyset pagination
+    for name in list(queryset.query.order_by) + list(opts.ordering):
+        name = name.lstrip('-')
+        if name not in queryset.query.annotations:
+            columns.add(name)
+    return queryset.only(*columns)
+
+
+class SparseFieldsViewMixin:
+    """Trim the GET queryset to the fields the request asked for"""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method != 'GET':
+            return queryset
+        serializer_class = self.get_serializer_class()
+        names = requested_fields(self.request, serializer_class().fields)
+        if names is None:
+            return queryset
+        return prune_queryset(queryset, serializer_class, names)
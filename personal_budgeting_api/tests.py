@@ -0,0 +1,527 @@
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock, skipUnless
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from budgets.models import Budget
+from expenses.models import Expense
+from . import fast_json
+from .db.pool import ConnectionPool, PoolTimeout
+from .db.postgresql_pool.base import TRANSACTION_STATUS_IDLE, _check, _close, _reset
+from .fast_json import FastJSONParser, FastJSONRenderer
+from .log_handlers import JSONFormatter, QueuedFileHandler
+
+User = get_user_model()
+
+
+class RequestProfilingTest(APITestCase):
+    """Test cases for the request profiling middleware"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            name='Groceries',
+            total_amount=Decimal('1000.00'),
+            category='Food'
+        )
+        Expense.objects.create(
+            user=self.user, budget=self.budget, description='Lunch',
+            amount=Decimal('12.00'), date=date(2025, 1, 15), category='Food'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('expenses:expense-list')
+    
+    def test_profiling_disabled_by_default(self):
+        """Test that no Server-Timing header is sent unless enabled"""
+        response = self.client.get(self.url)
+        self.assertNotIn('Server-Timing', response)
+    
+    @override_settings(REQUEST_PROFILING=True)
+    def test_server_timing_header(self):
+        """Test that SQL, serializer and view timings are reported"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        
+        timing = response['Server-Timing']
+        self.assertRegex(timing, rf'^sql;dur=[\d.]+;desc="{len(queries)} queries", serializer;dur=[\d.]+, ')
+        self.assertRegex(timing, r'view;dur=[\d.]+;desc="ExpenseListView"$')
+    
+    @override_settings(REQUEST_PROFILING=True, REQUEST_PROFILING_SLOW_MS=0)
+    def test_slow_requests_logged_with_sql(self):
+        """Test that slow requests are logged with their SQL"""
+        with self.assertLogs('personal_budgeting_api.profiling', 'WARNING') as logs:
+            self.client.get(reverse('reports:monthly-report'), {'month': 1, 'year': 2025})
+        
+        self.assertIn('Slow request GET /api/reports/monthly/?month=1&year=2025 -> 200', logs.output[0])
+        self.assertIn('view MonthlyReportView', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+    
+    @override_settings(REQUEST_PROFILING=True, REQUEST_PROFILING_SLOW_MS=0, REQUEST_PROFILING_SAMPLE_RATE=0)
+    def test_slow_request_sampling(self):
+        """Test that only the sampled fraction of slow requests is logged"""
+        with self.assertNoLogs('personal_budgeting_api.profiling', 'WARNING'):
+            response = self.client.get(self.url)
+        self.assertIn('Server-Timing', response)
+
+
+class MetricsEndpointTest(APITestCase):
+    """Test cases for the Prometheus metrics endpoint"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.url = reverse('metrics')
+    
+    def _sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+    
+    def _get_report(self, **headers):
+        return self.client.get(reverse('reports:monthly-report'), {'month': 1, 'year': 2025}, **headers)
+    
+    def test_request_latency_and_queries_by_url_name(self):
+        """Test that latency and query count are recorded per URL name"""
+        labels = {'url_name': 'reports:monthly-report', 'method': 'GET', 'status': '200'}
+        before = self._sample('budgeting_http_request_duration_seconds_count', **labels)
+        queries_before = self._sample('budgeting_db_queries_per_request_sum', url_name='reports:monthly-report')
+        
+        with CaptureQueriesContext(connection) as queries:
+            self._get_report(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        
+        self.assertEqual(self._sample('budgeting_http_request_duration_seconds_count', **labels), before + 1)
+        self.assertEqual(
+            self._sample('budgeting_db_queries_per_request_sum', url_name='reports:monthly-report'),
+            queries_before + len(queries)
+        )
+    
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_cache_and_jwt_outcomes(self):
+        """Test that report cache lookups and JWT outcomes are counted"""
+        hits = self._sample('budgeting_cache_requests_total', cache='report', result='hit')
+        misses = self._sample('budgeting_cache_requests_total', cache='report', result='miss')
+        successes = self._sample('budgeting_jwt_authentications_total', outcome='success')
+        invalid = self._sample('budgeting_jwt_authentications_total', outcome='invalid_token')
+        
+        self._get_report(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self._get_report(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = self._get_report(HTTP_AUTHORIZATION='Bearer not-a-token')
+        
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self._sample('budgeting_cache_requests_total', cache='report', result='miss'), misses + 1)
+        self.assertEqual(self._sample('budgeting_cache_requests_total', cache='report', result='hit'), hits + 1)
+        self.assertEqual(self._sample('budgeting_jwt_authentications_total', outcome='success'), successes + 2)
+        self.assertEqual(self._sample('budgeting_jwt_authentications_total', outcome='invalid_token'), invalid + 1)
+    
+    def test_metrics_endpoint(self):
+        """Test that metrics are served in the Prometheus text format"""
+        self._get_report(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        with override_settings(METRICS_AUTH_TOKEN='scrape-secret'):
+            response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer scrape-secret')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('budgeting_http_request_duration_seconds_bucket{', body)
+        self.assertIn('url_name="reports:monthly-report"', body)
+        self.assertIn('budgeting_jwt_authentications_total{outcome="success"}', body)
+    
+    @override_settings(METRICS_AUTH_TOKEN='scrape-secret')
+    def test_metrics_endpoint_token(self):
+        """Test that a configured scrape token is required"""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_metrics_endpoint_closed_without_token(self):
+        """Test that without a scrape token only DEBUG or internal IPs get metrics"""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+        with override_settings(INTERNAL_IPS=['127.0.0.1']):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+            response = self.client.get(self.url, REMOTE_ADDR='203.0.113.7')
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+
+class FastJSONTest(APITestCase):
+    """Test cases for the orjson-backed renderer and parser"""
+    
+    def setUp(self):
+        self.data = {
+            'amount': Decimal('1234.50'),
+            'rate': Decimal('0.1'),
+            'day': date(2025, 1, 15),
+            'created_at': datetime(2025, 1, 15, 10, 30, 5, 123456, tzinfo=dt_timezone.utc),
+            'local': datetime(2025, 1, 15, 10, 30),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'label': gettext_lazy('Monthly'),
+            'text': 'café \u2028 line',
+            'nested': [{1: None, 'ok': True, 'ratio': 33.333333333333336}],
+        }
+    
+    def test_renders_like_json_renderer(self):
+        """Test that the output is byte-identical to DRF's JSONRenderer"""
+        content = FastJSONRenderer().render(self.data)
+        self.assertEqual(content, JSONRenderer().render(self.data))
+        self.assertIn(b'"amount":1234.5,', content)
+        self.assertIn(b'"created_at":"2025-01-15T10:30:05.123456Z"', content)
+        self.assertIn(b'\\u2028', content)
+    
+    def test_amounts_render_like_json_renderer(self):
+        """Test that 2-decimal amounts up to 14 digits render byte-identically, with their exact value"""
+        rng = random.Random(0)
+        amounts = [Decimal('0.01'), Decimal('0.10'), Decimal('999999999999.99'), Decimal('-0.30')]
+        amounts += [Decimal(rng.randrange(-10**14 + 1, 10**14)).scaleb(-2) for _ in range(10000)]
+        # Sums of expense amounts (up to 10 digits), as reports compute them
+        expenses = [Decimal(rng.randrange(1, 10**10)).scaleb(-2) for _ in range(10000)]
+        amounts += expenses + [sum(expenses[n:n + 50], Decimal('0')) for n in range(0, 10000, 50)]
+        
+        content = FastJSONRenderer().render({'amounts': amounts})
+        self.assertEqual(content, JSONRenderer().render({'amounts': amounts}))
+        self.assertEqual(json.loads(content, parse_float=Decimal)['amounts'], amounts)
+    
+    def test_fallbacks(self):
+        """Test that indented output and a missing orjson use the stock renderer"""
+        indented = FastJSONRenderer().render(self.data, 'application/json; indent=4')
+        self.assertEqual(indented, JSONRenderer().render(self.data, 'application/json; indent=4'))
+        
+        with mock.patch.object(fast_json, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+            self.assertEqual(FastJSONParser().parse(BytesIO(b'{"a": [1, 2.5]}')), {'a': [1, 2.5]})
+    
+    def test_parser(self):
+        """Test parsing and parse errors"""
+        self.assertEqual(
+            FastJSONParser().parse(BytesIO('{"description": "café", "amount": 12.5}'.encode())),
+            {'description': 'café', 'amount': 12.5}
+        )
+        for body in (b'{"amount": ', b'{"amount": NaN}', b''):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(BytesIO(body))
+    
+    def test_report_amounts_rendered_from_decimals(self):
+        """Test that report amounts keep their exact value up to rendering"""
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        budget = Budget.objects.create(user=user, name='Food', total_amount=Decimal('500.10'), category='Food')
+        Expense.objects.create(
+            user=user, budget=budget, description='Groceries',
+            amount=Decimal('0.10'), date=date(2025, 1, 15), category='Food'
+        )
+        Expense.objects.create(
+            user=user, budget=budget, description='Snacks',
+            amount=Decimal('0.20'), date=date(2025, 1, 16), category='Food'
+        )
+        self.client.force_authenticate(user=user)
+        
+        response = self.client.get(reverse('reports:monthly-report'), {'month': 1, 'year': 2025})
+        
+        self.assertEqual(response.data['summary']['total_expenses'], Decimal('0.30'))
+        self.assertIn(b'"total_expenses":0.3,', response.content)
+        self.assertIn(b'"remaining_budget":499.8,', response.content)
+
+
+class QueuedLoggingTest(TestCase):
+    """Test cases for the queued, batched log file handler"""
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.filename = os.path.join(self.directory.name, 'logs', 'app.log')
+        self.logger = logging.getLogger('personal_budgeting_api.tests.queued')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+    
+    def make_handler(self, **kwargs):
+        handler = QueuedFileHandler(self.filename, **kwargs)
+        handler.setFormatter(JSONFormatter())
+        self.logger.addHandler(handler)
+        self.addCleanup(handler.close)
+        self.addCleanup(self.logger.removeHandler, handler)
+        return handler
+    
+    def read_lines(self, filename=None):
+        with open(filename or self.filename, encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+    
+    def test_records_written_as_json_lines(self):
+        """Test that records reach the file, creating its directory, as JSON with extras"""
+        handler = self.make_handler()
+        items = ['Lunch']
+        self.logger.info('Created %s', items, extra={'user_id': 7})
+        items.append('Dinner')
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            self.logger.exception('Failed')
+        handler.flush()
+        
+        created, failed = self.read_lines()
+        self.assertEqual(created['message'], "Created ['Lunch']")
+        self.assertEqual(created['level'], 'INFO')
+        self.assertEqual(created['logger'], 'personal_budgeting_api.tests.queued')
+        self.assertEqual(created['user_id'], 7)
+        self.assertTrue(created['time'].endswith('Z'))
+        self.assertIn('ZeroDivisionError', failed['exception'])
+    
+    def test_size_based_rotation(self):
+        """Test that the file is rotated once it reaches max_bytes"""
+        handler = self.make_handler(max_bytes=2000, backup_count=2)
+        for n in range(60):
+            self.logger.info('Expense %d imported', n)
+            handler.flush()
+        
+        self.assertTrue(os.path.exists(self.filename + '.1'))
+        self.assertTrue(os.path.exists(self.filename + '.2'))
+        self.assertFalse(os.path.exists(self.filename + '.3'))
+        self.assertLess(os.path.getsize(self.filename), 2000)
+        self.assertEqual(self.read_lines()[-1]['message'], 'Expense 59 imported')
+    
+    def test_full_queue_drops_records_without_blocking(self):
+        """Test that records are dropped and counted while the writer is stuck"""
+        handler = self.make_handler(queue_size=1)
+        release, writing = threading.Event(), threading.Event()
+        emit_batch = handler.writer.emit_batch
+        
+        def slow_emit_batch(records):
+            writing.set()
+            release.wait(5)
+            emit_batch(records)
+        
+        with mock.patch.object(handler.writer, 'emit_batch', slow_emit_batch):
+            self.logger.info('first')
+            writing.wait(5)
+            for n in range(5):
+                self.logger.info('queued %d', n)
+            self.assertEqual(handler.dropped, 4)
+            release.set()
+            handler.flush()
+            self.logger.info('after')
+            handler.flush()
+        
+        messages = [line['message'] for line in self.read_lines()]
+        self.assertEqual(messages[:2], ['first', 'queued 0'])
+        self.assertIn('4 log records dropped: the log queue was full', messages)
+        self.assertEqual(messages[-1], 'after')
+    
+    def test_drops_counted_across_threads(self):
+        """Test that records dropped by several threads at once are all counted"""
+        handler = self.make_handler(queue_size=1)
+        release, writing = threading.Event(), threading.Event()
+        emit_batch = handler.writer.emit_batch
+        
+        def slow_emit_batch(records):
+            writing.set()
+            release.wait(5)
+            emit_batch(records)
+        
+        def enqueue_many():
+            for n in range(500):
+                handler.enqueue(handler.prepare(self.logger.makeRecord(
+                    self.logger.name, logging.INFO, __file__, 0, 'queued %d', (n,), None
+                )))
+        
+        with mock.patch.object(handler.writer, 'emit_batch', slow_emit_batch):
+            self.logger.info('first')
+            writing.wait(5)
+            threads = [threading.Thread(target=enqueue_many) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            release.set()
+            handler.flush()
+        
+        self.assertEqual(handler.dropped, 8 * 500 - 1)
+    
+    def test_reopens_file_rotated_by_another_process(self):
+        """Test that the writer follows the file after another worker rotates it"""
+        handler = self.make_handler()
+        self.logger.info('before')
+        handler.flush()
+        os.rename(self.filename, self.filename + '.1')
+        self.logger.info('after')
+        handler.flush()
+        
+        self.assertEqual([line['message'] for line in self.read_lines()], ['after'])
+        self.assertEqual([line['message'] for line in self.read_lines(self.filename + '.1')], ['before'])
+
+
+class FakeConnection:
+    """Stands in for a database connection in the pool tests"""
+    
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+        self.dirty = False
+    
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    """Test cases for the per-process database connection pool"""
+    
+    def make_pool(self, **kwargs):
+        options = {'max_size': 2, 'timeout': 1, 'stats_interval': 0, **kwargs}
+        return ConnectionPool(
+            'test',
+            check=lambda connection: connection.healthy,
+            reset=lambda connection: not connection.dirty,
+            close=FakeConnection.close,
+            **options
+        )
+    
+    def test_released_connection_reused(self):
+        """Test that a released connection is handed out again"""
+        pool = self.make_pool()
+        connection = pool.acquire(FakeConnection)
+        pool.release(connection)
+        
+        self.assertIs(pool.acquire(FakeConnection), connection)
+        stats = pool.stats()
+        self.assertEqual((stats['opened'], stats['reused'], stats['in_use'], stats['open']), (1, 1, 1, 1))
+    
+    def test_size_limit_times_out(self):
+        """Test that callers wait for a free connection, then time out"""
+        pool = self.make_pool(max_size=1, timeout=0.05)
+        pool.acquire(FakeConnection)
+        
+        with self.assertLogs('personal_budgeting_api.db.pool', 'WARNING'):
+            with self.assertRaises(PoolTimeout):
+                pool.acquire(FakeConnection)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+    
+    def test_waiting_caller_gets_released_connection(self):
+        """Test that a waiting caller takes the next released connection"""
+        pool = self.make_pool(max_size=1)
+        connection = pool.acquire(FakeConnection)
+        timer = threading.Timer(0.05, pool.release, [connection])
+        timer.start()
+        self.addCleanup(timer.cancel)
+        
+        self.assertIs(pool.acquire(FakeConnection), connection)
+        self.assertEqual(pool.stats()['waits'], 1)
+    
+    def test_failed_health_check_replaces_connection(self):
+        """Test that an idle connection failing its check is closed and replaced"""
+        pool = self.make_pool(health_check_after=0)
+        connection = pool.acquire(FakeConnection)
+        pool.release(connection)
+        connection.healthy = False
+        
+        replacement = pool.acquire(FakeConnection)
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        stats = pool.stats()
+        self.assertEqual((stats['failed_checks'], stats['closed'], stats['open']), (1, 1, 1))
+    
+    def test_expired_and_unresettable_connections_closed(self):
+        """Test that connections past max_lifetime or failing reset are not reused"""
+        pool = self.make_pool(max_lifetime=0.01)
+        old = pool.acquire(FakeConnection)
+        pool.release(old)
+        time.sleep(0.02)
+        self.assertIsNot(pool.acquire(FakeConnection), old)
+        self.assertTrue(old.closed)
+        
+        pool = self.make_pool()
+        dirty = pool.acquire(FakeConnection)
+        dirty.dirty = True
+        pool.release(dirty)
+        self.assertTrue(dirty.closed)
+        self.assertEqual(pool.stats()['open'], 0)
+    
+    def test_stats_logged(self):
+        """Test that pool statistics are logged every stats_interval"""
+        pool = self.make_pool(stats_interval=0.01)
+        time.sleep(0.02)
+        with self.assertLogs('personal_budgeting_api.db.pool', 'INFO') as logs:
+            pool.acquire(FakeConnection)
+        
+        self.assertIn('Connection pool test: 1/2 open (1 in use, 0 idle, peak 1 in use); 1 opened', logs.output[0])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Needs PostgreSQL')
+class PooledConnectionResetTest(TestCase):
+    """Test cases for resetting and checking PostgreSQL connections in the pool"""
+    
+    def connect(self):
+        raw = connection.Database.connect(**connection.get_connection_params())
+        self.addCleanup(raw.close)
+        return raw
+    
+    def test_reset_discards_session_state(self):
+        """Test that the transaction, settings, temporary tables and cursors are gone"""
+        raw = self.connect()
+        raw.autocommit = True
+        with raw.cursor() as cursor:
+            cursor.execute("SET statement_timeout = '1234ms'")
+            cursor.execute('CREATE TEMPORARY TABLE leftover (id integer)')
+            cursor.execute('DECLARE leftover_cursor CURSOR WITH HOLD FOR SELECT 1')
+        raw.autocommit = False
+        with raw.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        
+        self.assertTrue(_reset(raw))
+        
+        self.assertEqual(raw.info.transaction_status, TRANSACTION_STATUS_IDLE)
+        with raw.cursor() as cursor:
+            cursor.execute('SHOW statement_timeout')
+            self.assertEqual(cursor.fetchone()[0], '0')
+            cursor.execute("SELECT to_regclass('pg_temp.leftover')")
+            self.assertIsNone(cursor.fetchone()[0])
+            cursor.execute('SELECT count(*) FROM pg_cursors')
+            self.assertEqual(cursor.fetchone()[0], 0)
+    
+    def test_closed_connection_not_reused(self):
+        """Test that a closed connection is not handed back out"""
+        raw = self.connect()
+        raw.close()
+        
+        self.assertFalse(_reset(raw))
+    
+    def test_reuse_after_health_check(self):
+        """Test that a connection checked before reuse is idle and takes Django's autocommit"""
+        pool = ConnectionPool('test', check=_check, reset=_reset, close=_close,
+                              max_size=1, health_check_after=0, stats_interval=0)
+        self.addCleanup(pool.clear)
+        raw = pool.acquire(self.connect)
+        pool.release(raw)
+        
+        self.assertIs(pool.acquire(self.connect), raw)
+        self.assertEqual((pool.stats()['reused'], pool.stats()['failed_checks']), (1, 0))
+        self.assertEqual(raw.info.transaction_status, TRANSACTION_STATUS_IDLE)
+        # What DatabaseWrapper.connect() does next
+        raw.autocommit = True
+        with raw.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            self.assertEqual(cursor.fetchone()[0], 1)
@@ -1,3 +1,16 @@
 from django.contrib import admin
+from .models import DailyExpenseRollup
 
-# Register your models here.
+
+@admin.register(DailyExpenseRollup)
+class DailyExpenseRollupAdmin(admin.ModelAdmin):
+    """Admin interface for DailyExpenseRollup model"""
+    list_display = ['date', 'user', 'budget', 'category', 'total', 'count']
+    list_filter = ['date', 'category']
+    search_fields = ['user__username', 'budget__name', 'category']
+    ordering = ['-date']
+    readonly_fields = ['user', 'budget', 'date', 'category', 'total', 'count']
+    
+    def get_queryset(self, request):
+        """Optimize queryset with select_related"""
+        return super().get_queryset(request).select_related('user', 'budget')
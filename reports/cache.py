@@ -0,0 +1,61 @@
+"""
+Caching of report payloads.
+
+Reports are stored under the owner's data version (see users.versioning),
+which every Expense or Budget write bumps, so a cached report is never
+served once the data behind it has changed. Versions are only reliable
+when every process shares the cache, so reports are not cached otherwise
+(settings.CACHE_IS_SHARED).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from personal_budgeting_api.metrics import record_cache_lookup
+from users.versioning import get_data_version
+
+HITS_KEY = 'reports:cache:hits'
+MISSES_KEY = 'reports:cache:misses'
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def report_cache_key(user_id, name, start_date, end_date):
+    """Cache key of one report for one period under the user's data version"""
+    version = get_data_version(user_id)
+    return f'reports:{user_id}:{version}:{name}:{start_date}:{end_date}'
+
+
+def get_or_build_report(user, name, start_date, end_date, build):
+    """Return `(report, hit)`, calling `build()` and caching its result on a miss"""
+    timeout = settings.REPORT_CACHE_TIMEOUT
+    if not timeout or not settings.CACHE_IS_SHARED:
+        return build(), False
+    
+    key = report_cache_key(user.pk, name, start_date, end_date)
+    report = cache.get(key)
+    record_cache_lookup('report', report is not None)
+    if report is not None:
+        _incr(HITS_KEY)
+        return report, True
+    
+    _incr(MISSES_KEY)
+    report = build()
+    cache.set(key, report, timeout)
+    return report, False
+
+
+def cache_stats():
+    """Report cache hit/miss counters"""
+    counts = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = counts.get(HITS_KEY, 0)
+    misses = counts.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+    }
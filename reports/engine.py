@@ -0,0 +1,213 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from decimal import Decimal
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+from django.db.models import Sum, Q
+from django.db.models.functions import Coalesce
+from budgets.models import Budget
+from .models import DailyExpenseRollup
+
+
+ZERO = Decimal('0')
+
+# (pid, executor) of the threads that run concurrent report queries
+_executor = (None, None)
+_executor_lock = threading.Lock()
+
+
+def query_executor():
+    """This process's report query threads, started on first use.
+
+    The threads outlive the requests, so each keeps its database connection
+    between reports (per CONN_MAX_AGE, or in the pool with DB_POOL) instead
+    of connecting for every query. Keyed on the pid: threads do not survive
+    a fork.
+    """
+    global _executor
+    pid, executor = _executor
+    if pid != os.getpid():
+        with _executor_lock:
+            pid, executor = _executor
+            if pid != os.getpid():
+                executor = ThreadPoolExecutor(settings.REPORT_QUERY_THREADS, thread_name_prefix='report-query')
+                _executor = (os.getpid(), executor)
+    return executor
+
+
+def shutdown_query_executor():
+    """Stop this process's report query threads and close their connections"""
+    global _executor
+    with _executor_lock:
+        (pid, executor), _executor = _executor, (None, None)
+    if pid != os.getpid():
+        return
+    # One task per thread: each waits for the others, so every thread gets one
+    barrier = threading.Barrier(settings.REPORT_QUERY_THREADS)
+
+    def close():
+        barrier.wait()
+        connections.close_all()
+
+    for _ in range(settings.REPORT_QUERY_THREADS):
+        executor.submit(close)
+    executor.shutdown()
+
+
+def run_concurrently(first, *queries):
+    """Results of the callables, the first on the calling thread and the
+    others on the report query threads.
+
+    Django connections are per thread, so the queries run in parallel on
+    the threads' own connections. The execute wrappers (metrics, profiling)
+    of the calling connection apply to every query.
+    """
+    wrappers = tuple(connection.execute_wrappers)
+
+    def run(query):
+        try:
+            with ExitStack() as stack:
+                for wrapper in wrappers:
+                    stack.enter_context(connection.execute_wrapper(wrapper))
+                return query()
+        finally:
+            # The threads never see request_finished: close per CONN_MAX_AGE,
+            # or hand the connection back to the pool
+            close_old_connections()
+
+    futures = [query_executor().submit(run, query) for query in queries]
+    return [first(), *(future.result() for future in futures)]
+
+
+class ReportEngine:
+    """Compute budget-vs-actual figures for one user over a date range.
+
+    Every breakdown is a single grouped query over the daily rollups, so
+    the number of queries a report costs does not depend on how many
+    budgets or expenses the user has, and the rows scanned grow with the
+    days in the period rather than with the expense count.
+    """
+
+    def __init__(self, user, start_date, end_date):
+        self.user = user
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def rollups(self):
+        """User's daily expense rollups inside the report period"""
+        return DailyExpenseRollup.objects.filter(
+            user=self.user,
+            date__range=[self.start_date, self.end_date]
+        )
+
+    def expenses_by_category(self):
+        """Expense totals per category, largest first (1 query)"""
+        return list(
+            self.rollups().values('category').annotate(
+                total=Sum('total')
+            ).order_by('-total')
+        )
+
+    def daily_expenses(self):
+        """Expense totals per day, oldest first (1 query)"""
+        return list(
+            self.rollups().values('date').annotate(
+                total=Sum('total')
+            ).order_by('date')
+        )
+
+    def total_budget(self):
+        """Sum of all the user's budget amounts (1 query)"""
+        return Budget.objects.filter(user=self.user).aggregate(
+            total=Sum('total_amount')
+        )['total'] or ZERO
+
+    def budget_actuals(self):
+        """(name, category, budgeted, actual) for every budget (1 query)"""
+        period_filter = Q(
+            expense_rollups__user=self.user,
+            expense_rollups__date__range=[self.start_date, self.end_date]
+        )
+        return list(
+            Budget.objects.filter(user=self.user).annotate(
+                actual=Coalesce(Sum('expense_rollups__total', filter=period_filter), ZERO)
+            ).values_list('name', 'category', 'total_amount', 'actual')
+        )
+
+    @staticmethod
+    def budget_vs_actual(budget_actuals):
+        """Shape budget actuals into the report's budget-vs-actual rows.
+
+        Amounts stay Decimal; the JSON renderer writes them as numbers.
+        """
+        rows = []
+        for name, category, total_amount, actual_amount in budget_actuals:
+            rows.append({
+                'budget_name': name,
+                'category': category,
+                'budgeted_amount': total_amount,
+                'actual_amount': actual_amount,
+                'remaining_amount': total_amount - actual_amount,
+                'spent_percentage': float((actual_amount / total_amount) * 100) if total_amount > 0 else 0
+            })
+        return rows
+
+    @staticmethod
+    def summary(total_budget, total_expenses):
+        """Headline figures shared by every report"""
+        return {
+            'total_budget': total_budget,
+            'total_expenses': total_expenses,
+            'remaining_budget': total_budget - total_expenses,
+            'spent_percentage': float((total_expenses / total_budget) * 100) if total_budget > 0 else 0
+        }
+
+    def monthly(self):
+        """Sections of the monthly report (2 queries)"""
+        return self.shape_monthly(self.expenses_by_category(), self.budget_actuals())
+
+    def concurrent_monthly(self):
+        """monthly(), with its 2 queries run concurrently"""
+        return self.shape_monthly(*run_concurrently(self.expenses_by_category, self.budget_actuals))
+
+    def shape_monthly(self, expenses_by_category, budget_actuals):
+        """Monthly report sections from the results of its queries"""
+        total_expenses = sum((row['total'] for row in expenses_by_category), ZERO)
+        total_budget = sum((row[2] for row in budget_actuals), ZERO)
+        return {
+            'summary': self.summary(total_budget, total_expenses),
+            'expenses_by_category': expenses_by_category,
+            'budget_vs_actual': self.budget_vs_actual(budget_actuals),
+        }
+
+    def weekly(self):
+        """Sections of the weekly report (3 queries)"""
+        return self.shape_weekly(self.daily_expenses(), self.expenses_by_category(), self.total_budget())
+
+    def concurrent_weekly(self):
+        """weekly(), with its 3 queries run concurrently"""
+        return self.shape_weekly(*run_concurrently(
+            self.daily_expenses, self.expenses_by_category, self.total_budget
+        ))
+
+    def shape_weekly(self, daily_expenses, expenses_by_category, total_budget):
+        """Weekly report sections from the results of its queries"""
+        total_expenses = sum((row['total'] for row in daily_expenses), ZERO)
+        return {
+            'summary': self.summary(total_budget, total_expenses),
+            'daily_expenses': daily_expenses,
+            'expenses_by_category': expenses_by_category,
+        }
+
+    def build(self, name):
+        """The `name` report ('monthly' or 'weekly'), concurrently when allowed.
+
+        Concurrent queries run on other database connections, which cannot
+        see the writes of an open transaction, so inside one the queries run
+        one after another on the current connection.
+        """
+        if not settings.REPORT_CONCURRENT_QUERIES or connection.in_atomic_block:
+            return getattr(self, name)()
+        return getattr(self, f'concurrent_{name}')()
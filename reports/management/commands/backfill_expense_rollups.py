@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from reports.models import DailyExpenseRollup
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Rebuild the daily expense rollups that feed the reports"""
+    help = 'Recompute DailyExpenseRollup rows from the expense table in batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Only rebuild rollups for this username'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows read and inserted per batch (default: 1000)'
+        )
+    
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be a positive integer')
+        
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"User '{options['user']}' does not exist")
+        
+        user_ids = users.values_list('pk', flat=True).iterator(chunk_size=options['batch_size'])
+        created = DailyExpenseRollup.objects.rebuild(user_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {created} rollup row(s)"))
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    Expense = apps.get_model('expenses', 'Expense')
+    DailyExpenseRollup = apps.get_model('reports', 'DailyExpenseRollup')
+    rows = Expense.objects.order_by().values(
+        'user_id', 'budget_id', 'date', 'category'
+    ).annotate(total=Sum('amount'), count=Count('pk'))
+
+    batch = []
+    for row in rows.iterator(chunk_size=1000):
+        batch.append(DailyExpenseRollup(**row))
+        if len(batch) >= 1000:
+            DailyExpenseRollup.objects.bulk_create(batch)
+            batch = []
+    DailyExpenseRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('budgets', '0003_budget_spent_counters'),
+        ('expenses', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyExpenseRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(max_length=100)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expense_rollups', to='budgets.budget')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expense_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'reports_daily_expense_rollup',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyexpenserollup',
+            constraint=models.UniqueConstraint(fields=('user', 'date', 'budget', 'category'), name='unique_daily_expense_rollup'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:24
+
+from django.db import migrations, models
+
+
+# Lets the report aggregations (by category, by day, per budget) run as
+# index-only scans. INCLUDE columns only exist on PostgreSQL; elsewhere the
+# unique (user, date, budget, category) index already serves these queries,
+# so the index is not declared on the model and is only created here.
+COVERING_INDEX = models.Index(
+    fields=['user', 'date'],
+    include=['category', 'budget', 'total'],
+    name='rollup_user_date_cover_idx',
+)
+
+
+def create_covering_index(apps, schema_editor):
+    if schema_editor.connection.features.supports_covering_indexes:
+        schema_editor.add_index(apps.get_model('reports', 'DailyExpenseRollup'), COVERING_INDEX)
+
+
+def drop_covering_index(apps, schema_editor):
+    if schema_editor.connection.features.supports_covering_indexes:
+        schema_editor.remove_index(apps.get_model('reports', 'DailyExpenseRollup'), COVERING_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_daily_expense_rollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_covering_index, drop_covering_index),
+    ]
@@ -1,3 +1,120 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import Count, F, Sum
+from django.contrib.auth import get_user_model
+from budgets.models import Budget
 
-# Create your models here.
+User = get_user_model()
+
+
+class DailyExpenseRollupQuerySet(models.QuerySet):
+    """QuerySet for maintaining and rebuilding expense rollups"""
+    
+    def apply(self, user_id, budget_id, date, category, amount, count):
+        """Atomically add `amount` and `count` to one rollup row, creating it if needed"""
+        key = self.filter(user_id=user_id, budget_id=budget_id, date=date, category=category)
+        delta = {'total': F('total') + amount, 'count': F('count') + count}
+        
+        if key.update(**delta):
+            if count < 0:
+                key.filter(count__lte=0).delete()
+            return
+        if count <= 0:
+            # Nothing to subtract from; the row was never backfilled
+            return
+        try:
+            with transaction.atomic():
+                self.create(
+                    user_id=user_id, budget_id=budget_id, date=date,
+                    category=category, total=amount, count=count
+                )
+        except IntegrityError:
+            # Another worker created the row first
+            key.update(**delta)
+    
+    def apply_many(self, deltas):
+        """Apply `{(user_id, budget_id, date, category): (amount, count)}` deltas.
+
+        Existing rows are adjusted with one relative UPDATE and missing rows
+        inserted with one INSERT, falling back to `apply()` per key if another
+        worker inserts one of them concurrently.
+        """
+        if not deltas:
+            return
+        user_ids = {key[0] for key in deltas}
+        budget_ids = {key[1] for key in deltas}
+        dates = [key[2] for key in deltas]
+        existing = {
+            (row.user_id, row.budget_id, row.date, row.category): row.pk
+            for row in self.filter(
+                user_id__in=user_ids, budget_id__in=budget_ids,
+                date__range=[min(dates), max(dates)]
+            ).only('pk', 'user_id', 'budget_id', 'date', 'category')
+        }
+        
+        self.bulk_update([
+            self.model(pk=existing[key], total=F('total') + amount, count=F('count') + count)
+            for key, (amount, count) in deltas.items() if key in existing
+        ], ['total', 'count'])
+        emptied = [existing[key] for key, (amount, count) in deltas.items() if key in existing and count < 0]
+        if emptied:
+            self.filter(pk__in=emptied, count__lte=0).delete()
+        
+        missing = [
+            self.model(user_id=key[0], budget_id=key[1], date=key[2], category=key[3], total=amount, count=count)
+            for key, (amount, count) in deltas.items() if key not in existing and count > 0
+        ]
+        if not missing:
+            return
+        try:
+            with transaction.atomic():
+                self.bulk_create(missing)
+        except IntegrityError:
+            for row in missing:
+                self.apply(row.user_id, row.budget_id, row.date, row.category, row.total, row.count)
+    
+    def rebuild(self, users=None, batch_size=1000):
+        """Recompute rollups from the expense rows, one user per transaction"""
+        from expenses.models import Expense
+        
+        user_ids = users if users is not None else User.objects.order_by('pk').values_list('pk', flat=True)
+        created = 0
+        for user_id in user_ids:
+            rows = Expense.objects.filter(user_id=user_id).order_by().values(
+                'budget_id', 'date', 'category'
+            ).annotate(total=Sum('amount'), count=Count('pk'))
+            
+            with transaction.atomic():
+                self.filter(user_id=user_id).delete()
+                batch = []
+                for row in rows.iterator(chunk_size=batch_size):
+                    batch.append(self.model(user_id=user_id, **row))
+                    if len(batch) >= batch_size:
+                        created += len(self.bulk_create(batch))
+                        batch = []
+                created += len(self.bulk_create(batch))
+        return created
+
+
+class DailyExpenseRollup(models.Model):
+    """Per-day expense totals for one user, budget and category"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='expense_rollups')
+    budget = models.ForeignKey(Budget, on_delete=models.CASCADE, related_name='expense_rollups')
+    date = models.DateField()
+    category = models.CharField(max_length=100)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+    
+    objects = DailyExpenseRollupQuerySet.as_manager()
+    
+    class Meta:
+        db_table = 'reports_daily_expense_rollup'
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'date', 'budget', 'category'],
+                name='unique_daily_expense_rollup'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} {self.date} {self.category}: ${self.total} ({self.count})"
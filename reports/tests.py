@@ -1,13 +1,22 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from budgets.models import Budget
 from expenses.models import Expense
+from .engine import ReportEngine, shutdown_query_executor
+from .models import DailyExpenseRollup
 from decimal import Decimal
 from django.utils import timezone
 from datetime import date
+from io import StringIO
+from django.core.management import call_command
+from django.core.cache import cache
+from django.conf import settings
+import threading
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 
 User = get_user_model()
 
@@ -281,3 +290,420 @@ class ReportsAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['summary']['total_expenses'], 0.0)
         self.assertEqual(response.data['summary']['total_budget'], 500.0)
+
+
+@override_settings(REPORT_CACHE_TIMEOUT=0)
+class ReportQueryCountTest(APITestCase):
+    """Reports must cost a constant number of queries regardless of data volume"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='heavyuser',
+            email='heavy@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.today = timezone.now().date()
+    
+    def _seed(self, budget_count, expenses_per_budget=1):
+        offset = Budget.objects.filter(user=self.user).count()
+        budgets = Budget.objects.bulk_create([
+            Budget(
+                user=self.user,
+                name=f'Budget {i}',
+                total_amount=Decimal('100.00'),
+                category=f'Category {i % 10}'
+            )
+            for i in range(offset, offset + budget_count)
+        ])
+        Expense.objects.bulk_create([
+            Expense(
+                budget=budget,
+                user=self.user,
+                description='Seeded expense',
+                amount=Decimal('10.00'),
+                date=self.today,
+                category=budget.category
+            )
+            for budget in budgets
+            for _ in range(expenses_per_budget)
+        ])
+        # bulk_create bypasses the signals that maintain the rollups
+        DailyExpenseRollup.objects.rebuild([self.user.pk])
+    
+    def test_monthly_report_query_count_is_constant(self):
+        """Monthly report runs the same queries for 3 or 3000 budgets"""
+        url = reverse('reports:monthly-report')
+        self._seed(3)
+        with self.assertNumQueries(2):
+            small = self.client.get(url)
+        
+        self._seed(3000)
+        with self.assertNumQueries(2):
+            large = self.client.get(url)
+        
+        self.assertEqual(len(small.data['budget_vs_actual']), 3)
+        self.assertEqual(len(large.data['budget_vs_actual']), 3003)
+        self.assertEqual(large.data['summary']['total_expenses'], 30030.0)
+        self.assertEqual(large.data['summary']['total_budget'], 300300.0)
+    
+    def test_weekly_report_query_count_is_constant(self):
+        """Weekly report runs the same queries for 3 or 3000 budgets"""
+        url = reverse('reports:weekly-report')
+        self._seed(3)
+        with self.assertNumQueries(3):
+            self.client.get(url)
+        
+        self._seed(3000)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        
+        self.assertEqual(response.data['summary']['total_expenses'], 30030.0)
+    
+    def test_budget_vs_actual_per_budget_amounts(self):
+        """Each budget only counts its own expenses inside the period"""
+        self._seed(2, expenses_per_budget=3)
+        first, second = Budget.objects.filter(user=self.user).order_by('name')
+        Expense.objects.create(
+            budget=first,
+            user=self.user,
+            description='Old expense',
+            amount=Decimal('500.00'),
+            date=date(2000, 1, 1),
+            category=first.category
+        )
+        
+        url = reverse('reports:monthly-report')
+        response = self.client.get(url)
+        
+        rows = {row['budget_name']: row for row in response.data['budget_vs_actual']}
+        self.assertEqual(rows['Budget 0']['actual_amount'], 30.0)
+        self.assertEqual(rows['Budget 0']['remaining_amount'], 70.0)
+        self.assertEqual(rows['Budget 1']['actual_amount'], 30.0)
+        self.assertEqual(rows['Budget 1']['spent_percentage'], 30.0)
+
+
+class DailyExpenseRollupTest(APITestCase):
+    """Test cases for the daily expense rollups maintained on write"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            name='Groceries',
+            total_amount=Decimal('500.00'),
+            category='Food'
+        )
+    
+    def _create_expense(self, amount, day=15, category='Food'):
+        return Expense.objects.create(
+            budget=self.budget,
+            user=self.user,
+            description='Expense',
+            amount=Decimal(amount),
+            date=date(2025, 1, day),
+            category=category
+        )
+    
+    def _rollups(self):
+        return list(DailyExpenseRollup.objects.order_by('date', 'category').values_list(
+            'date', 'category', 'total', 'count'
+        ))
+    
+    def test_create_and_update(self):
+        """Test that creates and updates move amounts between rollup rows"""
+        expense = self._create_expense('10.00')
+        self._create_expense('5.00')
+        self.assertEqual(self._rollups(), [(date(2025, 1, 15), 'Food', Decimal('15.00'), 2)])
+        
+        expense.amount = Decimal('20.00')
+        expense.save()
+        self.assertEqual(self._rollups(), [(date(2025, 1, 15), 'Food', Decimal('25.00'), 2)])
+        
+        expense.date = date(2025, 1, 16)
+        expense.category = 'Snacks'
+        expense.save()
+        self.assertEqual(self._rollups(), [
+            (date(2025, 1, 15), 'Food', Decimal('5.00'), 1),
+            (date(2025, 1, 16), 'Snacks', Decimal('20.00'), 1),
+        ])
+    
+    def test_delete_removes_empty_rows(self):
+        """Test that deleting the last expense of a day drops its rollup row"""
+        expense = self._create_expense('10.00')
+        self._create_expense('7.00', day=20)
+        
+        expense.delete()
+        self.assertEqual(self._rollups(), [(date(2025, 1, 20), 'Food', Decimal('7.00'), 1)])
+    
+    def test_backfill_command(self):
+        """Test that the backfill command rebuilds rollups in batches"""
+        Expense.objects.bulk_create([
+            Expense(
+                budget=self.budget,
+                user=self.user,
+                description='Imported',
+                amount=Decimal('3.00'),
+                date=date(2025, 1, day),
+                category='Food'
+            )
+            for day in range(1, 11)
+            for _ in range(2)
+        ])
+        self.assertEqual(DailyExpenseRollup.objects.count(), 0)
+        
+        out = StringIO()
+        call_command('backfill_expense_rollups', '--batch-size', '3', stdout=out)
+        
+        self.assertIn('Wrote 10 rollup row(s)', out.getvalue())
+        self.assertEqual(self._rollups()[0], (date(2025, 1, 1), 'Food', Decimal('6.00'), 2))
+    
+    def test_monthly_report_reads_rollups(self):
+        """Test that the monthly report reads only the period's rollup rows"""
+        for day in range(1, 29):
+            for _ in range(3):
+                self._create_expense('1.00', day=day)
+        
+        self.client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('reports:monthly-report'), {'month': 1, 'year': 2025})
+        
+        self.assertEqual(response.data['summary']['total_expenses'], 84.0)
+        self.assertEqual(response.data['budget_vs_actual'][0]['actual_amount'], 84.0)
+        self.assertNotIn('expenses_expense', ' '.join(q['sql'] for q in queries.captured_queries))
+
+
+@override_settings(CACHE_IS_SHARED=True)
+class ReportCacheTest(APITestCase):
+    """Test cases for versioned report caching"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            name='Groceries',
+            total_amount=Decimal('500.00'),
+            category='Food'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('reports:monthly-report')
+        self.params = {'month': 1, 'year': 2025}
+    
+    def _create_expense(self, amount):
+        return Expense.objects.create(
+            budget=self.budget,
+            user=self.user,
+            description='Expense',
+            amount=Decimal(amount),
+            date=date(2025, 1, 15),
+            category='Food'
+        )
+    
+    def test_repeated_report_is_served_from_cache(self):
+        """Test that a second identical request runs no queries"""
+        first = self.client.get(self.url, self.params)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, self.params)
+        
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.data, second.data)
+    
+    def test_expense_write_invalidates(self):
+        """Test that creating, updating and deleting expenses invalidates the report"""
+        self.client.get(self.url, self.params)
+        expense = self._create_expense('40.00')
+        
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['summary']['total_expenses'], 40.0)
+        
+        expense.amount = Decimal('10.00')
+        expense.save()
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.data['summary']['total_expenses'], 10.0)
+        
+        expense.delete()
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.data['summary']['total_expenses'], 0.0)
+    
+    def test_budget_write_invalidates(self):
+        """Test that budget changes invalidate the report"""
+        self.client.get(self.url, self.params)
+        self.budget.total_amount = Decimal('800.00')
+        self.budget.save()
+        
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['summary']['total_budget'], 800.0)
+    
+    def test_other_users_writes_do_not_invalidate(self):
+        """Test that versions are per user"""
+        other_user = User.objects.create_user(username='otheruser', password='otherpass123')
+        self.client.get(self.url, self.params)
+        Budget.objects.create(
+            user=other_user,
+            name='Other',
+            total_amount=Decimal('10.00'),
+            category='Food'
+        )
+        
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response['X-Cache'], 'HIT')
+    
+    def test_cache_stats(self):
+        """Test that hit/miss counters are exposed to staff only"""
+        self.client.get(self.url, self.params)
+        self.client.get(self.url, self.params)
+        self.client.get(reverse('reports:weekly-report'))
+        
+        url = reverse('reports:cache-stats')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.data, {'hits': 1, 'misses': 2, 'hit_ratio': 0.3333})
+    
+    @override_settings(CACHE_IS_SHARED=False)
+    def test_not_cached_without_shared_cache(self):
+        """Test that reports are built on every request when each process has its own cache"""
+        self.client.get(self.url, self.params)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, self.params)
+        
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertFalse(any(':reports:' in key for key in cache._cache))
+
+
+@override_settings(REPORT_CACHE_TIMEOUT=0, CACHE_IS_SHARED=True)
+class ReportConditionalGetTest(APITestCase):
+    """Test cases for ETag/Last-Modified on reports"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            name='Groceries',
+            total_amount=Decimal('500.00'),
+            category='Food'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('reports:monthly-report')
+        self.params = {'month': 1, 'year': 2025}
+    
+    def test_if_none_match_skips_report_queries(self):
+        """Test that a matching ETag returns 304 without querying"""
+        response = self.client.get(self.url, self.params)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        
+        with self.assertNumQueries(0):
+            revalidated = self.client.get(self.url, self.params, HTTP_IF_NONE_MATCH=response['ETag'])
+        
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(revalidated['ETag'], response['ETag'])
+    
+    def test_etag_depends_on_period_and_data(self):
+        """Test that other periods and expense writes change the ETag"""
+        response = self.client.get(self.url, self.params)
+        
+        other_month = self.client.get(self.url, {'month': 2, 'year': 2025}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(other_month.status_code, status.HTTP_200_OK)
+        
+        Expense.objects.create(
+            budget=self.budget,
+            user=self.user,
+            description='Expense',
+            amount=Decimal('40.00'),
+            date=date(2025, 1, 15),
+            category='Food'
+        )
+        changed = self.client.get(self.url, self.params, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.data['summary']['total_expenses'], 40.0)
+        self.assertNotEqual(changed['ETag'], response['ETag'])
+    
+    def test_weekly_report_if_modified_since(self):
+        """Test that If-Modified-Since revalidates the weekly report"""
+        url = reverse('reports:weekly-report')
+        response = self.client.get(url)
+        
+        revalidated = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+@override_settings(REPORT_CONCURRENT_QUERIES=True)
+class ReportConcurrentQueriesTest(TransactionTestCase):
+    """Test cases for running report queries concurrently"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        budget = Budget.objects.create(user=self.user, name='Food', total_amount=Decimal('500.00'), category='Food')
+        for day, amount in ((date(2025, 1, 13), '12.50'), (date(2025, 1, 14), '30.00')):
+            Expense.objects.create(
+                user=self.user, budget=budget, description='Groceries',
+                amount=Decimal(amount), date=day, category='Food'
+            )
+    
+    def tearDown(self):
+        # The query threads keep their connections (CONN_MAX_AGE), which would
+        # stop the test database from being dropped
+        shutdown_query_executor()
+    
+    def _build(self, name, start_date, end_date):
+        """Build a report, returning it and the threads its queries ran on"""
+        threads = []
+        
+        def record_thread(execute, sql, params, many, context):
+            threads.append(threading.get_ident())
+            return execute(sql, params, many, context)
+        
+        engine = ReportEngine(self.user, start_date, end_date)
+        with connection.execute_wrapper(record_thread):
+            report = engine.build(name)
+        return report, threads
+    
+    def test_queries_run_on_query_threads(self):
+        """Test that all but the first query run on the query threads with the same results"""
+        for name, start_date, end_date in (
+            ('monthly', date(2025, 1, 1), date(2025, 1, 31)),
+            ('weekly', date(2025, 1, 13), date(2025, 1, 19)),
+        ):
+            report, threads = self._build(name, start_date, end_date)
+            
+            expected = getattr(ReportEngine(self.user, start_date, end_date), name)()
+            self.assertEqual(report, expected)
+            self.assertEqual(len(threads), 2 if name == 'monthly' else 3)
+            self.assertEqual(threads.count(threading.get_ident()), 1)
+    
+    def test_query_threads_outlive_reports(self):
+        """Test that every report reuses the same few query threads"""
+        threads = set()
+        for _ in range(5):
+            threads.update(self._build('weekly', date(2025, 1, 13), date(2025, 1, 19))[1])
+        
+        threads.discard(threading.get_ident())
+        self.assertLessEqual(len(threads), settings.REPORT_QUERY_THREADS)
+    
+    def test_sequential_inside_transaction(self):
+        """Test that queries inside a transaction stay on its connection"""
+        with transaction.atomic():
+            report, threads = self._build('monthly', date(2025, 1, 1), date(2025, 1, 31))
+        
+        self.assertEqual(report['summary']['total_expenses'], Decimal('42.50'))
+        self.assertEqual(threads, [threading.get_ident()] * 2)
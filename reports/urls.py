@@ -1,9 +1,10 @@
 from django.urls import path
-from .views import MonthlyReportView, WeeklyReportView
+from .views import MonthlyReportView, WeeklyReportView, ReportCacheStatsView
 
 app_name = 'reports'
 
 urlpatterns = [
     path('monthly/', MonthlyReportView.as_view(), name='monthly-report'),
     path('weekly/', WeeklyReportView.as_view(), name='weekly-report'),
+    path('cache-stats/', ReportCacheStatsView.as_view(), name='cache-stats'),
 ]
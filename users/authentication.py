@@ -0,0 +1,50 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from personal_budgeting_api.metrics import JWT_AUTHENTICATIONS
+from .revocation import is_revoked
+from .user_cache import get_cached_user
+
+
+class JWTAuthentication(authentication.JWTAuthentication):
+    """simplejwt authentication that counts its outcomes in the metrics,
+    rejects revoked tokens (users.revocation) and resolves users through
+    the user cache (users.user_cache)
+    """
+    
+    def authenticate(self, request):
+        try:
+            result = super().authenticate(request)
+        except InvalidToken:
+            JWT_AUTHENTICATIONS.labels('invalid_token').inc()
+            raise
+        except AuthenticationFailed as exc:
+            # user_not_found, user_inactive, bad_authorization_header...
+            JWT_AUTHENTICATIONS.labels(getattr(exc.detail, 'code', None) or 'failed').inc()
+            raise
+        JWT_AUTHENTICATIONS.labels('success' if result is not None else 'no_token').inc()
+        return result
+    
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if is_revoked(validated_token):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+        return validated_token
+    
+    def get_user(self, validated_token):
+        # Revocation on password change compares a hash of the password
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return super().get_user(validated_token)
+        
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        
+        user = get_cached_user(api_settings.USER_ID_FIELD, user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
@@ -0,0 +1,55 @@
+"""
+Password hashers with their cost set in settings.
+
+Each one is Django's hasher for the same algorithm, so hashes made by
+either verify with the other, but the work factors come from settings
+instead of code. Django rehashes a password when its user logs in if it
+was hashed with another algorithm than the first of PASSWORD_HASHERS,
+or with other parameters: switching PASSWORD_HASHER_PROFILE or changing
+a cost setting migrates the stored hashes as users log in.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with PASSWORD_PBKDF2_ITERATIONS iterations"""
+    
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """scrypt with N, r and p from PASSWORD_SCRYPT_WORK_FACTOR, _BLOCK_SIZE and _PARALLELISM"""
+    # A limit, not an allocation: hashlib.scrypt refuses more than 32 MiB by
+    # default, and hashes made with larger settings must still verify
+    maxmem = 1024 ** 3
+    
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+    
+    @property
+    def block_size(self):
+        return settings.PASSWORD_SCRYPT_BLOCK_SIZE
+    
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_SCRYPT_PARALLELISM
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id with PASSWORD_ARGON2_TIME_COST, _MEMORY_COST (KiB) and _PARALLELISM"""
+    
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+    
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+    
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
@@ -13,3 +13,17 @@ class User(AbstractUser):
     
     def __str__(self):
         return self.username
+
+
+class RevokedToken(models.Model):
+    """JWT revoked before it expires, by logout or refresh token rotation"""
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='revoked_tokens')
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        db_table = 'users_revokedtoken'
+    
+    def __str__(self):
+        return self.jti
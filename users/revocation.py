@@ -0,0 +1,103 @@
+"""
+JWT revocation.
+
+A revoked token is stored as a RevokedToken row until it expires; the
+table is the deny-list every process shares. Checking the token of each
+request must not cost a query, so every process keeps the JTIs of the
+unexpired revoked tokens in memory and syncs them with the table at most
+every TOKEN_REVOCATION_SYNC_SECONDS. A token is rejected at once by the
+process that revoked it, and by the others after their next sync.
+
+Refresh tokens are checked against the table itself: refreshing is rare,
+and a rotated refresh token must not be reusable even for a moment.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from .models import RevokedToken
+
+# Each sync re-reads rows revoked this long before the previous one, so a
+# row whose transaction committed late, or whose revoking host's clock is
+# behind, is still picked up
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class DenyList:
+    """JTIs of the revoked, unexpired tokens, synced from RevokedToken"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._expiry = {}
+        self._since = None
+        self._synced_at = None
+
+    def _sync_due(self):
+        return self._synced_at is None or time.monotonic() - self._synced_at >= settings.TOKEN_REVOCATION_SYNC_SECONDS
+
+    def sync(self):
+        """Add the tokens revoked since the last sync and drop the expired ones (1 query)"""
+        with self._lock:
+            now = timezone.now()
+            rows = RevokedToken.objects.filter(expires_at__gt=now)
+            if self._since is not None:
+                rows = rows.filter(revoked_at__gte=self._since - SYNC_OVERLAP)
+            expiry = {jti: exp for jti, exp in self._expiry.items() if exp > now.timestamp()}
+            for jti, expires_at in rows.values_list('jti', 'expires_at'):
+                expiry[jti] = expires_at.timestamp()
+            self._expiry = expiry
+            self._since = now
+            self._synced_at = time.monotonic()
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._expiry[jti] = expires_at.timestamp()
+
+    def __contains__(self, jti):
+        if self._sync_due():
+            self.sync()
+        return jti in self._expiry
+
+
+deny_list = DenyList()
+
+
+def _jti(token):
+    return token.get(api_settings.JTI_CLAIM)
+
+
+def revoke_tokens(*tokens):
+    """Reject the validated simplejwt `tokens` from now until they expire (2 queries)"""
+    revoked = [
+        RevokedToken(
+            jti=_jti(token), user_id=token[api_settings.USER_ID_CLAIM],
+            expires_at=datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+        )
+        for token in tokens if _jti(token) is not None
+    ]
+    if not revoked:
+        return
+    with transaction.atomic():
+        # Expired tokens are rejected on their exp claim; their rows can go
+        RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        RevokedToken.objects.bulk_create(revoked, ignore_conflicts=True)
+    for row in revoked:
+        deny_list.add(row.jti, row.expires_at)
+
+
+def is_revoked(token):
+    """Whether `token` is in the deny-list (no query between syncs)"""
+    jti = _jti(token)
+    return jti is not None and jti in deny_list
+
+
+def is_revoked_now(token):
+    """Whether `token` has been revoked by any process (1 query)"""
+    jti = _jti(token)
+    return jti is not None and RevokedToken.objects.filter(jti=jti).exists()
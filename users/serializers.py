@@ -1,6 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 from .models import User
+from .revocation import is_revoked_now, revoke_tokens
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -50,3 +55,33 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'date_joined']
         read_only_fields = ['id', 'date_joined']
+
+
+class LogoutSerializer(serializers.Serializer):
+    """Serializer for logout: the refresh token to revoke along with the access token"""
+    refresh = serializers.CharField(required=False)
+    
+    def validate_refresh(self, value):
+        try:
+            token = RefreshToken(value)
+        except TokenError as exc:
+            raise serializers.ValidationError(str(exc))
+        user = self.context['request'].user
+        if token.get(api_settings.USER_ID_CLAIM) != getattr(user, api_settings.USER_ID_FIELD):
+            raise serializers.ValidationError('Token belongs to another user')
+        return token
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """simplejwt's refresh serializer, refusing revoked refresh tokens and
+    revoking rotated ones when BLACKLIST_AFTER_ROTATION is set
+    """
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if is_revoked_now(refresh):
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        data = super().validate(attrs)
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            revoke_tokens(refresh)
+        return data
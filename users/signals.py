@@ -0,0 +1,24 @@
+"""
+Drop the cached authentication user on every User write, and move the
+user's data version when the username, which expense and budget rows
+render, may have changed.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+from .user_cache import forget_user
+from .versioning import data_changed
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    """Forget the cached copy of the user; invalidate ETags showing the username"""
+    if raw:
+        return
+    forget_user(getattr(instance, api_settings.USER_ID_FIELD), using=using)
+    if update_fields is None or 'username' in update_fields:
+        data_changed(instance.pk, using=using)
@@ -1,8 +1,20 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from .models import RevokedToken
+from .revocation import deny_list
 
 User = get_user_model()
 
@@ -149,3 +161,222 @@ class UserProfileTest(APITestCase):
         self.client.force_authenticate(user=None)
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(CACHE_IS_SHARED=True)
+class CachedJWTAuthenticationTest(APITestCase):
+    """Test cases for JWT authentication through the user cache"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='User'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.url = reverse('users:profile')
+    
+    def user_queries(self):
+        """Requests the profile, returning (response, queries on the user table)"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        return response, [query['sql'] for query in queries if 'users_user' in query['sql']]
+    
+    def test_cached_user_needs_no_query(self):
+        """Test that only the first request loads the user, without its password"""
+        response, first = self.user_queries()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(first), 1)
+        self.assertNotIn('password', first[0])
+        
+        response, second = self.user_queries()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['username'], 'testuser')
+        self.assertEqual(second, [])
+    
+    def test_profile_update_invalidates_cache(self):
+        """Test that a profile update is seen by the next request and keeps the password"""
+        self.client.get(self.url)
+        response = self.client.patch(self.url, {'first_name': 'Updated'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        response, queries = self.user_queries()
+        self.assertEqual(response.data['first_name'], 'Updated')
+        self.assertEqual(len(queries), 1)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('testpass123'))
+    
+    def test_deactivated_user_rejected(self):
+        """Test that a deactivated account is rejected on the next request"""
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['code'], 'user_inactive')
+    
+    def test_deleted_user_rejected(self):
+        """Test that a deleted account is rejected on the next request"""
+        self.client.get(self.url)
+        self.user.delete()
+        
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['code'], 'user_not_found')
+    
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=0)
+    def test_cache_disabled(self):
+        """Test that the user is loaded on every request when caching is off"""
+        self.user_queries()
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+    
+    @override_settings(CACHE_IS_SHARED=False)
+    def test_not_cached_without_shared_cache(self):
+        """Test that the user is loaded on every request when each process has its own cache"""
+        self.user_queries()
+        response, queries = self.user_queries()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+
+
+class TokenRevocationTest(APITestCase):
+    """Test cases for logout and the revoked token deny-list"""
+    
+    def setUp(self):
+        deny_list.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.refresh = RefreshToken.for_user(self.user)
+        self.access = self.refresh.access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        self.profile_url = reverse('users:profile')
+        self.logout_url = reverse('users:logout')
+    
+    def test_logout_revokes_access_token(self):
+        """Test that the access token is rejected after logout"""
+        response = self.client.post(self.logout_url, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        response = self.client.get(self.profile_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['code'], 'token_revoked')
+        self.assertTrue(RevokedToken.objects.filter(jti=self.access['jti'], user=self.user).exists())
+    
+    def test_logout_revokes_refresh_token(self):
+        """Test that the refresh token given at logout can no longer be used"""
+        response = self.client.post(self.logout_url, {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        response = self.client.post(reverse('token_refresh'), {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['code'], 'token_revoked')
+    
+    def test_logout_rejects_other_users_refresh_token(self):
+        """Test that a user cannot revoke another user's refresh token"""
+        other = User.objects.create_user(username='other', password='testpass123')
+        response = self.client.post(self.logout_url, {'refresh': str(RefreshToken.for_user(other))}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('refresh', response.data)
+        self.assertFalse(RevokedToken.objects.exists())
+    
+    @mock.patch.multiple(api_settings, ROTATE_REFRESH_TOKENS=True, BLACKLIST_AFTER_ROTATION=True)
+    def test_rotated_refresh_token_revoked(self):
+        """Test that a refresh token cannot be reused once rotated"""
+        url = reverse('token_refresh')
+        response = self.client.post(url, {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        response = self.client.post(url, {'refresh': response.data['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(url, {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_check_needs_no_query_between_syncs(self):
+        """Test that tokens are checked in memory until the next sync"""
+        self.client.get(self.profile_url)
+        RevokedToken.objects.create(
+            jti=self.access['jti'], user=self.user,
+            expires_at=timezone.now() + timedelta(hours=1)
+        )
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.profile_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in queries if 'users_revokedtoken' in query['sql']])
+    
+    @override_settings(TOKEN_REVOCATION_SYNC_SECONDS=0)
+    def test_revoked_by_another_process(self):
+        """Test that tokens revoked elsewhere are picked up at the next sync"""
+        self.client.get(self.profile_url)
+        RevokedToken.objects.create(
+            jti=self.access['jti'], user=self.user,
+            expires_at=timezone.now() + timedelta(hours=1)
+        )
+        
+        response = self.client.get(self.profile_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['code'], 'token_revoked')
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000, PASSWORD_SCRYPT_WORK_FACTOR=2 ** 10,
+                   PASSWORD_SCRYPT_PARALLELISM=1, PASSWORD_ARGON2_MEMORY_COST=1024)
+class PasswordHasherProfileTest(APITestCase):
+    """Test cases for the password hasher profiles and rehashing at login"""
+    
+    def profile(self, name):
+        """override_settings() making `name` the hasher profile"""
+        preferred = settings.PASSWORD_HASHER_PROFILES[name]
+        return override_settings(PASSWORD_HASHERS=[preferred] + [
+            hasher for hasher in settings.PASSWORD_HASHERS if hasher != preferred
+        ])
+    
+    def login(self):
+        response = self.client.post(reverse('users:login'), {
+            'username': 'testuser', 'password': 'testpass123'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        return self.user.password
+    
+    def test_hashers_take_costs_from_settings(self):
+        """Test that new hashes use the profile's algorithm and settings"""
+        with self.profile('scrypt'):
+            user = User.objects.create_user(username='testuser', password='testpass123')
+        self.assertTrue(user.password.startswith('scrypt$1024$'))
+        with self.profile('argon2'):
+            user.set_password('testpass123')
+        self.assertIn('$m=1024,t=2,p=1$', user.password)
+    
+    def test_login_rehashes_with_new_profile(self):
+        """Test that logging in migrates a hash to the current profile"""
+        with self.profile('pbkdf2'):
+            self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        
+        with self.profile('argon2'):
+            self.assertTrue(self.login().startswith('argon2$argon2id$'))
+        self.assertTrue(self.user.check_password('testpass123'))
+    
+    def test_login_rehashes_with_new_cost(self):
+        """Test that logging in rehashes a password after a cost change"""
+        with self.profile('scrypt'):
+            self.user = User.objects.create_user(username='testuser', password='testpass123')
+            with override_settings(PASSWORD_SCRYPT_WORK_FACTOR=2 ** 11):
+                self.assertTrue(self.login().startswith('scrypt$2048$'))
+    
+    def test_old_hashes_still_verify(self):
+        """Test that hashes of stock Django hashers verify and are migrated at login"""
+        self.user = User.objects.create_user(username='testuser')
+        self.user.password = make_password('testpass123', hasher='pbkdf2_sha1')
+        self.user.save()
+        with self.profile('scrypt'):
+            self.assertTrue(self.login().startswith('scrypt$'))
@@ -0,0 +1,64 @@
+"""
+Cached users for JWT authentication.
+
+Authenticating a request needs the user's row but never its password
+hash. Every other field of the row is kept in the cache for
+AUTH_USER_CACHE_TIMEOUT seconds, and every save or delete of the user
+drops the entry, now and again once the transaction commits, so profile
+updates and deactivations apply from the next request. Writes that skip
+the model signals (QuerySet.update) apply once the entry expires.
+
+That drop only reaches every process through a shared cache: with a
+per-process local-memory cache, the other workers would keep accepting
+a deactivated user until their copy expired. Users are only cached when
+CACHE_IS_SHARED is set.
+
+Users are rebuilt with the password deferred: reading it loads it from
+the database, and saving such an instance writes only the loaded fields.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from personal_budgeting_api.metrics import record_cache_lookup
+
+EXCLUDED_FIELDS = ('password',)
+
+
+def _key(user_id):
+    return f'users:auth:{user_id}'
+
+
+def _field_names(model):
+    return [field.attname for field in model._meta.concrete_fields if field.attname not in EXCLUDED_FIELDS]
+
+
+def get_cached_user(field, value):
+    """The user whose `field` is `value`, without its password; None if there is none.
+
+    Costs 1 query on a cache miss and none on a hit.
+    """
+    model = get_user_model()
+    names = _field_names(model)
+    timeout = settings.AUTH_USER_CACHE_TIMEOUT if settings.CACHE_IS_SHARED else 0
+    row = cache.get(_key(value)) if timeout else None
+    if timeout:
+        record_cache_lookup('auth_user', row is not None)
+    if row is not None and set(row) != set(names):
+        # Cached before a change to the user model
+        row = None
+    if row is None:
+        values = model.objects.filter(**{field: value}).values_list(*names).first()
+        if values is None:
+            return None
+        row = dict(zip(names, values))
+        if timeout:
+            cache.set(_key(value), row, timeout)
+    return model.from_db(DEFAULT_DB_ALIAS, names, [row[name] for name in names])
+
+
+def forget_user(value, using=None):
+    """Drop the cached user whose lookup value is `value`"""
+    cache.delete(_key(value))
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: cache.delete(_key(value)), using=using)
@@ -0,0 +1,71 @@
+"""
+Per-user data version.
+
+A counter kept in the shared cache and bumped on every write to a user's
+expenses or budgets. Anything derived from that data can be cached under
+the current version and is invalidated by the next bump, without having
+to find and delete the stale entries. The time of the last bump is kept
+next to it and serves as the data's modification time.
+"""
+import time
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _key(user_id):
+    return f'users:data-version:{user_id}'
+
+
+def _modified_key(user_id):
+    return f'users:data-modified:{user_id}'
+
+
+def _clock_version():
+    # Starting from the clock means a version lost to eviction is never reused
+    return int(time.time() * 1000)
+
+
+def get_data_version(user_id):
+    """Current data version of a user, initialising it if missing"""
+    key = _key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _clock_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_data_watermark(user_id):
+    """`(version, modified_at)` of a user's data in one cache round trip.
+
+    `modified_at` is a Unix timestamp; if it was lost it restarts at now.
+    """
+    key, modified_key = _key(user_id), _modified_key(user_id)
+    values = cache.get_many([key, modified_key])
+    if key not in values:
+        values[key] = get_data_version(user_id)
+    if modified_key not in values:
+        cache.add(modified_key, time.time(), timeout=None)
+        values[modified_key] = cache.get(modified_key)
+    return values[key], values[modified_key]
+
+
+def bump_data_version(user_id):
+    """Move a user's data version forward"""
+    key = _key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _clock_version(), timeout=None)
+    cache.set(_modified_key(user_id), time.time(), timeout=None)
+
+
+def data_changed(user_id, using=None):
+    """Bump the version now and again once the current transaction commits.
+
+    The second bump discards anything a concurrent request cached from
+    data read before the write became visible.
+    """
+    bump_data_version(user_id)
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: bump_data_version(user_id), using=using)
@@ -3,8 +3,12 @@ from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt import views as jwt_views
 from django.contrib.auth import get_user_model
-from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserSerializer
+from .revocation import revoke_tokens
+from .serializers import (
+    UserRegistrationSerializer, UserLoginSerializer, UserSerializer, LogoutSerializer, TokenRefreshSerializer
+)
 
 User = get_user_model()
 
@@ -55,6 +59,26 @@ class UserLoginView(generics.GenericAPIView):
         }, status=status.HTTP_200_OK)
 
 
+class LogoutView(generics.GenericAPIView):
+    """View for logout: revokes the access token and the given refresh token"""
+    serializer_class = LogoutSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        tokens = [request.auth, serializer.validated_data.get('refresh')]
+        revoke_tokens(*(token for token in tokens if token is not None))
+        
+        return Response({'message': 'Logout successful'}, status=status.HTTP_200_OK)
+
+
+class TokenRefreshView(jwt_views.TokenRefreshView):
+    """Token refresh that honours revocation"""
+    serializer_class = TokenRefreshSerializer
+
+
 class UserProfileView(generics.RetrieveUpdateAPIView):
     """View for user profile management"""
     serializer_class = UserSerializer